@@ -17,6 +17,38 @@ class Config:
     JWT_TOKEN_LOCATION = ['headers']
     JWT_HEADER_NAME = 'Authorization'
     JWT_HEADER_TYPE = 'Bearer'
+    IDENTITY_CACHE_TTL_SECONDS = 30  # Thời gian sống của thông tin người dùng đã xác thực (id, role, restaurant_id)
+    IDENTITY_CACHE_MAX_ENTRIES = 10000
+    REVOCATION_REFRESH_SECONDS = 5  # Chu kỳ đồng bộ danh sách token bị thu hồi giữa các worker
+    REVOCATION_BLOOM_CAPACITY = 100000
+    REVOCATION_BLOOM_ERROR_RATE = 0.001
+    AUTH_EPOCH_REFRESH_SECONDS = 5  # Chu kỳ đồng bộ epoch quyền giữa các worker (độ trễ tối đa khi hạ quyền/khoá tài khoản)
+
+    # OTP Config
+    # sql: bảng otps (nhiều worker); memory: bộ nhớ process (một worker); shared: redis qua OTP_SHARED_STORE_URL
+    OTP_STORE_BACKEND = os.environ.get('OTP_STORE_BACKEND', 'sql')
+    OTP_SHARED_STORE_URL = os.environ.get('OTP_SHARED_STORE_URL')  # Bỏ trống: dùng key-value trong bộ nhớ thay thế
+    OTP_STORE_STRIPES = 16  # Số lock của backend memory
+    OTP_TTL_SECONDS = 300
+    # Chu kỳ dọn OTP hết hạn ở thread nền; 0 (mặc định) để tắt và dọn bằng lệnh `flask sweep-otps` (cron)
+    OTP_SWEEP_INTERVAL_SECONDS = int(os.environ.get('OTP_SWEEP_INTERVAL_SECONDS', 0))
+
+    # Rate Limit Config (token bucket)
+    RATE_LIMIT_ENABLED = True
+    # Số reverse proxy tin cậy phía trước app: ProxyFix lấy IP client từ X-Forwarded-For (rate limit theo ip).
+    # Mặc định 0 (không tin header do client tự gửi); chỉ đặt > 0 ở môi trường chạy sau đúng chừng ấy proxy
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')  # memory (mỗi process) | shared (redis)
+    RATE_LIMIT_SHARED_STORE_URL = os.environ.get('RATE_LIMIT_SHARED_STORE_URL')
+    RATE_LIMIT_MAX_KEYS = 100000  # Số bucket tối đa giữ trong bộ nhớ của backend memory
+    # {tên: {phạm vi: (capacity, period giây)}}; phạm vi: ip | phone | username | user (JWT)
+    RATE_LIMITS = {
+        'otp_send': {'ip': (10, 600), 'phone': (3, 300)},
+        'otp_verify': {'ip': (30, 600), 'phone': (5, 300)},
+        'staff_login': {'ip': (20, 600), 'username': (5, 300)},
+        'search': {'ip': (60, 60), 'user': (60, 60)},
+        'suggest': {'ip': (300, 60)},
+    }
     
     # Flask Admin
     FLASK_ADMIN_SWATCH = 'cerulean'
@@ -26,10 +58,34 @@ class Config:
     DEFAULT_PER_PAGE = 10
     MAX_PER_PAGE = 100
     MIN_PER_PAGE = 1
+    JSON_STREAM_CHUNK_ITEMS = 200  # Số phần tử mỗi lần gửi khi stream danh sách JSON
+    BATCH_MAX_IDS = 100  # Số id tối đa cho các endpoint batch (?ids=)
+    BATCH_MAX_REQUESTS = 20  # Số request con tối đa của /api/batch
+    BATCH_MAX_WORKERS = 8  # Số thread chạy song song các request con
+    
+    # Compression Config (br cần `brotli`, zstd cần `zstandard`; thiếu thư viện thì bỏ qua thuật toán đó)
+    COMPRESSION_ALGORITHMS = ['zstd', 'br', 'gzip']  # Thứ tự ưu tiên khi client chấp nhận ngang nhau
+    COMPRESSION_LEVELS = {'gzip': 6, 'br': 4, 'zstd': 3}
+    COMPRESSION_MIN_SIZE = 1024  # Bytes; phản hồi nhỏ hơn không nén
+    COMPRESSION_MIMETYPES = ['application/json', 'application/msgpack', 'text/html', 'text/plain']
     
     # Search Config
     MAX_SEARCH_RESULTS = 50
     MAX_FOODS_PER_RESTAURANT = 3
+    SEARCH_INDEX_REFRESH_SECONDS = 30  # Chu kỳ đồng bộ index tìm kiếm với DB
+    SEARCH_CACHE_TTL_SECONDS = 60  # Thời gian sống của kết quả tìm kiếm đã cache
+    SEARCH_CACHE_MAX_ENTRIES = 1024
+    SEARCH_TRIGRAM_BACKEND = os.environ.get('SEARCH_TRIGRAM_BACKEND', 'memory')  # memory | pg_trgm
+    SEARCH_TRIGRAM_THRESHOLD = 0.5  # Độ tương đồng tối thiểu khi tìm gần đúng
+    SEARCH_TRIGRAM_LIMIT = 200
+    SEARCH_MAX_BOUND_IDS = 500  # Tập id khớp lớn hơn thì gửi trong một tham số thay vì IN (...) từng id
+    # Trọng số xếp hạng relevance: độ liên quan từ khoá (BM25), khoảng cách, độ phổ biến
+    SEARCH_RELEVANCE_WEIGHTS = {'text': 1.0, 'distance': 0.5, 'popularity': 0.3}
+    SEARCH_DISTANCE_DECAY_KM = 3.0
+    SEARCH_POPULARITY_REFRESH_SECONDS = 300
+    SUGGEST_LIMIT = 10
+    SUGGEST_MAX_LIMIT = 20
+    SUGGEST_INDEX_REFRESH_SECONDS = 300  # Chu kỳ tính lại độ phổ biến của gợi ý
     
     # Order Config
     ORDER_STATUSES = ['pending', 'accepted', 'completed', 'cancelled']
@@ -45,6 +101,8 @@ class Config:
     
     # Distance Config (km)
     MAX_DELIVERY_DISTANCE = 20.0
+    GEO_INDEX_CELL_DEGREES = 0.01  # ~1.1km mỗi ô lưới
+    GEO_INDEX_REFRESH_SECONDS = 30
     
     # Rating Config
     MIN_RATING = 1
@@ -63,8 +121,14 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
 
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite://'
+    RATE_LIMIT_ENABLED = False
+
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
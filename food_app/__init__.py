@@ -6,16 +6,28 @@ from flask_admin import Admin
 from flask_login import LoginManager
 from flasgger import Swagger
 from config import config
+from food_app.utils.compression import Compression
 
 db = SQLAlchemy()
 jwt = JWTManager()
 login_manager = LoginManager()
 flask_admin = Admin(name='Food Ordering Admin', template_mode='bootstrap4')
 swagger = Swagger()
+compression = Compression()
 
 def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+
+    # IP client thật khi chạy sau reverse proxy (request.remote_addr dùng cho rate limit)
+    proxy_hops = app.config.get('PROXY_FIX_X_FOR', 0)
+    if proxy_hops:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_hops)
+    
+    # JSON encoder nhanh (orjson nếu có) cho jsonify/success_response
+    from food_app.utils.json_encoder import FastJSONProvider
+    app.json = FastJSONProvider(app)
     
     # Cấu hình JWT
     app.config['JWT_TOKEN_LOCATION'] = ['headers']
@@ -49,6 +61,13 @@ def create_app(config_name='default'):
     login_manager.login_view = 'admin_auth.index'
     flask_admin.init_app(app)
     swagger.init_app(app)
+    compression.init_app(app)
+
+    from food_app.utils.otp_store import otp_service
+    otp_service.init_app(app)
+
+    from food_app.utils.rate_limit import rate_limiter
+    rate_limiter.init_app(app)
     
     # Global JSON error handlers
     from werkzeug.exceptions import HTTPException
@@ -62,6 +81,18 @@ def create_app(config_name='default'):
     def handle_exception(e: Exception):
         return error_response('Internal Server Error', 500)
 
+    # Token đã đăng xuất: Bloom filter trong bộ nhớ chặn trước, chỉ hỏi DB khi filter báo có
+    from food_app.utils.revocation import revocation_list, sweep_revoked_tokens_command
+    app.cli.add_command(sweep_revoked_tokens_command)
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return revocation_list.is_revoked(jwt_payload.get('jti'))
+
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return error_response('Token đã bị thu hồi', 401)
+
     # Đăng ký blueprints
     from food_app.routes.auth import auth_bp
     from food_app.routes.search import search_bp
@@ -73,6 +104,7 @@ def create_app(config_name='default'):
     from food_app.routes.restaurant import restaurant_bp
     from food_app.routes.coupon import coupon_bp
     from food_app.routes.payment import payment_bp
+    from food_app.routes.batch import batch_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(search_bp, url_prefix='/api/search')
@@ -84,6 +116,7 @@ def create_app(config_name='default'):
     app.register_blueprint(restaurant_bp, url_prefix='/api/restaurant')
     app.register_blueprint(coupon_bp, url_prefix='/api/coupon')
     app.register_blueprint(payment_bp, url_prefix='/api/payment')
+    app.register_blueprint(batch_bp, url_prefix='/api/batch')
     
     from food_app.models.user import User
     @login_manager.user_loader
@@ -1,5 +1,5 @@
 from food_app.dao import UserDAO, CustomerDAO, OrderDAO
-from food_app.utils.responses import success_response, error_response
+from food_app.utils.responses import success_response, error_response, stream_response
 
 class AdminController:
     @staticmethod
@@ -46,10 +46,9 @@ class AdminController:
     def get_users(role=None):
         """API lấy danh sách người dùng"""
         try:
-            users = UserDAO.get_users_by_role(role)
-            users_data = [user.to_dict() for user in users]
+            users = UserDAO.iter_users_by_role(role)
 
-            return success_response('Lấy danh sách người dùng thành công', users_data)
+            return stream_response('Lấy danh sách người dùng thành công', (user.to_dict() for user in users))
 
         except Exception as e:
             return error_response(f'Lỗi server: {str(e)}', 500)
@@ -58,10 +57,11 @@ class AdminController:
     def get_customers():
         """API lấy danh sách khách hàng"""
         try:
-            customers = CustomerDAO.get_all_customers()
-            customers_data = [customer.to_dict() for customer in customers]
+            customers = CustomerDAO.iter_customers()
 
-            return success_response('Lấy danh sách khách hàng thành công', customers_data)
+            return stream_response(
+                'Lấy danh sách khách hàng thành công', (customer.to_dict() for customer in customers)
+            )
 
         except Exception as e:
             return error_response(f'Lỗi server: {str(e)}', 500)
@@ -70,10 +70,9 @@ class AdminController:
     def get_all_orders(status=None):
         """API lấy tất cả đơn hàng"""
         try:
-            orders = OrderDAO.get_orders_by_status(status)
-            orders_data = [order.to_dict() for order in orders]
+            orders = OrderDAO.iter_orders_by_status(status)
 
-            return success_response('Lấy danh sách đơn hàng thành công', orders_data)
+            return stream_response('Lấy danh sách đơn hàng thành công', (order.to_dict() for order in orders))
 
         except Exception as e:
             return error_response(f'Lỗi server: {str(e)}', 500)
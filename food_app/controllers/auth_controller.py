@@ -1,5 +1,10 @@
-from food_app.dao import UserDAO, CustomerDAO, OTPDAO
-from food_app.utils.jwt_service import generate_tokens
+from food_app.dao import UserDAO, CustomerDAO
+from food_app.utils.jwt_service import generate_tokens, generate_access_token, get_user_type_from_jwt
+from food_app.utils.auth_epoch import auth_epochs
+from food_app.utils.identity_cache import load_principal
+from food_app.utils.revocation import revocation_list
+from food_app.utils.otp_store import otp_service
+from flask_jwt_extended import decode_token
 from food_app.utils.sms import send_otp_sms
 from werkzeug.security import generate_password_hash
 from food_app.utils.validators import validate_phone, validate_password, validate_email, normalize_phone
@@ -34,7 +39,7 @@ class AuthController:
             UserDAO.update_last_login(user)
 
             # Tạo JWT tokens
-            tokens = generate_tokens(user.id, 'staff', user.role)
+            tokens = generate_tokens(user.id, 'staff', user.role, user.restaurant_id)
 
             response_data = {
                 'user': user.to_dict(),
@@ -99,7 +104,7 @@ class AuthController:
         if existing_user and existing_user.user_type == 'staff':
             return error_response('Số điện thoại đã được đăng ký bởi tài khoản nhân viên', 400)
 
-        otp_code = OTPDAO.generate_otp_for_phone(normalized_phone)
+        otp_code = otp_service.generate(normalized_phone)
         return success_response('OTP đã được tạo', {'otp': otp_code}, 200)
 
     @staticmethod
@@ -112,7 +117,7 @@ class AuthController:
 
         normalized_phone = normalize_phone(phone)
         
-        if not OTPDAO.verify_otp(normalized_phone, otp_code):
+        if not otp_service.verify(normalized_phone, otp_code):
             return error_response('Mã OTP không đúng hoặc đã hết hạn', 400)
 
         customer = CustomerDAO.get_customer_by_phone(normalized_phone)
@@ -124,7 +129,7 @@ class AuthController:
             is_new = True
 
         CustomerDAO.update_customer(customer, {'last_login': datetime.utcnow()})
-        tokens = generate_tokens(customer.id, 'customer')
+        tokens = generate_tokens(customer.id, 'customer', is_active=customer.is_active)
 
         response_data = {
             'customer': customer.to_dict(),
@@ -138,11 +143,15 @@ class AuthController:
     def refresh_token(identity):
         """Làm mới access token bằng refresh token"""
         try:
-            from flask_jwt_extended import create_access_token
-            # Đảm bảo identity là string
-            if not isinstance(identity, (str, int)):
-                identity = str(identity)
-            access_token = create_access_token(identity=identity)
+            # Claims của access token mới lấy theo quyền hiện tại, không chép từ refresh token
+            auth_epochs.ensure_ready()
+            user_type = 'customer' if get_user_type_from_jwt() == 'customer' else 'staff'
+            principal = load_principal(user_type, identity)
+            if not principal:
+                return error_response('Người dùng không tồn tại', 404)
+            if not principal.is_active:
+                return error_response('Tài khoản đã bị khóa', 401)
+            access_token = generate_access_token(principal.id, user_type, principal.role, principal.restaurant_id)
 
             return success_response('Làm mới token thành công', {
                 'access_token': access_token,
@@ -152,6 +161,30 @@ class AuthController:
         except Exception as e:
             return error_response(f'Lỗi server: {str(e)}', 500)
 
+    @staticmethod
+    def logout(claims, data=None):
+        """Thu hồi token đang dùng, kèm refresh token (nếu gửi trong body) của cùng người dùng"""
+        try:
+            # Kiểm tra refresh token trước: body sai thì không thu hồi gì, client có thể gửi lại
+            refresh_claims = None
+            refresh_token = (data or {}).get('refresh_token')
+            if refresh_token:
+                try:
+                    refresh_claims = decode_token(refresh_token, allow_expired=True)
+                except Exception:
+                    return error_response('Refresh token không hợp lệ', 400)
+                if refresh_claims.get('sub') != claims.get('sub'):
+                    return error_response('Refresh token không thuộc người dùng hiện tại', 400)
+
+            revocation_list.revoke(claims)
+            if refresh_claims is not None:
+                revocation_list.revoke(refresh_claims)
+
+            return success_response('Đăng xuất thành công')
+
+        except Exception as e:
+            return error_response(f'Lỗi server: {str(e)}', 500)
+
     @staticmethod
     def create_owner(data):
         """Tạo tài khoản owner mới (không tạo restaurant ngay)"""
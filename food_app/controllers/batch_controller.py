@@ -0,0 +1,100 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from flask import current_app, request
+from flask_jwt_extended import verify_jwt_in_request
+from werkzeug.test import EnvironBuilder
+
+from config import Config
+from food_app.utils.jwt_service import VERIFIED_JWT_ENVIRON_KEY
+from food_app.utils.responses import success_response, error_response
+
+# Header của request gốc được chuyển cho các request con (không chuyển Accept/Accept-Encoding:
+# phản hồi con luôn là JSON không nén để ghép vào phản hồi chung)
+_FORWARDED_HEADERS = ('Authorization', 'Accept-Language', 'User-Agent', 'X-Forwarded-For')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.BATCH_MAX_WORKERS, thread_name_prefix='api-batch')
+        return _executor
+
+
+def _dispatch(app, path, headers, environ_base):
+    """Chạy một request GET con qua URL map của app, trả về (status, body)"""
+    split = urlsplit(path)
+    builder = EnvironBuilder(
+        path=split.path, query_string=split.query, method='GET', headers=headers,
+        environ_base=dict(environ_base)
+    )
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    with app.request_context(environ):
+        response = app.full_dispatch_request()
+        body = response.get_data()
+        response.close()
+    if response.mimetype == 'application/json' and body:
+        return response.status_code, json.loads(body)
+    return response.status_code, body.decode('utf-8', errors='replace') if body else None
+
+
+class BatchController:
+    @staticmethod
+    def batch(data):
+        """
+        Gộp nhiều request GET độc lập vào một lần gọi.
+        JWT (nếu có) được kiểm tra một lần trước khi chia ra và claims đã giải mã được chuyển cho các request con
+        (verify_jwt dùng lại, không giải mã/kiểm tra thu hồi lại); các request con chạy song song trên thread pool.
+        """
+        try:
+            sub_requests = (data or {}).get('requests')
+            if not isinstance(sub_requests, list) or not sub_requests:
+                return error_response('Thiếu danh sách requests', 400)
+            if len(sub_requests) > Config.BATCH_MAX_REQUESTS:
+                return error_response(f'Tối đa {Config.BATCH_MAX_REQUESTS} request mỗi lần gọi', 400)
+
+            for item in sub_requests:
+                if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+                    return error_response('Mỗi request cần có path', 400)
+                if (item.get('method') or 'GET').upper() != 'GET':
+                    return error_response('Chỉ hỗ trợ request GET', 400)
+                path = urlsplit(item['path']).path
+                if not path.startswith('/api/') or path.rstrip('/') == request.path.rstrip('/'):
+                    return error_response(f'Path không hợp lệ: {item["path"]}', 400)
+
+            # Token sai/hết hạn bị từ chối một lần cho cả lô thay vì lặp lại ở từng request con
+            try:
+                verified = verify_jwt_in_request(optional=True)
+            except Exception as e:
+                return error_response(f'Lỗi xác thực: {str(e)}', 401)
+
+            headers = {name: request.headers[name] for name in _FORWARDED_HEADERS if name in request.headers}
+            headers['Accept'] = 'application/json'
+            app = current_app._get_current_object()
+            environ_base = {'REMOTE_ADDR': request.remote_addr}
+            if verified is not None:
+                environ_base[VERIFIED_JWT_ENVIRON_KEY] = verified
+
+            futures = [
+                _get_executor().submit(_dispatch, app, item['path'], headers, environ_base)
+                for item in sub_requests
+            ]
+            responses = []
+            for item, future in zip(sub_requests, futures):
+                status, body = future.result()
+                responses.append({'id': item.get('id'), 'path': item['path'], 'status': status, 'body': body})
+
+            return success_response('OK', {'responses': responses})
+
+        except Exception as e:
+            return error_response(f'Lỗi server: {str(e)}', 500)
@@ -2,6 +2,7 @@ from food_app.dao.coupon_dao import CouponDAO
 from food_app.utils.responses import success_response, error_response
 from food_app.models.coupon import Coupon
 from food_app.models.restaurant import Restaurant
+from food_app.utils.fieldsets import FieldSet
 from food_app import db
 
 class CouponController:
@@ -67,8 +68,9 @@ class CouponController:
             restaurant_id = params.get('restaurant_id')
             if restaurant_id:
                 query = query.filter(Coupon.restaurant_id == int(restaurant_id))
-            coupons = query.order_by(Coupon.id.desc()).all()
-            return success_response('Lấy danh sách mã giảm giá', [c.to_dict() for c in coupons])
+            fieldset = FieldSet.from_args(params)
+            coupons = fieldset.apply(query, Coupon).order_by(Coupon.id.desc()).all()
+            return success_response('Lấy danh sách mã giảm giá', fieldset.serialize_all(coupons, Coupon))
         except Exception as e:
             return error_response(f'Lỗi server: {str(e)}', 500)
 
@@ -87,8 +89,11 @@ class CouponController:
         try:
             if not current_user.can_manage_restaurant(int(restaurant_id)):
                 return error_response('Không có quyền', 403)
-            coupons = Coupon.query.filter_by(restaurant_id=int(restaurant_id)).order_by(Coupon.id.desc()).all()
-            return success_response('OK', [c.to_dict() for c in coupons])
+            from flask import request
+            fieldset = FieldSet.from_args(request.args)
+            query = Coupon.query.filter_by(restaurant_id=int(restaurant_id))
+            coupons = fieldset.apply(query, Coupon).order_by(Coupon.id.desc()).all()
+            return success_response('OK', fieldset.serialize_all(coupons, Coupon))
         except Exception as e:
             return error_response(f'Lỗi server: {str(e)}', 500)
 
@@ -5,7 +5,8 @@ from food_app.dao.food_dao import FoodDAO
 from food_app.dao.order_dao import OrderDAO
 from food_app.dao.review_dao import ReviewDAO
 from food_app.utils.responses import success_response, error_response
-from food_app.utils.pagination import paginate
+from food_app.utils.pagination import paginate_request
+from food_app.utils.fieldsets import FieldSet
 from food_app.utils.validators import validate_order_data
 from datetime import datetime
 from food_app.models.food import Food
@@ -146,13 +147,12 @@ class CustomerController:
     def get_orders(current_customer):
         """Lấy danh sách đơn hàng của khách hàng"""
         try:
-            page = request.args.get('page', 1, type=int)
-            per_page = request.args.get('per_page', 10, type=int)
-            
+            fieldset = FieldSet.from_args(request.args)
             query = Order.query.filter_by(customer_id=current_customer.id).order_by(Order.created_at.desc())
-            orders, pagination_info = paginate(query, page, per_page)
+            query = fieldset.apply(query, Order)
+            orders, pagination_info = paginate_request(query, Order.created_at, Order.id, request.args)
             
-            orders_data = [order.to_dict() for order in orders]
+            orders_data = fieldset.serialize_all(orders, Order)
             
             return success_response(
                 message="Lấy danh sách đơn hàng thành công",
@@ -162,6 +162,8 @@ class CustomerController:
                 }
             )
             
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             return error_response(f"Lỗi lấy đơn hàng: {str(e)}")
 
@@ -376,17 +378,15 @@ class CustomerController:
     def get_reviews(restaurant_id):
         """Lấy đánh giá của nhà hàng"""
         try:
-            page = request.args.get('page', type=int)
-            per_page = request.args.get('per_page', type=int)
-            
             query = Review.query
             if restaurant_id:
                 query = query.filter_by(restaurant_id=restaurant_id)
             
-            query = query.order_by(Review.created_at.desc())
-            reviews, pagination_info = paginate(query, page, per_page)
+            fieldset = FieldSet.from_args(request.args)
+            query = fieldset.apply(query.order_by(Review.created_at.desc()), Review)
+            reviews, pagination_info = paginate_request(query, Review.created_at, Review.id, request.args)
             
-            reviews_data = [review.to_dict() for review in reviews]
+            reviews_data = fieldset.serialize_all(reviews, Review)
             
             return success_response(
                 message="Lấy đánh giá thành công",
@@ -396,6 +396,8 @@ class CustomerController:
                 }
             )
             
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             return error_response(f"Lỗi lấy đánh giá: {str(e)}")
 
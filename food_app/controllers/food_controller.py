@@ -1,10 +1,15 @@
 from food_app.dao import FoodDAO
 from food_app.utils.responses import success_response, error_response
-from food_app.utils.pagination import paginate
+from food_app.utils.pagination import paginate_request
+from food_app.utils.distance import distances_from
+from food_app.utils.sideload import sideload_foods, wants_normalized
+from food_app.utils.fieldsets import FieldSet
+from food_app.utils.validators import parse_id_list
 from food_app.models.food import Food
 from food_app.models.review import Review
 from food_app.models.order_item import OrderItem
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 
 class FoodController:
     @staticmethod
@@ -13,8 +18,6 @@ class FoodController:
         try:
             from flask import request
             keyword = request.args.get('q')
-            page = request.args.get('page', type=int)
-            per_page = request.args.get('per_page', type=int)
             lat = request.args.get('lat')
             lon = request.args.get('lon')
             max_km = request.args.get('max_km')
@@ -26,8 +29,28 @@ class FoodController:
             lat = float(lat)
             lon = float(lon)
             near = (lat, lon)
-            query = FoodDAO.get_foods(category, available_only, keyword, near, float(max_km) if max_km else None)
-            items, meta = paginate(query, page, per_page)
+            fieldset = FieldSet() if wants_normalized(request.args) else FieldSet.from_args(request.args)
+            # Chỉ query đã qua fieldset.apply() mới có thể trả về Row chỉ gồm cột
+            applied = False
+            if fieldset.is_full:
+                query = FoodDAO.get_foods(
+                    category, available_only, keyword, near, float(max_km) if max_km else None, profile='listing'
+                )
+            elif not fieldset.wants('distance_km'):
+                # Chỉ lấy cột (hoặc chỉ nạp quan hệ) client yêu cầu
+                query = fieldset.apply(FoodDAO.get_foods(
+                    category, available_only, keyword, near, float(max_km) if max_km else None
+                ), Food)
+                applied = True
+            else:
+                # Chỉ nạp các quan hệ client yêu cầu; khoảng cách cần tọa độ nhà hàng
+                options = fieldset.loader_options(Food)
+                if fieldset.wants('distance_km'):
+                    options.append(joinedload(Food.restaurant))
+                query = FoodDAO.get_foods(
+                    category, available_only, keyword, near, float(max_km) if max_km else None
+                ).options(*options)
+            items, meta = paginate_request(query, Food.created_at, Food.id, request.args)
 
             # Optional deterministic randomization by seed
             if seed_random is not None:
@@ -37,32 +60,40 @@ class FoodController:
                 rng.shuffle(items)
 
             # Compute distance (km) from provided/default location to restaurant location
-            import math
-            def haversine(lat1, lon1, lat2, lon2):
-                R = 6371.0
-                dlat = math.radians(lat2 - lat1)
-                dlon = math.radians(lon2 - lon1)
-                a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
-                c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-                return R * c
-
-            foods_data = []
-            for food in items:
-                data = food.to_dict()
-                rest = food.restaurant
-                distance_km = None
-                if rest and rest.latitude is not None and rest.longitude is not None:
-                    distance_km = round(haversine(lat, lon, rest.latitude, rest.longitude), 3)
-                data['distance_km'] = distance_km
+            # in one vectorized call over all restaurants of the page
+            located = []
+            if fieldset.wants('distance_km'):
+                located = [food for food in items
+                           if food.restaurant and food.restaurant.latitude is not None and food.restaurant.longitude is not None]
+            distances = distances_from(
+                lat, lon,
+                [food.restaurant.latitude for food in located],
+                [food.restaurant.longitude for food in located]
+            )
+            distance_by_food = {food.id: round(float(d), 3) for food, d in zip(located, distances)}
+
+            if wants_normalized(request.args):
+                # Dạng chuẩn hoá: nhà hàng/danh mục/topping chỉ gửi một lần trong map theo id
+                foods_data, included = sideload_foods(items, distance_by_food)
+                return success_response('Lấy danh sách món ăn thành công', {'items': foods_data, 'meta': meta, **included})
+
+            if applied:
+                foods_data = fieldset.serialize_all(items, Food)
+            else:
+                foods_data = [fieldset.serialize(food) for food in items]
+            for food, data in zip(items, foods_data):
+                distance_km = distance_by_food.get(food.id)
+                if fieldset.wants('distance_km'):
+                    data['distance_km'] = distance_km
                 
                 # Thêm thông tin distance vào restaurant object nếu có
                 if data.get('restaurant') and distance_km is not None:
                     data['restaurant']['distance_km'] = distance_km
-                
-                foods_data.append(data)
 
             return success_response('Lấy danh sách món ăn thành công', {'items': foods_data, 'meta': meta})
 
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             return error_response(f'Lỗi server: {str(e)}', 500)
 
@@ -70,7 +101,7 @@ class FoodController:
     def get_food(food_id):
         """Lấy thông tin một món ăn"""
         try:
-            food = FoodDAO.get_food_by_id(food_id)
+            food = FoodDAO.get_food_by_id(food_id, profile='detail')
 
             if not food:
                 return error_response('Không tìm thấy món ăn', 404)
@@ -80,11 +111,28 @@ class FoodController:
         except Exception as e:
             return error_response(f'Lỗi server: {str(e)}', 500)
 
+    @staticmethod
+    def get_foods_batch(args):
+        """Lấy nhiều món theo ?ids= trong một lần gọi, trả về map theo id"""
+        try:
+            parsed = parse_id_list(args)
+            if not parsed['valid']:
+                return error_response(parsed['message'], 400)
+
+            foods = FoodDAO.get_foods_by_ids(parsed['ids'], profile='listing')
+            return success_response('Lấy danh sách món ăn thành công', {
+                'items': {food_id: foods[food_id].to_dict() for food_id in parsed['ids'] if food_id in foods},
+                'missing': [food_id for food_id in parsed['ids'] if food_id not in foods]
+            })
+
+        except Exception as e:
+            return error_response(f'Lỗi server: {str(e)}', 500)
+
     @staticmethod
     def get_food_detail(food_id):
         """Lấy chi tiết món ăn với thông tin bổ sung"""
         try:
-            food = Food.query.get(food_id)
+            food = FoodDAO.get_food_by_id(food_id, profile='detail')
             if not food:
                 return error_response('Không tìm thấy món ăn', 404)
 
@@ -3,6 +3,8 @@ from food_app.utils.responses import success_response, error_response
 from flask_jwt_extended import get_jwt_identity
 from food_app import db
 from food_app.utils.pagination import paginate
+from food_app.utils.fieldsets import FieldSet
+from food_app.utils.validators import parse_id_list
 from food_app.models.restaurant import Restaurant
 from food_app.models.food import Food
 from food_app.models.review import Review
@@ -77,9 +79,40 @@ class RestaurantController:
             lon = request.args.get('lon')
             max_km = request.args.get('max_km')
             near = (float(lat), float(lon)) if lat and lon else None
+            fieldset = FieldSet.from_args(request.args)
+            if near and max_km:
+                # Sắp xếp theo khoảng cách chính xác từ index địa lý, chỉ nạp nhà hàng của trang hiện tại
+                ranked = RestaurantDAO.list_nearest(near, float(max_km), keyword=keyword)
+                page_items, meta = paginate(ranked, page, per_page)
+                distances = dict(page_items)
+                restaurants = RestaurantDAO.get_restaurants_by_ids(
+                    [rid for rid, _ in page_items], fieldset.apply(Restaurant.query, Restaurant)
+                )
+                items = fieldset.serialize_all(restaurants, Restaurant)
+                if fieldset.wants('distance_km'):
+                    for restaurant, data in zip(restaurants, items):
+                        data['distance_km'] = round(distances[restaurant.id], 3)
+                return success_response('Lấy danh sách nhà hàng thành công', {'items': items, 'meta': meta})
             query = RestaurantDAO.list_restaurants(keyword, near, float(max_km) if max_km else None)
-            items, meta = paginate(query, page, per_page)
-            return success_response('Lấy danh sách nhà hàng thành công', {'items': [r.to_dict() for r in items], 'meta': meta})
+            items, meta = paginate(fieldset.apply(query, Restaurant), page, per_page)
+            return success_response('Lấy danh sách nhà hàng thành công', {'items': fieldset.serialize_all(items, Restaurant), 'meta': meta})
+        except Exception as e:
+            return error_response(f'Lỗi server: {str(e)}', 500)
+
+    @staticmethod
+    def get_restaurants_batch(args):
+        """Lấy nhiều nhà hàng theo ?ids= trong một lần gọi, trả về map theo id"""
+        try:
+            parsed = parse_id_list(args)
+            if not parsed['valid']:
+                return error_response(parsed['message'], 400)
+
+            restaurants = {r.id: r for r in RestaurantDAO.get_restaurants_by_ids(parsed['ids'])}
+            return success_response('Lấy danh sách nhà hàng thành công', {
+                'items': {rid: restaurants[rid].to_dict() for rid in parsed['ids'] if rid in restaurants},
+                'missing': [rid for rid in parsed['ids'] if rid not in restaurants]
+            })
+
         except Exception as e:
             return error_response(f'Lỗi server: {str(e)}', 500)
 
@@ -1,12 +1,18 @@
 from flask import request
 from food_app.models.restaurant import Restaurant
 from food_app.models.food import Food
-from food_app.utils.distance import calculate_distance
+from food_app.dao.search_dao import SearchDAO
+from food_app.utils.distance import haversine_many
 from food_app.utils.responses import success_response, error_response
 from food_app.utils.pagination import paginate
+from food_app.utils.search_index import search_index
+from food_app.utils.search_cache import SearchCandidates, search_cache
+from food_app.utils.relevance import TextMatch, restaurant_popularity
+from food_app.utils.suggest_index import suggest_index
+from food_app.utils.trigram_index import fuzzy_search
+from food_app.utils.sideload import sideload_search_results, wants_normalized
 from config import Config
-from sqlalchemy import or_, and_
-from datetime import datetime
+from sqlalchemy import or_
 
 class SearchController:
     @staticmethod
@@ -18,92 +24,49 @@ class SearchController:
             lon = request.args.get('lon', type=float)
             min_price = request.args.get('min_price', type=float)
             max_price = request.args.get('max_price', type=float)
-            sort_by = request.args.get('sort_by', 'distance')
+            # Không có từ khoá thì relevance chỉ còn khoảng cách/độ phổ biến: giữ mặc định cũ (distance)
+            sort_by = request.args.get('sort_by', 'relevance' if q else 'distance')
             sort_order = request.args.get('sort_order', 'asc')
             page = request.args.get('page', type=int)
             per_page = request.args.get('per_page', type=int)
             
-            # Bước 1: Tìm kiếm theo món ăn trước
-            food_query = Food.query.filter(Food.available == True)
+            near = (lat, lon) if lat is not None and lon is not None else None
             
-            if q:
-                # Tìm theo tên món ăn hoặc tên nhà hàng
-                food_query = food_query.join(Restaurant).filter(
-                    or_(
-                        Food.name.ilike(f'%{q}%'),
-                        Food.description.ilike(f'%{q}%'),
-                        Restaurant.name.ilike(f'%{q}%')
-                    )
+            if sort_by == 'relevance' or (sort_by == 'distance' and near):
+                paginated_results, pagination_info = SearchController._search_ranked(
+                    q, min_price, max_price, sort_by, sort_order, near, page, per_page
                 )
-            
-            # Lọc theo giá nếu có
-            if min_price is not None:
-                food_query = food_query.filter(Food.price >= min_price)
-            if max_price is not None:
-                food_query = food_query.filter(Food.price <= max_price)
-            
-            # Lấy tất cả món ăn thỏa mãn điều kiện
-            foods = food_query.all()
-            
-            # Bước 2: Group món ăn theo nhà hàng
-            restaurant_foods = {}
-            for food in foods:
-                restaurant_id = food.restaurant_id
-                if restaurant_id not in restaurant_foods:
-                    restaurant_foods[restaurant_id] = []
-                restaurant_foods[restaurant_id].append(food)
-            
-            # Bước 3: Tạo kết quả cho từng nhà hàng
-            results = []
-            for restaurant_id, restaurant_food_list in restaurant_foods.items():
-                restaurant = Restaurant.query.get(restaurant_id)
-                if not restaurant or not restaurant.is_active:
-                    continue
-                
-                # Tính khoảng cách nếu có tọa độ
-                distance_km = None
-                if lat is not None and lon is not None and restaurant.latitude and restaurant.longitude:
-                    distance_km = calculate_distance(lat, lon, restaurant.latitude, restaurant.longitude)
-                
-                # Giới hạn số món ăn hiển thị cho mỗi nhà hàng
-                limited_foods = restaurant_food_list[:Config.MAX_FOODS_PER_RESTAURANT]
-                
-                # Chuyển đổi món ăn thành dict
-                searched_foods = []
-                for food in limited_foods:
-                    food_data = {
-                        'id': food.id,
-                        'name': food.name,
-                        'description': food.description,
-                        'price': food.price,
-                        'image_url': food.image_url,
-                        'available': food.available
-                    }
-                    searched_foods.append(food_data)
+            else:
+                cache_key = search_cache.make_key(q, min_price, max_price, sort_by, sort_order, page, per_page)
+                cached = search_cache.get(cache_key)
+                if cached is None:
+                    cached = SearchController._search_page(q, min_price, max_price, sort_by, sort_order, page, per_page)
+                    search_cache.set(cache_key, cached, restaurant_ids=[item['id'] for item in cached[0]])
+                records, pagination_info = cached
                 
-                # Tạo dữ liệu nhà hàng
-                restaurant_data = restaurant.to_dict(include_sensitive=False)
-                restaurant_data['distance_km'] = distance_km
-                restaurant_data['searched_foods'] = searched_foods
-                results.append(restaurant_data)
-            
-            # Sắp xếp kết quả
-            if sort_by == 'distance' and lat is not None and lon is not None:
-                results.sort(key=lambda x: x['distance_km'] if x['distance_km'] is not None else float('inf'))
-            elif sort_by == 'price':
-                # Sắp xếp theo giá món ăn rẻ nhất của mỗi restaurant
-                def get_min_price(restaurant):
-                    if not restaurant['searched_foods']:
-                        return float('inf')
-                    return min(food['price'] for food in restaurant['searched_foods'])
-                
-                results.sort(key=get_min_price)
-            
-            if sort_order == 'desc':
-                results.reverse()
+                # Tính khoảng cách của người gọi cho cả trang trong một lần gọi vector hoá
+                paginated_results = [dict(record, distance_km=None) for record in records]
+                if near:
+                    located = [item for item in paginated_results if item['latitude'] and item['longitude']]
+                    distances = haversine_many(
+                        lat, lon,
+                        [item['latitude'] for item in located],
+                        [item['longitude'] for item in located]
+                    )
+                    for item, distance in zip(located, distances):
+                        item['distance_km'] = round(float(distance), 2)
             
-            # Phân trang sử dụng hàm chung
-            paginated_results, pagination_info = paginate(results, page, per_page)
+            if wants_normalized(request.args):
+                # Dạng chuẩn hoá: món ăn gửi một lần trong map `foods`, nhà hàng chỉ giữ food_ids
+                items, included = sideload_search_results(paginated_results)
+                return success_response(
+                    message="Tìm kiếm thành công",
+                    data={
+                        'items': items,
+                        **included,
+                        'pagination': pagination_info
+                    }
+                )
             
             return success_response(
                 message="Tìm kiếm thành công",
@@ -115,3 +78,152 @@ class SearchController:
             
         except Exception as e:
             return error_response(f"Lỗi tìm kiếm: {str(e)}")
+
+    @staticmethod
+    def suggest():
+        """Gợi ý khi gõ: món ăn, nhà hàng, danh mục có tên khớp tiền tố, ưu tiên phổ biến"""
+        try:
+            q = request.args.get('q', '').strip()
+            limit = request.args.get('limit', Config.SUGGEST_LIMIT, type=int)
+            limit = max(1, min(limit, Config.SUGGEST_MAX_LIMIT))
+            
+            return success_response(
+                message="Lấy gợi ý thành công",
+                data=suggest_index.suggest(q, limit)
+            )
+            
+        except Exception as e:
+            return error_response(f"Lỗi lấy gợi ý: {str(e)}")
+
+    @staticmethod
+    def _search_ranked(q, min_price, max_price, sort_by, sort_order, near, page, per_page):
+        """
+        Sắp xếp theo khoảng cách hoặc relevance: tập nhà hàng thỏa truy vấn được cache chung cho mọi vị trí,
+        mỗi người gọi được xếp hạng chính xác theo tọa độ của mình rồi mới phân trang
+        """
+        cache_key = search_cache.make_key(q, min_price, max_price, 'candidates', None)
+        candidates = search_cache.get(cache_key)
+        if candidates is None:
+            # Chỉ tra index/trigram khi cache miss; điểm theo từ khoá chỉ phụ thuộc truy vấn nên tính luôn ở đây
+            food_conditions, text_match = SearchController._food_conditions(q, min_price, max_price)
+            text_scores = text_match.restaurant_scores(
+                SearchDAO.get_food_restaurants(food_conditions)
+            ) if text_match else {}
+            candidates = SearchCandidates(
+                SearchDAO.search_candidates(food_conditions), food_conditions, text_match, text_scores
+            )
+            search_cache.set(cache_key, candidates, restaurant_ids=candidates.ids)
+        
+        if sort_by == 'relevance':
+            ranked = candidates.rank_by_relevance(
+                near, restaurant_popularity.scores(), restaurant_popularity.default_score()
+            )
+        else:
+            ranked = candidates.rank(near[0], near[1], descending=sort_order == 'desc')
+        page_items, pagination_info = paginate(ranked, page, per_page)
+        
+        # Chỉ nạp dữ liệu hiển thị cho các nhà hàng của trang chưa có trong cache
+        records = candidates.page_records(
+            [restaurant_id for restaurant_id, _ in page_items],
+            lambda missing_ids: SearchController._build_records(
+                SearchDAO.get_restaurant_rows(missing_ids), candidates.food_conditions
+            )
+        )
+        
+        results = []
+        for record, (_, distance) in zip(records, page_items):
+            results.append(dict(record, distance_km=round(distance, 2) if distance is not None else None))
+        return results, pagination_info
+
+    @staticmethod
+    def _search_page(q, min_price, max_price, sort_by, sort_order, page, per_page):
+        """Chạy truy vấn tìm kiếm, trả về (danh sách nhà hàng kèm món khớp, thông tin phân trang)"""
+        food_conditions, _ = SearchController._food_conditions(q, min_price, max_price)
+        
+        # Gom nhóm, sắp xếp và phân trang theo nhà hàng ngay trong DB
+        restaurant_query = SearchDAO.search_restaurants(food_conditions, sort_by, sort_order)
+        restaurant_rows, pagination_info = paginate(restaurant_query, page, per_page)
+        
+        records = SearchController._build_records(restaurant_rows, food_conditions)
+        return [records[row.id] for row in restaurant_rows], pagination_info
+
+    @staticmethod
+    def _food_conditions(q, min_price, max_price):
+        """
+        Điều kiện lọc món ăn theo từ khoá và khoảng giá.
+        Trả về (food_conditions, text_match); text_match là None khi không lọc qua index.
+        """
+        food_conditions = [Food.available == True]
+        text_match = None
+        
+        if q:
+            # Tìm theo tên món ăn hoặc tên nhà hàng qua index trong bộ nhớ (bỏ dấu, khớp tiền tố)
+            matches = search_index.lookup(q)
+            if matches is not None:
+                food_ids, restaurant_ids = matches
+                text_match = TextMatch(q, food_ids, restaurant_ids)
+                if not food_ids and not restaurant_ids:
+                    # Không khớp chính xác (thường do gõ sai chính tả): tìm gần đúng theo trigram
+                    fuzzy_foods, fuzzy_restaurants = fuzzy_search.lookup(q)
+                    food_ids = [food_id for food_id, _ in fuzzy_foods]
+                    restaurant_ids = [restaurant_id for restaurant_id, _ in fuzzy_restaurants]
+                    text_match = TextMatch(q, food_ids, restaurant_ids, (dict(fuzzy_foods), dict(fuzzy_restaurants)))
+                food_conditions.append(
+                    or_(
+                        SearchDAO.id_condition(Food.id, food_ids),
+                        SearchDAO.id_condition(Food.restaurant_id, restaurant_ids)
+                    )
+                )
+            else:
+                # Từ khoá không có chữ/số (ví dụ chỉ có ký tự đặc biệt): giữ cách tìm cũ
+                food_conditions.append(
+                    or_(
+                        Food.name.ilike(f'%{q}%'),
+                        Food.description.ilike(f'%{q}%'),
+                        Food.restaurant.has(Restaurant.name.ilike(f'%{q}%'))
+                    )
+                )
+        
+        # Lọc theo giá nếu có
+        if min_price is not None:
+            food_conditions.append(Food.price >= min_price)
+        if max_price is not None:
+            food_conditions.append(Food.price <= max_price)
+        
+        return food_conditions, text_match
+
+    @staticmethod
+    def _build_records(restaurant_rows, food_conditions):
+        """Dict {restaurant_id: dữ liệu nhà hàng kèm tối đa MAX_FOODS_PER_RESTAURANT món khớp}"""
+        restaurant_ids = [row.id for row in restaurant_rows]
+        restaurant_foods = {}
+        for food in SearchDAO.get_top_foods(food_conditions, restaurant_ids, Config.MAX_FOODS_PER_RESTAURANT):
+            restaurant_foods.setdefault(food.restaurant_id, []).append({
+                'id': food.id,
+                'name': food.name,
+                'description': food.description,
+                'price': food.price,
+                'image_url': food.image_url,
+                'available': food.available
+            })
+        
+        # Tạo kết quả cho từng nhà hàng trực tiếp từ Row (không lazy load)
+        records = {}
+        for row in restaurant_rows:
+            records[row.id] = {
+                'id': row.id,
+                'name': row.name,
+                'address': row.address,
+                'phone': row.phone,
+                'email': row.email,
+                'description': row.description,
+                'image_url': row.image_url,
+                'is_active': row.is_active,
+                'opening_hours': row.opening_hours,
+                'latitude': row.latitude,
+                'longitude': row.longitude,
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+                'searched_foods': restaurant_foods.get(row.id, [])
+            }
+        return records
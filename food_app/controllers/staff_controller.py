@@ -1,11 +1,13 @@
 from flask import request
 from food_app.models.user import User
 from food_app.models.food import Food
+from food_app.dao import FoodDAO
 from food_app.models.order import Order
 from food_app.models.review import Review
 from food_app.models.restaurant import Restaurant
 from food_app.utils.responses import success_response, error_response
-from food_app.utils.pagination import paginate
+from food_app.utils.pagination import paginate_request
+from food_app.utils.fieldsets import FieldSet
 from food_app.utils.validators import validate_food_data
 from food_app.utils.jwt_service import get_user_id_from_jwt, get_user_type_from_jwt
 from datetime import datetime, timedelta
@@ -69,13 +71,16 @@ class StaffController:
             if not user or not user.restaurant_id:
                 return error_response("Không có quyền truy cập")
             
-            page = request.args.get('page', type=int)
-            per_page = request.args.get('per_page', type=int)
-            
-            query = Food.query.filter_by(restaurant_id=user.restaurant_id).order_by(Food.created_at.desc())
-            foods, pagination_info = paginate(query, page, per_page)
+            fieldset = FieldSet.from_args(request.args)
+            if fieldset.is_full:
+                query = FoodDAO.get_foods_by_restaurant(user.restaurant_id, profile='listing')
+            else:
+                # Chỉ nạp các quan hệ client yêu cầu
+                query = fieldset.apply(FoodDAO.get_foods_by_restaurant(user.restaurant_id), Food)
+            query = query.order_by(Food.created_at.desc())
+            foods, pagination_info = paginate_request(query, Food.created_at, Food.id, request.args)
             
-            foods_data = [food.to_dict() for food in foods]
+            foods_data = fieldset.serialize_all(foods, Food)
             
             return success_response(
                 message="Lấy danh sách món ăn thành công",
@@ -85,6 +90,8 @@ class StaffController:
                 }
             )
             
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             return error_response(f"Lỗi lấy danh sách món ăn: {str(e)}")
 
@@ -356,9 +363,6 @@ class StaffController:
             if not user or not user.restaurant_id:
                 return error_response("Không có quyền truy cập")
             
-            page = request.args.get('page', type=int)
-            per_page = request.args.get('per_page', type=int)
-            
             query = Order.query.filter_by(restaurant_id=user.restaurant_id)
             if status:
                 # Tôn trọng filter client gửi lên
@@ -367,10 +371,11 @@ class StaffController:
                 # Mặc định KHÔNG hiển thị đơn chưa thanh toán cho nhà hàng
                 query = query.filter(Order.status != 'pending')
             
-            query = query.order_by(Order.created_at.desc())
-            orders, pagination_info = paginate(query, page, per_page)
+            fieldset = FieldSet.from_args(request.args)
+            query = fieldset.apply(query.order_by(Order.created_at.desc()), Order)
+            orders, pagination_info = paginate_request(query, Order.created_at, Order.id, request.args)
             
-            orders_data = [order.to_dict() for order in orders]
+            orders_data = fieldset.serialize_all(orders, Order)
             
             return success_response(
                 message="Lấy danh sách đơn hàng thành công",
@@ -380,6 +385,8 @@ class StaffController:
                 }
             )
             
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             return error_response(f"Lỗi lấy danh sách đơn hàng: {str(e)}")
 
@@ -562,13 +569,12 @@ class StaffController:
             if not user or not user.restaurant_id:
                 return error_response("Không có quyền truy cập")
             
-            page = request.args.get('page', type=int)
-            per_page = request.args.get('per_page', type=int)
-            
+            fieldset = FieldSet.from_args(request.args)
             query = Review.query.filter_by(restaurant_id=user.restaurant_id).order_by(Review.created_at.desc())
-            reviews, pagination_info = paginate(query, page, per_page)
+            query = fieldset.apply(query, Review)
+            reviews, pagination_info = paginate_request(query, Review.created_at, Review.id, request.args)
             
-            reviews_data = [review.to_dict() for review in reviews]
+            reviews_data = fieldset.serialize_all(reviews, Review)
             
             return success_response(
                 message="Lấy đánh giá thành công",
@@ -578,6 +584,8 @@ class StaffController:
                 }
             )
             
+        except ValueError as e:
+            return error_response(str(e), 400)
         except Exception as e:
             return error_response(f"Lỗi lấy đánh giá: {str(e)}")
 
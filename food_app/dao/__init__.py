@@ -5,6 +5,8 @@ from .food_dao import FoodDAO
 from .order_dao import OrderDAO
 from .category_dao import CategoryDAO
 from .otp_dao import OTPDAO
+from .search_dao import SearchDAO
+from .revoked_token_dao import RevokedTokenDAO
 
 __all__ = [
     'UserDAO',
@@ -13,5 +15,7 @@ __all__ = [
     'FoodDAO',
     'OrderDAO',
     'CategoryDAO',
-    'OTPDAO'
+    'OTPDAO',
+    'SearchDAO',
+    'RevokedTokenDAO'
 ]
@@ -1,5 +1,6 @@
 from food_app import db
 from food_app.models.category import Category
+from sqlalchemy import func
 
 class CategoryDAO:
     @staticmethod
@@ -10,6 +11,11 @@ class CategoryDAO:
     def get_all_categories():
         return Category.query.all()
 
+    @staticmethod
+    def get_version():
+        """Phiên bản danh sách danh mục: (updated_at lớn nhất, số dòng)"""
+        return tuple(db.session.query(func.max(Category.updated_at), func.count(Category.id)).one())
+
     @staticmethod
     def create_category(category_data):
         category = Category(**category_data)
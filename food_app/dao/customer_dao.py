@@ -3,6 +3,7 @@ from food_app.models.customer import Customer
 from food_app.models.base_user import BaseUser
 from food_app.utils.validators import normalize_phone
 from datetime import datetime
+from config import Config
 
 class CustomerDAO:
     @staticmethod
@@ -21,6 +22,11 @@ class CustomerDAO:
     def get_all_customers():
         return Customer.query.all()
 
+    @staticmethod
+    def iter_customers(batch_size=None):
+        """Duyệt khách hàng theo từng lô (yield_per) để stream"""
+        return Customer.query.yield_per(batch_size or Config.JSON_STREAM_CHUNK_ITEMS)
+
     @staticmethod
     def create_customer(customer_data):
         from food_app.models.customer import Customer
@@ -2,15 +2,99 @@ from food_app import db
 from food_app.models.food import Food
 from food_app.models.topping import Topping
 from food_app.models.restaurant import Restaurant
+from food_app.utils.geo_index import geo_index
+from food_app.models.category import Category
+from food_app.models.food_categories import food_categories
+from food_app.models.topping import food_toppings
+from food_app.models.order_item import OrderItem
+from food_app.models.review import Review
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload, selectinload
 
 class FoodDAO:
+    # Các quan hệ mà Food.to_dict() truy cập, nạp trước theo từng kiểu dùng:
+    # - listing: nhiều dòng có LIMIT, nhà hàng join cùng truy vấn, collection nạp bằng một truy vấn IN mỗi loại
+    # - detail: một dòng, nạp tất cả trong một truy vấn join
+    LOADER_PROFILES = {
+        'listing': (
+            joinedload(Food.restaurant),
+            selectinload(Food.categories),
+            selectinload(Food.toppings)
+        ),
+        'detail': (
+            joinedload(Food.restaurant),
+            joinedload(Food.categories),
+            joinedload(Food.toppings)
+        )
+    }
+
+    @staticmethod
+    def _association_version(table, column, model, food_condition):
+        """(số dòng, tổng id, updated_at lớn nhất) của danh mục/topping gắn với các món thỏa điều kiện"""
+        return (
+            select(func.count()).select_from(table).where(food_condition(table.c.food_id)).scalar_subquery(),
+            select(func.coalesce(func.sum(column), 0)).where(food_condition(table.c.food_id)).scalar_subquery(),
+            select(func.max(model.updated_at)).join(table, column == model.id)
+            .where(food_condition(table.c.food_id)).scalar_subquery()
+        )
+
     @staticmethod
-    def get_food_by_id(food_id):
+    def get_detail_version(food_id):
+        """
+        Phiên bản dữ liệu của chi tiết món (món, nhà hàng, danh mục, topping, đánh giá, số lượng đã bán),
+        tính trong một truy vấn. None nếu không có món.
+        """
+        same_food = lambda column: column == food_id
+        row = db.session.execute(select(
+            Food.updated_at,
+            select(Restaurant.updated_at).where(Restaurant.id == Food.restaurant_id).scalar_subquery(),
+            *FoodDAO._association_version(food_categories, food_categories.c.category_id, Category, same_food),
+            *FoodDAO._association_version(food_toppings, food_toppings.c.topping_id, Topping, same_food),
+            select(func.count(Review.id)).where(Review.food_id == food_id).scalar_subquery(),
+            select(func.max(Review.updated_at)).where(Review.food_id == food_id).scalar_subquery(),
+            select(func.count(OrderItem.id)).where(OrderItem.food_id == food_id).scalar_subquery(),
+            select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.food_id == food_id).scalar_subquery()
+        ).where(Food.id == food_id)).first()
+        return tuple(row) if row else None
+
+    @staticmethod
+    def get_menu_version(restaurant_id):
+        """Phiên bản thực đơn của nhà hàng (món, nhà hàng, danh mục, topping), tính trong một truy vấn"""
+        restaurant_foods = select(Food.id).where(Food.restaurant_id == restaurant_id)
+        in_menu = lambda column: column.in_(restaurant_foods)
+        row = db.session.execute(select(
+            select(func.count(Food.id)).where(Food.restaurant_id == restaurant_id).scalar_subquery(),
+            select(func.max(Food.updated_at)).where(Food.restaurant_id == restaurant_id).scalar_subquery(),
+            select(Restaurant.updated_at).where(Restaurant.id == restaurant_id).scalar_subquery(),
+            *FoodDAO._association_version(food_categories, food_categories.c.category_id, Category, in_menu),
+            *FoodDAO._association_version(food_toppings, food_toppings.c.topping_id, Topping, in_menu)
+        )).one()
+        return tuple(row)
+
+    @staticmethod
+    def with_profile(query, profile=None):
+        """Áp dụng loader profile (listing/detail) cho query Food"""
+        if not profile:
+            return query
+        return query.options(*FoodDAO.LOADER_PROFILES[profile])
+
+    @staticmethod
+    def get_food_by_id(food_id, profile=None):
+        if profile:
+            return db.session.get(Food, food_id, options=FoodDAO.LOADER_PROFILES[profile])
         return Food.query.get(food_id)
 
     @staticmethod
-    def get_foods(category=None, available_only=True, keyword=None, near=None, max_distance_km=None):
-        query = Food.query
+    def get_foods_by_ids(food_ids, profile=None):
+        """Lấy nhiều món bằng một truy vấn IN (kèm loader theo profile), trả về dict theo id"""
+        if not food_ids:
+            return {}
+        query = FoodDAO.with_profile(Food.query, profile).filter(Food.id.in_(food_ids))
+        return {food.id: food for food in query.all()}
+
+    @staticmethod
+    def get_foods(category=None, available_only=True, keyword=None, near=None, max_distance_km=None, profile=None):
+        query = FoodDAO.with_profile(Food.query, profile)
         if category:
             from food_app.models.category import Category
             query = query.join(Food.categories).filter(Category.id == category)
@@ -21,23 +105,14 @@ class FoodDAO:
             query = query.filter(Food.name.ilike(like))
         if near and max_distance_km:
             lat, lon = near
-            # Simple bounding box prefilter to avoid heavy joins
-            # ~1 deg lat ~= 111km, lon scaled by cos(lat)
-            deg_lat = float(max_distance_km) / 111.0
-            import math
-            deg_lon = float(max_distance_km) / (111.0 * max(math.cos(math.radians(lat)), 0.01))
-            min_lat, max_lat = lat - deg_lat, lat + deg_lat
-            min_lon, max_lon = lon - deg_lon, lon + deg_lon
-            query = query.join(Restaurant).filter(
-                Restaurant.latitude.isnot(None), Restaurant.longitude.isnot(None),
-                Restaurant.latitude.between(min_lat, max_lat),
-                Restaurant.longitude.between(min_lon, max_lon)
-            )
+            # Lọc theo bán kính chính xác từ index lưới địa lý, tránh join với bảng nhà hàng
+            restaurant_ids = [rid for rid, _ in geo_index.nearest(lat, lon, radius_km=float(max_distance_km))]
+            query = query.filter(Food.restaurant_id.in_(restaurant_ids))
         return query
 
     @staticmethod
-    def get_foods_by_restaurant(restaurant_id):
-        return Food.query.filter_by(restaurant_id=restaurant_id)
+    def get_foods_by_restaurant(restaurant_id, profile=None):
+        return FoodDAO.with_profile(Food.query, profile).filter_by(restaurant_id=restaurant_id)
 
     @staticmethod
     def create_food(food_data):
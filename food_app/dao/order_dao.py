@@ -5,6 +5,8 @@ from food_app.models.order_item_topping import OrderItemTopping
 from food_app.models.food import Food
 from food_app.models.topping import Topping
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+from config import Config
 
 class OrderDAO:
     @staticmethod
@@ -25,6 +27,21 @@ class OrderDAO:
             return Order.query.filter_by(status=status).all()
         return Order.query.all()
 
+    @staticmethod
+    def iter_orders_by_status(status=None, batch_size=None):
+        """Duyệt đơn hàng theo từng lô (yield_per) để stream, nạp kèm khách hàng, nhà hàng và món"""
+        query = Order.query.options(
+            joinedload(Order.customer),
+            joinedload(Order.restaurant),
+            selectinload(Order.items).options(
+                joinedload(OrderItem.food),
+                selectinload(OrderItem.toppings).joinedload(OrderItemTopping.topping)
+            )
+        )
+        if status:
+            query = query.filter_by(status=status)
+        return query.yield_per(batch_size or Config.JSON_STREAM_CHUNK_ITEMS)
+
     @staticmethod
     def get_all_orders():
         return Order.query.all()
@@ -1,7 +1,6 @@
 from food_app import db
 from food_app.models.otp import OTP
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
 
 class OTPDAO:
     @staticmethod
@@ -17,31 +16,22 @@ class OTPDAO:
 
     @staticmethod
     def delete_expired_otps():
-        expired_time = datetime.utcnow() - timedelta(minutes=5)
-        OTP.query.filter(OTP.created_at < expired_time).delete()
+        """Xoá theo lô các OTP đã hết hạn, trả về số dòng đã xoá (gọi từ OTPSweeper)"""
+        deleted = OTP.query.filter(OTP.expires_at < datetime.utcnow()).delete(synchronize_session=False)
         db.session.commit()
+        return deleted
 
     @staticmethod
-    def generate_otp_for_phone(phone):
-        OTPDAO.delete_expired_otps()
-
-        otp_code = str(random.randint(100000, 999999))
-
-        otp_data = {
-            'phone': phone,
-            'code': otp_code,
-            'expires_at': datetime.utcnow() + timedelta(minutes=5)
-        }
-
+    def save_otp(phone, code, expires_at):
+        """Ghi đè OTP của phone (một SELECT và một INSERT/UPDATE, không dọn OTP hết hạn ở đây)"""
         existing_otp = OTPDAO.get_otp_by_phone(phone)
         if existing_otp:
-            existing_otp.code = otp_code
-            existing_otp.expires_at = otp_data['expires_at']
+            existing_otp.code = code
+            existing_otp.expires_at = expires_at
             db.session.commit()
-            return otp_code
+            return existing_otp
 
-        OTPDAO.create_otp(otp_data)
-        return otp_code
+        return OTPDAO.create_otp({'phone': phone, 'code': code, 'expires_at': expires_at})
 
     @staticmethod
     def verify_otp(phone, code):
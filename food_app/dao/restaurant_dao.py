@@ -1,12 +1,53 @@
 from food_app import db
 from food_app.models.restaurant import Restaurant
-from sqlalchemy import or_
+from food_app.utils.geo_index import geo_index
+from food_app.models.food import Food
+from food_app.models.order import Order
+from food_app.models.order_item import OrderItem
+from food_app.models.review import Review
+from food_app.models.base_user import BaseUser
+from sqlalchemy import func, or_, select
 
 class RestaurantDAO:
     @staticmethod
     def get_restaurant_by_id(restaurant_id):
         return Restaurant.query.get(restaurant_id)
 
+    @staticmethod
+    def get_detail_version(restaurant_id):
+        """
+        Phiên bản dữ liệu của chi tiết nhà hàng (nhà hàng, đơn hàng, đánh giá, món, số lượng đã bán
+        của món, người đánh giá), tính trong một truy vấn. None nếu không có nhà hàng.
+        """
+        # OrderItem không có updated_at: số dòng, tổng số lượng và id lớn nhất đổi khi top_foods đổi
+        order_items = select(OrderItem.id, OrderItem.quantity)\
+            .join(Food, Food.id == OrderItem.food_id)\
+            .where(Food.restaurant_id == restaurant_id)\
+            .subquery()
+        row = db.session.execute(select(
+            Restaurant.updated_at,
+            *[
+                select(aggregate).where(column == restaurant_id).scalar_subquery()
+                for column, aggregates in (
+                    (Order.restaurant_id, (func.count(Order.id), func.max(Order.updated_at))),
+                    (Review.restaurant_id, (func.count(Review.id), func.max(Review.updated_at))),
+                    (Food.restaurant_id, (func.count(Food.id), func.max(Food.updated_at)))
+                )
+                for aggregate in aggregates
+            ],
+            *[
+                select(aggregate).scalar_subquery()
+                for aggregate in (
+                    func.count(order_items.c.id), func.sum(order_items.c.quantity), func.max(order_items.c.id)
+                )
+            ],
+            select(func.max(BaseUser.updated_at))
+                .join(Review, Review.customer_id == BaseUser.id)
+                .where(Review.restaurant_id == restaurant_id)
+                .scalar_subquery()
+        ).where(Restaurant.id == restaurant_id)).first()
+        return tuple(row) if row else None
+
     @staticmethod
     def get_restaurant_by_owner(owner_id):
         return Restaurant.query.filter_by(owner_id=owner_id).first()
@@ -15,6 +56,18 @@ class RestaurantDAO:
     def get_restaurants_by_status(status):
         return Restaurant.query.filter_by(approval_status=status).all()
 
+    @staticmethod
+    def get_restaurants_by_ids(restaurant_ids, query=None):
+        """
+        Lấy nhiều nhà hàng bằng một truy vấn IN, giữ nguyên thứ tự restaurant_ids.
+        `query` (mặc định Restaurant.query) có thể là query chỉ lấy cột, khi đó trả về Row
+        """
+        if not restaurant_ids:
+            return []
+        query = Restaurant.query if query is None else query
+        restaurants = {r.id: r for r in query.filter(Restaurant.id.in_(restaurant_ids)).all()}
+        return [restaurants[rid] for rid in restaurant_ids if rid in restaurants]
+
     @staticmethod
     def list_restaurants(keyword=None, near=None, max_distance_km=None):
         query = Restaurant.query
@@ -23,18 +76,29 @@ class RestaurantDAO:
             query = query.filter(or_(Restaurant.name.ilike(like), Restaurant.address.ilike(like)))
         if near and max_distance_km:
             lat, lon = near
-            import math
-            deg_lat = float(max_distance_km) / 111.0
-            deg_lon = float(max_distance_km) / (111.0 * max(math.cos(math.radians(lat)), 0.01))
-            min_lat, max_lat = lat - deg_lat, lat + deg_lat
-            min_lon, max_lon = lon - deg_lon, lon + deg_lon
-            query = query.filter(
-                Restaurant.latitude.isnot(None), Restaurant.longitude.isnot(None),
-                Restaurant.latitude.between(min_lat, max_lat),
-                Restaurant.longitude.between(min_lon, max_lon)
-            )
+            restaurant_ids = [rid for rid, _ in geo_index.nearest(lat, lon, radius_km=float(max_distance_km))]
+            query = query.filter(Restaurant.id.in_(restaurant_ids))
         return query
 
+    @staticmethod
+    def list_nearest(near, max_distance_km=None, limit=None, keyword=None, active_only=False):
+        """
+        Danh sách (restaurant_id, distance_km) sắp xếp theo khoảng cách chính xác,
+        lấy từ index lưới địa lý thay vì quét toàn bộ bảng
+        """
+        lat, lon = near
+        radius = float(max_distance_km) if max_distance_km else None
+        allowed = None
+        if keyword:
+            # Lọc từ khoá trước kNN để `limit` tính trên các nhà hàng khớp
+            like = f"%{keyword}%"
+            allowed = {rid for (rid,) in Restaurant.query.with_entities(Restaurant.id).filter(
+                or_(Restaurant.name.ilike(like), Restaurant.address.ilike(like))
+            )}
+            if not allowed:
+                return []
+        return geo_index.nearest(lat, lon, k=limit, radius_km=radius, active_only=active_only, allowed_ids=allowed)
+
     @staticmethod
     def create_restaurant(restaurant_data):
         restaurant = Restaurant(**restaurant_data)
@@ -0,0 +1,46 @@
+from food_app import db
+from food_app.models.revoked_token import RevokedToken
+from datetime import datetime, timezone
+
+class RevokedTokenDAO:
+    @staticmethod
+    def revoke(jti, token_type, user_id=None, expires_at=None):
+        """Lưu jti vào danh sách thu hồi (bỏ qua nếu đã có)"""
+        if db.session.get(RevokedToken, jti) is None:
+            db.session.add(RevokedToken(
+                jti=jti,
+                token_type=token_type,
+                user_id=user_id,
+                expires_at=expires_at
+            ))
+        db.session.commit()
+
+    @staticmethod
+    def is_revoked(jti):
+        return db.session.query(RevokedToken.jti).filter(RevokedToken.jti == jti).first() is not None
+
+    @staticmethod
+    def get_active_jtis(since=None):
+        """(jti, revoked_at) của token chưa hết hạn, chỉ lấy các bản ghi từ `since` nếu có"""
+        query = db.session.query(RevokedToken.jti, RevokedToken.revoked_at).filter(
+            (RevokedToken.expires_at.is_(None)) | (RevokedToken.expires_at > datetime.utcnow())
+        )
+        if since is not None:
+            query = query.filter(RevokedToken.revoked_at >= since)
+        return query
+
+    @staticmethod
+    def delete_expired():
+        """Xoá theo lô các token thu hồi đã hết hạn, trả về số dòng đã xoá (lệnh sweep-revoked-tokens)"""
+        deleted = RevokedToken.query.filter(RevokedToken.expires_at <= datetime.utcnow()) \
+            .delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    @staticmethod
+    def expires_at_from_claims(claims):
+        """Claim exp (epoch giây, UTC) -> datetime UTC không kèm múi giờ như các cột thời gian khác"""
+        exp = claims.get('exp')
+        if exp is None:
+            return None
+        return datetime.fromtimestamp(exp, tz=timezone.utc).replace(tzinfo=None)
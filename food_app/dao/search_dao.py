@@ -0,0 +1,125 @@
+import json
+
+from food_app import db
+from food_app.models.food import Food
+from food_app.models.restaurant import Restaurant
+from config import Config
+from sqlalchemy import Integer, any_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+
+class SearchDAO:
+    # Chỉ lấy các cột cần cho kết quả tìm kiếm, không nạp ORM object
+    RESTAURANT_COLUMNS = (
+        Restaurant.id, Restaurant.name, Restaurant.address, Restaurant.phone,
+        Restaurant.email, Restaurant.description, Restaurant.image_url,
+        Restaurant.is_active, Restaurant.opening_hours, Restaurant.latitude,
+        Restaurant.longitude, Restaurant.created_at, Restaurant.updated_at
+    )
+    FOOD_COLUMNS = (
+        Food.id, Food.restaurant_id, Food.name, Food.description,
+        Food.price, Food.image_url, Food.available
+    )
+
+    @staticmethod
+    def id_condition(column, ids):
+        """
+        Điều kiện `column IN ids`. Tập nhỏ dùng IN (...) thường; tập lớn hơn SEARCH_MAX_BOUND_IDS
+        (ví dụ tiền tố ngắn khớp hàng nghìn món) gửi cả tập trong một tham số duy nhất
+        thay vì một tham số cho mỗi id
+        """
+        ids = list(ids)
+        if len(ids) <= Config.SEARCH_MAX_BOUND_IDS:
+            return column.in_(ids)
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            return column == any_(bindparam(None, ids, type_=ARRAY(Integer)))
+        if dialect == 'sqlite':
+            values = func.json_each(json.dumps(ids)).table_valued('value')
+            return column.in_(select(values.c.value))
+        return column.in_(ids)
+
+    @staticmethod
+    def _matched_restaurants(food_conditions):
+        """Subquery (restaurant_id, min_price) của các nhà hàng có món thỏa điều kiện"""
+        return db.session.query(
+            Food.restaurant_id.label('restaurant_id'),
+            func.min(Food.price).label('min_price')
+        ).filter(*food_conditions).group_by(Food.restaurant_id).subquery()
+
+    @staticmethod
+    def search_restaurants(food_conditions, sort_by=None, sort_order='asc'):
+        """
+        Query các nhà hàng đang hoạt động có ít nhất một món thỏa điều kiện,
+        kèm giá món rẻ nhất. Việc gom nhóm và sắp xếp đều thực hiện trong DB
+        để có thể phân trang trực tiếp trên nhà hàng. Trả về Row theo RESTAURANT_COLUMNS.
+        """
+        matched = SearchDAO._matched_restaurants(food_conditions)
+        query = db.session.query(*SearchDAO.RESTAURANT_COLUMNS, matched.c.min_price)\
+            .join(matched, matched.c.restaurant_id == Restaurant.id)\
+            .filter(Restaurant.is_active.is_(True))
+
+        descending = sort_order == 'desc'
+        if sort_by == 'price':
+            if descending:
+                query = query.order_by(matched.c.min_price.desc(), Restaurant.id.desc())
+            else:
+                query = query.order_by(matched.c.min_price, Restaurant.id)
+        else:
+            query = query.order_by(Restaurant.id.desc() if descending else Restaurant.id)
+
+        return query
+
+    @staticmethod
+    def search_candidates(food_conditions):
+        """
+        Danh sách (id, latitude, longitude) của mọi nhà hàng đang hoạt động có món thỏa điều kiện,
+        dùng để xếp hạng theo khoảng cách chính xác trong bộ nhớ
+        """
+        matched = SearchDAO._matched_restaurants(food_conditions)
+        return db.session.query(Restaurant.id, Restaurant.latitude, Restaurant.longitude)\
+            .join(matched, matched.c.restaurant_id == Restaurant.id)\
+            .filter(Restaurant.is_active.is_(True))\
+            .order_by(Restaurant.id)\
+            .all()
+
+    @staticmethod
+    def get_food_restaurants(food_conditions):
+        """Các cặp (food_id, restaurant_id) của món thỏa điều kiện thuộc nhà hàng đang hoạt động"""
+        return db.session.query(Food.id, Food.restaurant_id)\
+            .join(Restaurant, Restaurant.id == Food.restaurant_id)\
+            .filter(*food_conditions)\
+            .filter(Restaurant.is_active.is_(True))\
+            .all()
+
+    @staticmethod
+    def get_restaurant_rows(restaurant_ids):
+        """Row theo RESTAURANT_COLUMNS của các nhà hàng trong restaurant_ids (một truy vấn IN)"""
+        if not restaurant_ids:
+            return []
+        return db.session.query(*SearchDAO.RESTAURANT_COLUMNS)\
+            .filter(Restaurant.id.in_(restaurant_ids))\
+            .all()
+
+    @staticmethod
+    def get_top_foods(food_conditions, restaurant_ids, limit):
+        """
+        Lấy tối đa `limit` món thỏa điều kiện cho mỗi nhà hàng trong restaurant_ids
+        bằng ROW_NUMBER() OVER (PARTITION BY restaurant_id). Trả về Row theo FOOD_COLUMNS.
+        """
+        if not restaurant_ids:
+            return []
+
+        row_number = func.row_number().over(
+            partition_by=Food.restaurant_id,
+            order_by=Food.id
+        ).label('row_number')
+        ranked = db.session.query(Food.id.label('food_id'), row_number)\
+            .filter(*food_conditions)\
+            .filter(Food.restaurant_id.in_(restaurant_ids))\
+            .subquery()
+
+        return db.session.query(*SearchDAO.FOOD_COLUMNS)\
+            .join(ranked, ranked.c.food_id == Food.id)\
+            .filter(ranked.c.row_number <= limit)\
+            .order_by(Food.restaurant_id, ranked.c.row_number)\
+            .all()
@@ -1,6 +1,8 @@
 from food_app import db
 from food_app.models.user import User
 from datetime import datetime
+from sqlalchemy.orm import joinedload
+from config import Config
 
 class UserDAO:
     @staticmethod
@@ -31,6 +33,14 @@ class UserDAO:
             return User.query.filter_by(role=role).all()
         return User.query.all()
 
+    @staticmethod
+    def iter_users_by_role(role=None, batch_size=None):
+        """Duyệt người dùng theo từng lô (yield_per) để stream, nạp kèm nhà hàng sở hữu"""
+        query = User.query.options(joinedload(User.owned_restaurant))
+        if role:
+            query = query.filter_by(role=role)
+        return query.yield_per(batch_size or Config.JSON_STREAM_CHUNK_ITEMS)
+
     @staticmethod
     def create_user(user_data):
         user = User(**user_data)
@@ -14,5 +14,7 @@ from .coupon import Coupon, coupon_foods
 from .invoice import Invoice
 from .cancel_reason import CancelReason
 from .deposit_transaction import DepositTransaction
+from .auth_epoch import AuthEpoch
+from .revoked_token import RevokedToken
 
-__all__ = ['BaseUser', 'Customer', 'User', 'Food', 'Order', 'OrderItem', 'OrderItemTopping', 'Restaurant', 'Category', 'OTP', 'food_categories', 'Topping', 'food_toppings', 'Coupon', 'coupon_foods', 'Invoice', 'CancelReason', 'DepositTransaction']
\ No newline at end of file
+__all__ = ['BaseUser', 'Customer', 'User', 'Food', 'Order', 'OrderItem', 'OrderItemTopping', 'Restaurant', 'Category', 'OTP', 'food_categories', 'Topping', 'food_toppings', 'Coupon', 'coupon_foods', 'Invoice', 'CancelReason', 'DepositTransaction', 'AuthEpoch', 'RevokedToken']
\ No newline at end of file
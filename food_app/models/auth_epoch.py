@@ -0,0 +1,10 @@
+from food_app import db
+from datetime import datetime
+
+class AuthEpoch(db.Model):
+    """Phiên bản quyền của người dùng; tăng khi role, restaurant_id hoặc trạng thái khoá thay đổi"""
+    __tablename__ = 'auth_epochs'
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    epoch = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -3,6 +3,11 @@ from datetime import datetime
 
 class Food(db.Model):
     __tablename__ = 'foods'
+    __table_args__ = (
+        # Index cho phân trang keyset theo (created_at, id), toàn bảng và trong từng nhà hàng
+        db.Index('ix_foods_created', 'created_at', 'id'),
+        db.Index('ix_foods_restaurant_created', 'restaurant_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -23,23 +28,7 @@ class Food(db.Model):
     order_items = db.relationship('OrderItem', back_populates='food', lazy=True)
     
     def to_dict(self):
-        restaurant_info = None
-        if self.restaurant:
-            restaurant_info = {
-                'id': self.restaurant.id,
-                'name': self.restaurant.name,
-                'address': self.restaurant.address,
-                'phone': self.restaurant.phone,
-                'email': self.restaurant.email,
-                'description': self.restaurant.description,
-                'image_url': self.restaurant.image_url,
-                'opening_hours': self.restaurant.opening_hours if isinstance(self.restaurant.opening_hours, str) else str(self.restaurant.opening_hours),
-                'latitude': self.restaurant.latitude,
-                'longitude': self.restaurant.longitude,
-                'is_active': self.restaurant.is_active,
-                'approval_status': self.restaurant.approval_status,
-                'tax_code': self.restaurant.tax_code
-            }
+        restaurant_info = self.restaurant.to_summary_dict() if self.restaurant else None
         
         return {
             'id': self.id,
@@ -54,4 +43,20 @@ class Food(db.Model):
             'restaurant': restaurant_info,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+    
+    def to_ref_dict(self):
+        """Dạng chuẩn hoá: chỉ giữ id của nhà hàng, danh mục và topping (dữ liệu đi kèm được gửi riêng)"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'price': self.price,
+            'category_ids': [category.id for category in self.categories],
+            'topping_ids': [topping.id for topping in self.toppings],
+            'image_url': self.image_url,
+            'available': self.available,
+            'restaurant_id': self.restaurant_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
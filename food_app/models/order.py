@@ -3,6 +3,11 @@ from datetime import datetime
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Index cho phân trang keyset theo (created_at, id) trong từng khách hàng / nhà hàng
+        db.Index('ix_orders_customer_created', 'customer_id', 'created_at', 'id'),
+        db.Index('ix_orders_restaurant_created', 'restaurant_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
@@ -10,7 +10,7 @@ class OTP(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     phone = db.Column(db.String(20), nullable=False, index=True)
     code = db.Column(db.String(6), nullable=False)
-    expires_at = db.Column(db.DateTime, default=lambda: datetime.utcnow() + OTP.EXPIRY_TIME)
+    expires_at = db.Column(db.DateTime, default=lambda: datetime.utcnow() + OTP.EXPIRY_TIME, index=True)
     attempts = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
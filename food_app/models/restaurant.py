@@ -62,6 +62,24 @@ class Restaurant(db.Model):
         
         return data
     
+    def to_summary_dict(self):
+        """Thông tin nhà hàng kèm theo món ăn (Food.to_dict và dạng chuẩn hoá)"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'address': self.address,
+            'phone': self.phone,
+            'email': self.email,
+            'description': self.description,
+            'image_url': self.image_url,
+            'opening_hours': self.opening_hours if isinstance(self.opening_hours, str) else str(self.opening_hours),
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'is_active': self.is_active,
+            'approval_status': self.approval_status,
+            'tax_code': self.tax_code
+        }
+    
     def can_be_approved(self):
         """Kiểm tra restaurant có đủ điều kiện phê duyệt không"""
         return (
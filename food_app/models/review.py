@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Review(db.Model):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        # Index cho phân trang keyset theo (created_at, id) trong từng nhà hàng
+        db.Index('ix_reviews_restaurant_created', 'restaurant_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
@@ -0,0 +1,12 @@
+from food_app import db
+from datetime import datetime
+
+class RevokedToken(db.Model):
+    """jti của access/refresh token đã bị thu hồi (đăng xuất); giữ đến khi token hết hạn"""
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(36), primary_key=True)
+    token_type = db.Column(db.String(10), nullable=False)
+    user_id = db.Column(db.Integer, nullable=True, index=True)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -1,7 +1,7 @@
 from flask import Blueprint, request
 from food_app.controllers.admin_controller import AdminController
 from food_app.utils.decorators import admin_required
-from flask_jwt_extended import jwt_required
+from food_app.utils.jwt_service import jwt_required
 from flasgger import swag_from
 
 admin_api_bp = Blueprint('admin_api', __name__)
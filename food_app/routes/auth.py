@@ -1,13 +1,15 @@
 from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity, get_jwt
 from food_app.controllers.auth_controller import AuthController
 from food_app.dao import UserDAO, CustomerDAO
 from flasgger import swag_from
-from food_app.utils.jwt_service import get_user_id_from_jwt, get_user_type_from_jwt
+from food_app.utils.jwt_service import get_user_id_from_jwt, get_user_type_from_jwt, jwt_required
+from food_app.utils.rate_limit import rate_limit
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/staff/login/', methods=['POST'])
+@rate_limit('staff_login')
 @swag_from({
     'tags': ['Auth'],
     'summary': 'Staff/admin login',
@@ -94,6 +96,7 @@ def update_profile():
     return AuthController.update_profile(user, data)
 
 @auth_bp.route('/customer/send-otp/', methods=['POST'])
+@rate_limit('otp_send')
 @swag_from({
     'tags': ['Auth'],
     'summary': 'Send OTP to customer phone',
@@ -121,6 +124,7 @@ def send_customer_otp():
     return AuthController.send_customer_otp(data)
 
 @auth_bp.route('/customer/verify-otp/', methods=['POST'])
+@rate_limit('otp_verify')
 @swag_from({
     'tags': ['Auth'],
     'summary': 'Verify customer OTP and login',
@@ -160,4 +164,31 @@ def verify_customer_otp():
 })
 def refresh_token():
     identity = get_jwt_identity()
-    return AuthController.refresh_token(identity)
\ No newline at end of file
+    return AuthController.refresh_token(identity)
+
+@auth_bp.route('/logout/', methods=['POST'])
+@jwt_required(verify_type=False)
+@swag_from({
+    'tags': ['Auth'],
+    'summary': 'Logout (revoke current token and optional refresh token)',
+    'requestBody': {
+        'required': False,
+        'content': {
+            'application/json': {
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'refresh_token': {'type': 'string'}
+                    }
+                }
+            }
+        }
+    },
+    'responses': {
+        '200': {'description': 'Logged out'},
+        '401': {'description': 'Invalid or revoked token'}
+    }
+})
+def logout():
+    data = request.get_json(silent=True)
+    return AuthController.logout(get_jwt(), data)
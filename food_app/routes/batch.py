@@ -0,0 +1,29 @@
+from flask import Blueprint, request
+from flasgger import swag_from
+
+from food_app.controllers.batch_controller import BatchController
+
+batch_bp = Blueprint('batch', __name__)
+
+@batch_bp.route('/', methods=['POST'], strict_slashes=False)
+@swag_from({'tags': ['Batch'], 'summary': 'Run several independent GET requests in one call', 'parameters': [
+    {'in': 'body', 'name': 'body', 'required': True, 'schema': {
+        'type': 'object',
+        'properties': {
+            'requests': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'id': {'type': 'string', 'description': 'Client-side id echoed back in the response'},
+                        'method': {'type': 'string', 'enum': ['GET']},
+                        'path': {'type': 'string', 'example': '/api/customer/cart/'}
+                    }
+                }
+            }
+        }
+    }}
+]})
+def batch():
+    """Gộp nhiều request GET vào một lần gọi"""
+    return BatchController.batch(request.get_json(silent=True))
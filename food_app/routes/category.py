@@ -1,12 +1,15 @@
 from flask import Blueprint
 from flasgger import swag_from
 from food_app.models.category import Category
+from food_app.dao import CategoryDAO
 from food_app.utils.responses import success_response, error_response
+from food_app.utils.conditional import conditional_get
 
 category_bp = Blueprint('category', __name__)
 
 @category_bp.route('/', methods=['GET'])
 @swag_from({'tags': ['Category'], 'summary': 'List all categories'})
+@conditional_get(CategoryDAO.get_version)
 def list_categories():
     try:
         cats = Category.query.order_by(Category.id.asc()).all()
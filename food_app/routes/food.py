@@ -1,6 +1,8 @@
 from flask import Blueprint, request
 from food_app.controllers.food_controller import FoodController
 from flasgger import swag_from
+from food_app.dao import FoodDAO
+from food_app.utils.conditional import conditional_get
 
 food_bp = Blueprint('food', __name__)
 
@@ -62,8 +64,17 @@ def get_foods():
     available_only = request.args.get('available', 'true').lower() == 'true'
     return FoodController.get_foods(category, available_only)
 
+@food_bp.route('/batch', methods=['GET'])
+@swag_from({'tags': ['Food'], 'summary': 'Get many foods by id in one request', 'parameters': [
+    {'in': 'query', 'name': 'ids', 'schema': {'type': 'string'}, 'required': True, 'description': 'Comma-separated food ids, e.g. 1,2,3'}
+]})
+def get_foods_batch():
+    """Lấy nhiều món ăn theo danh sách id"""
+    return FoodController.get_foods_batch(request.args)
+
 @food_bp.route('/<int:food_id>/', methods=['GET'])
 @swag_from({'tags': ['Food'], 'summary': 'Get food detail with additional info'})
+@conditional_get(lambda food_id: FoodDAO.get_detail_version(food_id))
 def get_food(food_id):
     """Lấy chi tiết món ăn với thông tin bổ sung"""
     return FoodController.get_food_detail(food_id)
@@ -3,6 +3,8 @@ from flasgger import swag_from
 
 from food_app.controllers import RestaurantController
 from food_app.models import User
+from food_app.dao import RestaurantDAO
+from food_app.utils.conditional import conditional_get
 
 restaurant_bp = Blueprint('restaurant', __name__)
 
@@ -21,8 +23,18 @@ def list_restaurants_public():
     from food_app.controllers import RestaurantController
     return RestaurantController.list_restaurants()
 
+@restaurant_bp.route('/batch', methods=['GET'])
+@swag_from({'tags': ['Restaurant'], 'summary': 'Get many restaurants by id in one request', 'parameters': [
+    {'in': 'query', 'name': 'ids', 'schema': {'type': 'string'}, 'required': True, 'description': 'Comma-separated restaurant ids, e.g. 1,2,3'}
+]})
+def get_restaurants_batch():
+    """Lấy nhiều nhà hàng theo danh sách id"""
+    from food_app.controllers import RestaurantController
+    return RestaurantController.get_restaurants_batch(request.args)
+
 @restaurant_bp.route('/<int:restaurant_id>/detail', methods=['GET'])
 @swag_from({'tags': ['Restaurant'], 'summary': 'Get restaurant detail with additional info'})
+@conditional_get(lambda restaurant_id: RestaurantDAO.get_detail_version(restaurant_id))
 def get_restaurant_detail_public(restaurant_id):
     """Lấy chi tiết nhà hàng với thông tin bổ sung"""
     from food_app.controllers import RestaurantController
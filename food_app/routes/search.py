@@ -1,17 +1,19 @@
 from flask import Blueprint, request
 from food_app.controllers.search_controller import SearchController
 from flasgger import swag_from
+from food_app.utils.rate_limit import rate_limit
 
 search_bp = Blueprint('search', __name__)
 
 @search_bp.route('/', methods=['GET'])
+@rate_limit('search')
 @swag_from({'tags': ['Search'], 'summary': 'Search restaurants and foods', 'parameters': [
     {'in': 'query', 'name': 'q', 'schema': {'type': 'string'}, 'description': 'Search keyword for food or restaurant name'},
     {'in': 'query', 'name': 'lat', 'schema': {'type': 'number', 'format': 'float'}, 'description': 'Current latitude'},
     {'in': 'query', 'name': 'lon', 'schema': {'type': 'number', 'format': 'float'}, 'description': 'Current longitude'},
     {'in': 'query', 'name': 'min_price', 'schema': {'type': 'number', 'format': 'float'}, 'description': 'Minimum price'},
     {'in': 'query', 'name': 'max_price', 'schema': {'type': 'number', 'format': 'float'}, 'description': 'Maximum price'},
-    {'in': 'query', 'name': 'sort_by', 'schema': {'type': 'string', 'enum': ['distance', 'price']}, 'description': 'Sort by distance or price'},
+    {'in': 'query', 'name': 'sort_by', 'schema': {'type': 'string', 'enum': ['relevance', 'distance', 'price']}, 'description': 'Sort by relevance (text + distance + popularity), distance or price; default relevance when q is given, distance otherwise'},
     {'in': 'query', 'name': 'sort_order', 'schema': {'type': 'string', 'enum': ['asc', 'desc']}, 'description': 'Sort order'},
     {'in': 'query', 'name': 'page', 'schema': {'type': 'integer'}, 'description': 'Page number'},
     {'in': 'query', 'name': 'per_page', 'schema': {'type': 'integer'}, 'description': 'Items per page'}
@@ -73,3 +75,36 @@ search_bp = Blueprint('search', __name__)
 def search():
     """Tìm kiếm nhà hàng và món ăn"""
     return SearchController.search()
+
+@search_bp.route('/suggest', methods=['GET'])
+@rate_limit('suggest')
+@swag_from({'tags': ['Search'], 'summary': 'Typeahead suggestions for foods, restaurants and categories', 'parameters': [
+    {'in': 'query', 'name': 'q', 'schema': {'type': 'string'}, 'description': 'Typed prefix (diacritics optional)'},
+    {'in': 'query', 'name': 'limit', 'schema': {'type': 'integer', 'default': 10}, 'description': 'Max suggestions (1-20)'}
+], 'responses': {
+    '200': {
+        'description': 'Success',
+        'schema': {
+            'type': 'object',
+            'properties': {
+                'success': {'type': 'boolean'},
+                'message': {'type': 'string'},
+                'data': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'type': {'type': 'string', 'enum': ['food', 'restaurant', 'category']},
+                            'id': {'type': 'integer'},
+                            'name': {'type': 'string'},
+                            'restaurant_id': {'type': 'integer'}
+                        }
+                    }
+                }
+            }
+        }
+    }
+}})
+def suggest():
+    """Gợi ý tìm kiếm khi gõ"""
+    return SearchController.suggest()
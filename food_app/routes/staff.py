@@ -2,6 +2,8 @@ from flask import Blueprint, request
 from food_app.controllers.staff_controller import StaffController
 from food_app.utils.decorators import jwt_required, restaurant_staff_required, jwt_staff_required
 from flasgger import swag_from
+from food_app.dao import FoodDAO
+from food_app.utils.conditional import conditional_get
 
 staff_bp = Blueprint('staff', __name__)
 # Bootstrap: create and link a restaurant for a new staff/owner (no existing restaurant)
@@ -16,6 +18,7 @@ def create_and_link_restaurant(current_user):
 @staff_bp.route('/foods/', methods=['GET'])
 @jwt_staff_required(require_restaurant=True, add_user_to_kwargs=True)
 @swag_from({'tags': ['Staff'], 'summary': 'Get restaurant foods'})
+@conditional_get(lambda current_user: (current_user.restaurant_id, *FoodDAO.get_menu_version(current_user.restaurant_id)))
 def get_foods(current_user):
     """Lấy danh sách món ăn của nhà hàng"""
     return StaffController.get_foods(current_user)
@@ -0,0 +1,150 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, object_session
+
+from config import Config
+from food_app import db
+from food_app.models.auth_epoch import AuthEpoch
+from food_app.models.base_user import BaseUser
+from food_app.utils import pending_changes
+from food_app.utils.identity_cache import identity_cache
+
+# Thuộc tính quyết định quyền: đổi một trong số này làm token cũ hết hiệu lực ở đường nhanh
+_AUTHZ_ATTRIBUTES = ('role', 'restaurant_id', 'is_active')
+
+# Khoá session.info chứa {user_id: epoch} đã tăng trong transaction, áp vào bộ nhớ sau commit
+_PENDING_KEY = 'auth_epoch_pending'
+
+
+class AuthEpochRegistry:
+    """
+    Bảng epoch quyền {user_id: epoch} trong bộ nhớ, người dùng chưa từng đổi quyền có epoch 0.
+    Token mang epoch lúc phát hành; epoch trong token khác epoch hiện tại thì claims không còn tin được.
+    Nạp lười lần đầu, đồng bộ định kỳ theo updated_at để nhận thay đổi từ các worker khác.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._epochs = {}
+        self._ready = False
+        self._synced_at = None
+        self._watermark = None
+
+    def reset(self):
+        with self._lock:
+            self._epochs = {}
+            self._ready = False
+            self._synced_at = None
+            self._watermark = None
+
+    def ensure_ready(self):
+        """Nạp bảng epoch nếu chưa có, hoặc đồng bộ thay đổi mới nếu đã quá hạn"""
+        with self._lock:
+            if not self._ready:
+                self._load()
+                self._ready = True
+            elif time.monotonic() - self._synced_at >= Config.AUTH_EPOCH_REFRESH_SECONDS:
+                self._load(since=self._watermark)
+
+    def _load(self, since=None):
+        query = db.session.query(AuthEpoch.user_id, AuthEpoch.epoch, AuthEpoch.updated_at)
+        if since is not None:
+            # Đọc lùi lại một chu kỳ trước watermark: thay đổi commit muộn ở worker khác với updated_at
+            # cũ hơn watermark vẫn được nhận (áp lại epoch đã biết không đổi gì)
+            query = query.filter(AuthEpoch.updated_at >= since - timedelta(seconds=Config.AUTH_EPOCH_REFRESH_SECONDS))
+
+        watermark = since
+        for user_id, epoch, updated_at in query:
+            if self._epochs.get(user_id, 0) < epoch:
+                self._epochs[user_id] = epoch
+                # Quyền đổi ở worker khác: bỏ luôn bản chụp cũ trong identity cache
+                identity_cache.invalidate(user_id)
+            if updated_at and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+
+        self._watermark = watermark
+        self._synced_at = time.monotonic()
+
+    def current(self, user_id):
+        self.ensure_ready()
+        try:
+            return self._epochs.get(int(user_id), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def is_current(self, user_id, epoch):
+        """Epoch trong token còn hiệu lực (token cũ không có epoch luôn trả False)"""
+        return epoch is not None and epoch == self.current(user_id)
+
+    def apply(self, epochs):
+        with self._lock:
+            for user_id, epoch in epochs.items():
+                if self._epochs.get(user_id, 0) < epoch:
+                    self._epochs[user_id] = epoch
+
+
+auth_epochs = AuthEpochRegistry()
+
+# Dialect có INSERT ... ON CONFLICT DO UPDATE ... RETURNING: tăng epoch trong một câu lệnh
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def _bump(connection, user_id):
+    """
+    Tăng epoch của user trong cùng transaction với thay đổi quyền, trả về epoch mới.
+    Dùng upsert nguyên tử để hai transaction đổi quyền cùng user không cùng INSERT dòng đầu tiên.
+    """
+    table = AuthEpoch.__table__
+    now = datetime.utcnow()
+    insert = _UPSERT_INSERTS.get(connection.dialect.name)
+    if insert is not None:
+        statement = insert(table).values(user_id=user_id, epoch=1, updated_at=now)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={'epoch': table.c.epoch + 1, 'updated_at': now}
+        ).returning(table.c.epoch)
+        return connection.execute(statement).scalar()
+
+    result = connection.execute(
+        table.update().where(table.c.user_id == user_id).values(epoch=table.c.epoch + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(user_id=user_id, epoch=1, updated_at=now))
+    return connection.execute(select(table.c.epoch).where(table.c.user_id == user_id)).scalar()
+
+
+def _record(connection, target):
+    epoch = _bump(connection, target.id)
+    session = object_session(target)
+    if session is not None:
+        pending_changes.current(session, _PENDING_KEY, dict)[target.id] = epoch
+
+
+@event.listens_for(BaseUser, 'after_update', propagate=True)
+def _user_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(name in state.attrs and state.attrs[name].history.has_changes() for name in _AUTHZ_ATTRIBUTES):
+        _record(connection, target)
+
+
+@event.listens_for(BaseUser, 'after_delete', propagate=True)
+def _user_deleted(mapper, connection, target):
+    _record(connection, target)
+
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    for pending in pending_changes.committed(session, _PENDING_KEY):
+        auth_epochs.apply(pending)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    pending_changes.discard(session, _PENDING_KEY, previous_transaction)
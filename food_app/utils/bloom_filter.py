@@ -0,0 +1,46 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Bloom filter trên bytearray: `key in bloom` trả False thì chắc chắn chưa thêm,
+    True thì có thể đã thêm (dương tính giả với xác suất ~ error_rate khi chưa vượt capacity).
+    Không hỗ trợ xoá; cần bỏ phần tử thì dựng lại filter mới.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.size = max(int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k vị trí từ hai nửa của một digest 128 bit
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hash_count)]
+
+    def add(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def is_full(self):
+        return self.count >= self.capacity
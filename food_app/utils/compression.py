@@ -0,0 +1,135 @@
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli là tuỳ chọn
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard là tuỳ chọn
+    zstandard = None
+
+
+def _gzip_compressor(level):
+    return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._compressor = _gzip_compressor(level)
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Thuật toán -> lớp nén dạng stream; chỉ gồm những thuật toán có thư viện
+_STREAMS = {'gzip': _GzipStream}
+if brotli is not None:
+    _STREAMS['br'] = _BrotliStream
+if zstandard is not None:
+    _STREAMS['zstd'] = _ZstdStream
+
+
+def _compress(encoding, level, data):
+    if encoding == 'gzip':
+        compressor = _gzip_compressor(level)
+        return compressor.compress(data) + compressor.flush()
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _compress_stream(encoding, level, chunks):
+    stream = _STREAMS[encoding](level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield stream.compress(chunk)
+        yield stream.finish()
+    finally:
+        # WSGI server chỉ close() generator nén khi client ngắt kết nối; đóng tiếp generator gốc
+        # (stream_with_context) để nó thoát và trả lại request context
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+class Compression:
+    """
+    Nén phản hồi theo Accept-Encoding (zstd, br, gzip theo thứ tự ưu tiên của server khi client chấp nhận ngang nhau).
+    Phản hồi thường được nén khi vượt ngưỡng COMPRESSION_MIN_SIZE; phản hồi stream được nén theo từng phần.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.after_request)
+
+    def _choose_encoding(self, config):
+        available = [name for name in config['COMPRESSION_ALGORITHMS'] if name in _STREAMS]
+        return request.accept_encodings.best_match(available)
+
+    def after_request(self, response):
+        config = current_app.config
+        if response.status_code == 304:
+            # 304 phải mang cùng Vary với bản 200 mà nó thay thế (bản đó có thể đã được nén)
+            response.vary.add('Accept-Encoding')
+            return response
+        if (response.mimetype not in config['COMPRESSION_MIMETYPES']
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.direct_passthrough):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self._choose_encoding(config)
+        if encoding is None:
+            return response
+
+        level = config['COMPRESSION_LEVELS'][encoding]
+        if response.is_streamed:
+            response.response = _compress_stream(encoding, level, response.response)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESSION_MIN_SIZE']:
+                return response
+            response.set_data(_compress(encoding, level, data))
+
+        response.headers['Content-Encoding'] = encoding
+        # Bản nén khác từng byte với bản gốc: ETag mạnh chuyển thành yếu (If-None-Match vẫn so khớp yếu)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,90 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, current_app, make_response, request
+from werkzeug.http import http_date
+
+
+class NotModifiedResponse(Response):
+    """
+    Phản hồi 304 giữ Last-Modified (werkzeug bỏ mọi entity header khỏi 304),
+    để client/cache cập nhật validator như khi nhận bản 200
+    """
+
+    def get_wsgi_headers(self, environ):
+        headers = super().get_wsgi_headers(environ)
+        if self.last_modified is not None:
+            headers['Last-Modified'] = http_date(self.last_modified)
+        return headers
+
+
+def _etag(version):
+    """
+    ETag từ đường dẫn, tham số truy vấn, định dạng yêu cầu (Accept) và phiên bản dữ liệu.
+    Dùng dạng yếu: ETag đại diện cho phiên bản dữ liệu chứ không phải từng byte (bản nén, bản gốc
+    cùng một ETag), nên 200 và 304 luôn gửi cùng một giá trị.
+    """
+    payload = repr((request.path, sorted(request.args.items(multi=True)), request.headers.get('Accept'), version))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _last_modified(version):
+    """Mốc thay đổi gần nhất trong phiên bản (thời gian lưu trong DB là UTC không kèm múi giờ)"""
+    moments = [value for value in version if isinstance(value, datetime)]
+    if not moments:
+        return None
+    latest = max(moments)
+    if latest.tzinfo is None:
+        latest = latest.replace(tzinfo=timezone.utc)
+    return latest.replace(microsecond=0)
+
+
+def _is_not_modified(etag):
+    # Chỉ dựa vào If-None-Match: Last-Modified là updated_at lớn nhất nên không phản ánh dòng bị xoá,
+    # If-Modified-Since một mình có thể trả 304 cho dữ liệu đã đổi
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    return False
+
+
+def conditional_get(version_func):
+    """
+    Decorator cho GET: `version_func(**kwargs của view)` trả về tuple phiên bản dữ liệu
+    (updated_at lớn nhất, số dòng, ...) lấy bằng một truy vấn rẻ, hoặc None để bỏ qua.
+    Nếu client đã có bản hiện tại (If-None-Match) thì trả 304 mà không chạy view,
+    ngược lại chạy view và gắn ETag, Last-Modified vào phản hồi 200.
+    304 mang cùng ETag, Last-Modified, Cache-Control và Vary như bản 200.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                version = version_func(**kwargs)
+            except Exception as e:
+                current_app.logger.warning('conditional_get: không lấy được phiên bản dữ liệu: %s', e)
+                version = None
+            if version is None:
+                return f(*args, **kwargs)
+
+            etag = _etag(version)
+            last_modified = _last_modified(version)
+            if _is_not_modified(etag):
+                response = NotModifiedResponse(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Bản 200 đổi theo định dạng yêu cầu (JSON/msgpack)
+            response.vary.add('Accept')
+            # Client luôn hỏi lại server, nhưng chỉ tải lại khi dữ liệu đổi
+            response.cache_control.no_cache = True
+            if 'Authorization' in request.headers:
+                response.cache_control.private = True
+            return response
+        return decorated_function
+    return decorator
@@ -1,25 +1,40 @@
 from functools import wraps
 from flask import request
-from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from flask_jwt_extended import get_jwt
 from food_app.models.user import User
-from food_app.models.customer import Customer
+from food_app.utils.auth_epoch import auth_epochs
+from food_app.utils.identity_cache import Principal, PrincipalProxy, load_principal
 from food_app.utils.responses import error_response
-from food_app.utils.jwt_service import get_user_id_from_jwt, get_user_type_from_jwt, get_role_from_jwt
+from food_app.utils.jwt_service import get_user_id_from_jwt, get_user_type_from_jwt, get_role_from_jwt, verify_jwt
+
+def _current_principal(user_type, user_id):
+    """
+    Người dùng hiện tại theo token: nếu epoch trong claims còn hiệu lực thì dựng thẳng từ claims
+    (không truy vấn DB), ngược lại (token cũ, quyền đã đổi) đọc lại qua identity cache.
+    restaurant_id nằm trong _AUTHZ_ATTRIBUTES nên staff chưa liên kết nhà hàng cũng tin được claims khi epoch khớp.
+    """
+    claims = get_jwt()
+    trusted = claims.get('user_type') == user_type
+    if trusted and auth_epochs.is_current(user_id, claims.get('epoch')):
+        return PrincipalProxy(Principal(int(user_id), user_type, claims.get('role'), claims.get('restaurant_id'), True))
+    return load_principal(user_type, user_id)
 
 def jwt_required(f):
     """Decorator yêu cầu JWT chung cho tất cả user types"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            verify_jwt_in_request()
+            verify_jwt()
             user_id = get_user_id_from_jwt() 
             
             if not user_id:
                 return error_response('Token không hợp lệ', 401)
             
-            user = User.query.get(user_id)
+            user = _current_principal('staff', user_id)
             if not user:
                 return error_response('Người dùng không tồn tại', 404)
+            if not user.is_active:
+                return error_response('Tài khoản đã bị khóa', 403)
             
             # Thêm user vào kwargs
             kwargs['current_user'] = user
@@ -33,16 +48,18 @@ def jwt_customer_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            verify_jwt_in_request()
+            verify_jwt()
             user_id = get_user_id_from_jwt()
             user_type = get_user_type_from_jwt()
             
             if not user_type or user_type != 'customer':
                 return error_response('Không có quyền truy cập', 403)
             
-            customer = Customer.query.get(user_id)
+            customer = _current_principal('customer', user_id)
             if not customer:
                 return error_response('Khách hàng không tồn tại', 404)
+            if not customer.is_active:
+                return error_response('Tài khoản đã bị khóa', 403)
             
             # Thêm customer vào kwargs
             kwargs['current_customer'] = customer
@@ -56,17 +73,16 @@ def jwt_base_user_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            verify_jwt_in_request()
+            verify_jwt()
             user_id = get_user_id_from_jwt()
             user_type = get_user_type_from_jwt()
             if not user_id:
                 return error_response('Chưa đăng nhập', 401)
-            if user_type == 'customer':
-                base_user = Customer.query.get(user_id)
-            else:
-                base_user = User.query.get(user_id)
+            base_user = _current_principal('customer' if user_type == 'customer' else 'staff', user_id)
             if not base_user:
                 return error_response('Người dùng không tồn tại', 404)
+            if not base_user.is_active:
+                return error_response('Tài khoản đã bị khóa', 403)
             kwargs['current_base_user'] = base_user
             return f(*args, **kwargs)
         except Exception as e:
@@ -85,16 +101,18 @@ def jwt_staff_required(require_restaurant=False, add_user_to_kwargs=True):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             try:
-                verify_jwt_in_request()
+                verify_jwt()
                 user_type = get_user_type_from_jwt()
                 user_id = get_user_id_from_jwt()
                 
                 if not user_type or user_type != 'staff':
                     return error_response('Không có quyền truy cập', 403)
                 
-                user = User.query.get(user_id)
+                user = _current_principal('staff', user_id)
                 if not user:
                     return error_response('Người dùng không tồn tại', 404)
+                if not user.is_active:
+                    return error_response('Tài khoản đã bị khóa', 403)
                 
                 # Chỉ cho phép owner hoặc admin sử dụng các endpoint dạng staff
                 if user.role not in ['owner', 'admin']:
@@ -124,7 +142,7 @@ def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            verify_jwt_in_request()
+            verify_jwt()
             user_type = get_user_type_from_jwt()
             user_id = get_user_id_from_jwt()
             role = get_role_from_jwt()
@@ -132,9 +150,11 @@ def admin_required(f):
             if not user_type or user_type != 'staff' or role != 'admin':
                 return error_response('Không có quyền admin', 403)
             
-            user = User.query.get(user_id)
+            user = _current_principal('staff', user_id)
             if not user or user.role != 'admin':
                 return error_response('Không có quyền admin', 403)
+            if not user.is_active:
+                return error_response('Tài khoản đã bị khóa', 403)
             
             return f(*args, **kwargs)
         except Exception as e:
@@ -146,7 +166,7 @@ def manager_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            verify_jwt_in_request()
+            verify_jwt()
             user_type = get_user_type_from_jwt()
             user_id = get_user_id_from_jwt()
             role = get_role_from_jwt()
@@ -157,9 +177,11 @@ def manager_required(f):
             if role not in ['manager', 'admin']:
                 return error_response('Không có quyền quản lý', 403)
             
-            user = User.query.get(user_id)
+            user = _current_principal('staff', user_id)
             if not user or user.role not in ['manager', 'admin']:
                 return error_response('Không có quyền quản lý', 403)
+            if not user.is_active:
+                return error_response('Tài khoản đã bị khóa', 403)
             
             # Thêm user vào kwargs
             kwargs['current_user'] = user
@@ -175,17 +197,19 @@ def require_role(required_role):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             try:
-                verify_jwt_in_request()
+                verify_jwt()
                 user_id = get_user_id_from_jwt()
                 
                 if not user_id:
                     return error_response('Chưa đăng nhập', 401)
                 
-                user = User.query.get(user_id)
+                user = _current_principal('staff', user_id)
                 if not user:
                     return error_response('Người dùng không tồn tại', 401)
+                if not user.is_active:
+                    return error_response('Tài khoản đã bị khóa', 403)
                 
-                if not user.has_role(required_role):
+                if not User.has_role(user, required_role):
                     return error_response('Không có quyền truy cập', 403)
                 
                 return f(*args, **kwargs)
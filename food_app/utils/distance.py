@@ -1,27 +1,39 @@
 import math
 
-def calculate_distance(lat1, lon1, lat2, lon2):
+try:
+    import numpy as np
+except ImportError:  # numpy không bắt buộc, dùng vòng lặp math thay thế
+    np = None
+
+# Bán kính trái đất (km)
+EARTH_RADIUS_KM = 6371
+
+# Nếu mọi điểm nằm trong khoảng này (độ) quanh điểm gốc thì dùng công thức equirectangular
+EQUIRECTANGULAR_MAX_DEGREES = 0.5
+
+def haversine(lat1, lon1, lat2, lon2):
     """
-    Tính khoảng cách giữa hai điểm tọa độ theo công thức Haversine
-    Trả về khoảng cách tính bằng km
+    Tính khoảng cách giữa hai điểm tọa độ theo công thức Haversine (km, không làm tròn)
     """
     # Chuyển đổi độ sang radian
     lat1_rad = math.radians(lat1)
     lon1_rad = math.radians(lon1)
     lat2_rad = math.radians(lat2)
     lon2_rad = math.radians(lon2)
-    
-    # Bán kính trái đất (km)
-    R = 6371
-    
+
     # Công thức Haversine
     dlat = lat2_rad - lat1_rad
     dlon = lon2_rad - lon1_rad
     a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
     c = 2 * math.asin(math.sqrt(a))
-    distance = R * c
-    
-    return round(distance, 2)
+    return EARTH_RADIUS_KM * c
+
+def calculate_distance(lat1, lon1, lat2, lon2):
+    """
+    Tính khoảng cách giữa hai điểm tọa độ theo công thức Haversine
+    Trả về khoảng cách tính bằng km
+    """
+    return round(haversine(lat1, lon1, lat2, lon2), 2)
 
 def is_within_radius(lat1, lon1, lat2, lon2, radius_km):
     """
@@ -29,3 +41,101 @@ def is_within_radius(lat1, lon1, lat2, lon2, radius_km):
     """
     distance = calculate_distance(lat1, lon1, lat2, lon2)
     return distance <= radius_km
+
+def haversine_many(lat, lon, lats, lons):
+    """
+    Khoảng cách Haversine (km) từ một điểm tới nhiều điểm trong một lần gọi vector hoá
+    """
+    if np is None:
+        return [haversine(lat, lon, la, lo) for la, lo in zip(lats, lons)]
+    lats_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    lons_rad = np.radians(np.asarray(lons, dtype=np.float64))
+    lat_rad = math.radians(lat)
+    dlat = lats_rad - lat_rad
+    dlon = lons_rad - math.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat_rad) * np.cos(lats_rad) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def equirectangular_many(lat, lon, lats, lons):
+    """
+    Khoảng cách xấp xỉ equirectangular (km), đủ chính xác cho bán kính giao hàng vài chục km
+    """
+    lon_scale = math.cos(math.radians(lat))
+    if np is None:
+        return [
+            EARTH_RADIUS_KM * math.radians(math.hypot(la - lat, (lo - lon) * lon_scale))
+            for la, lo in zip(lats, lons)
+        ]
+    dlat = np.asarray(lats, dtype=np.float64) - lat
+    dlon = (np.asarray(lons, dtype=np.float64) - lon) * lon_scale
+    return EARTH_RADIUS_KM * np.radians(np.hypot(dlat, dlon))
+
+def distances_from(lat, lon, lats, lons, method='auto'):
+    """
+    Tính khoảng cách tới nhiều điểm.
+    method: 'haversine' | 'equirectangular' | 'auto' (equirectangular khi mọi điểm đều gần)
+    """
+    if method == 'auto':
+        method = 'haversine'
+        if len(lats):
+            if np is None:
+                spread = max(max(abs(la - lat) for la in lats), max(abs(lo - lon) for lo in lons))
+            else:
+                spread = max(np.max(np.abs(np.asarray(lats) - lat)), np.max(np.abs(np.asarray(lons) - lon)))
+            if spread <= EQUIRECTANGULAR_MAX_DEGREES:
+                method = 'equirectangular'
+    if method == 'equirectangular':
+        return equirectangular_many(lat, lon, lats, lons)
+    return haversine_many(lat, lon, lats, lons)
+
+def rank_by_distance(lat, lon, lats, lons, method='auto'):
+    """
+    Trả về (distances, order): mảng khoảng cách và chỉ số sắp xếp tăng dần theo khoảng cách
+    """
+    distances = distances_from(lat, lon, lats, lons, method)
+    if np is None:
+        order = sorted(range(len(distances)), key=distances.__getitem__)
+        return distances, order
+    return distances, np.argsort(distances, kind='stable')
+
+class CoordinateArray:
+    """
+    Tập tọa độ nhà hàng lưu trong các mảng float64 liên tục để tính khoảng cách hàng loạt
+    """
+
+    def __init__(self, ids, lats, lons):
+        if np is None:
+            self.ids = list(ids)
+            self.lats = [float(v) for v in lats]
+            self.lons = [float(v) for v in lons]
+        else:
+            self.ids = np.asarray(ids, dtype=np.int64)
+            self.lats = np.ascontiguousarray(lats, dtype=np.float64)
+            self.lons = np.ascontiguousarray(lons, dtype=np.float64)
+
+    @classmethod
+    def from_points(cls, points):
+        """Tạo từ danh sách (id, lat, lon), bỏ qua điểm thiếu tọa độ"""
+        points = [p for p in points if p[1] is not None and p[2] is not None]
+        return cls([p[0] for p in points], [p[1] for p in points], [p[2] for p in points])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def distances(self, lat, lon, method='auto'):
+        return distances_from(lat, lon, self.lats, self.lons, method)
+
+    def rank(self, lat, lon, max_km=None, method='auto'):
+        """Trả về (ids, distances) đã sắp xếp theo khoảng cách, lọc theo max_km nếu có"""
+        distances, order = rank_by_distance(lat, lon, self.lats, self.lons, method)
+        if np is None:
+            ranked = [(self.ids[i], distances[i]) for i in order]
+            if max_km is not None:
+                ranked = [item for item in ranked if item[1] <= max_km]
+            return [item[0] for item in ranked], [item[1] for item in ranked]
+        ids = self.ids[order]
+        distances = distances[order]
+        if max_km is not None:
+            keep = distances <= max_km
+            ids, distances = ids[keep], distances[keep]
+        return ids, distances
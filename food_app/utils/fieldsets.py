@@ -0,0 +1,180 @@
+from datetime import date
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from food_app.models.coupon import Coupon
+from food_app.models.food import Food
+from food_app.models.order import Order
+from food_app.models.order_item import OrderItem
+from food_app.models.order_item_topping import OrderItemTopping
+from food_app.models.restaurant import Restaurant
+from food_app.models.review import Review
+from food_app.utils.serializers import compile_serializer
+
+
+class FieldSpec:
+    """
+    Mô tả các trường serialize được của một model:
+    - columns: trường lấy thẳng từ cột (datetime được đổi sang isoformat)
+    - loaders: tên quan hệ -> hàm tạo loader option để nạp trước quan hệ đó
+    - relations: trường phụ thuộc quan hệ -> (tên quan hệ trong loaders, hàm tính giá trị)
+    """
+
+    def __init__(self, columns, loaders=None, relations=None):
+        self.columns = tuple(columns)
+        self.loaders = loaders or {}
+        self.relations = relations or {}
+
+
+FIELD_SPECS = {
+    Food: FieldSpec(
+        ('id', 'name', 'description', 'price', 'image_url', 'available', 'restaurant_id', 'created_at', 'updated_at'),
+        loaders={
+            'categories': lambda: selectinload(Food.categories),
+            'toppings': lambda: selectinload(Food.toppings),
+            'restaurant': lambda: joinedload(Food.restaurant)
+        },
+        relations={
+            'categories': ('categories', lambda food: [category.name for category in food.categories]),
+            'toppings': ('toppings', lambda food: [topping.to_dict_basic() for topping in food.toppings]),
+            'restaurant': ('restaurant', lambda food: food.restaurant.to_summary_dict() if food.restaurant else None)
+        }
+    ),
+    Restaurant: FieldSpec(
+        ('id', 'name', 'address', 'phone', 'email', 'description', 'image_url', 'is_active',
+         'opening_hours', 'latitude', 'longitude', 'created_at', 'updated_at')
+    ),
+    Order: FieldSpec(
+        ('id', 'customer_id', 'restaurant_id', 'total_amount', 'status', 'delivery_address', 'delivery_phone',
+         'delivery_note', 'cancel_reason', 'rejection_reason', 'created_at', 'updated_at',
+         'accepted_at', 'completed_at', 'cancelled_at'),
+        loaders={
+            'customer': lambda: joinedload(Order.customer),
+            'restaurant': lambda: joinedload(Order.restaurant),
+            'items': lambda: selectinload(Order.items).options(
+                joinedload(OrderItem.food),
+                selectinload(OrderItem.toppings).joinedload(OrderItemTopping.topping)
+            )
+        },
+        relations={
+            'customer_name': (
+                'customer',
+                lambda order: (order.customer.first_name + ' ' + order.customer.last_name) if order.customer else None
+            ),
+            'customer_phone': ('customer', lambda order: order.customer.phone if order.customer else None),
+            'restaurant_name': ('restaurant', lambda order: order.restaurant.name if order.restaurant else None),
+            'items': ('items', lambda order: [item.to_dict() for item in order.items])
+        }
+    ),
+    Review: FieldSpec(
+        ('id', 'customer_id', 'restaurant_id', 'food_id', 'rating', 'comment', 'created_at', 'updated_at')
+    ),
+    Coupon: FieldSpec(
+        ('id', 'code', 'description', 'discount_type', 'discount_value', 'start_date', 'end_date',
+         'min_order_amount', 'max_discount_amount', 'is_active', 'restaurant_id'),
+        loaders={
+            'foods': lambda: selectinload(Coupon.foods)
+        },
+        relations={
+            'foods': ('foods', lambda coupon: [food.id for food in coupon.foods])
+        }
+    )
+}
+
+
+def _split(value):
+    if value is None:
+        return None
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+class FieldSet:
+    """
+    Tập trường client yêu cầu qua ?fields= và ?include=.
+    - không có cả hai: trả đầy đủ như to_dict()
+    - fields=a,b: chỉ trả các trường này
+    - include=r1,r2: thêm các trường quan hệ; nếu không có fields thì đi kèm mọi trường cột
+    Quan hệ không được yêu cầu thì không nạp và không serialize.
+    """
+
+    def __init__(self, fields=None, include=None):
+        self.fields = fields
+        self.include = include or set()
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(_split(args.get('fields')), _split(args.get('include')))
+
+    @property
+    def is_full(self):
+        return self.fields is None and not self.include
+
+    def wants(self, key):
+        """Trường (kể cả trường bổ sung như distance_km) có được yêu cầu không"""
+        if self.is_full:
+            return True
+        if self.fields is None:
+            return True
+        return key in self.fields or key in self.include
+
+    def _relation_keys(self, spec):
+        if self.is_full:
+            return list(spec.relations)
+        return [key for key in spec.relations if key in self.include or (self.fields and key in self.fields)]
+
+    def _column_keys(self, spec):
+        if self.fields is None:
+            return spec.columns
+        return [key for key in spec.columns if key in self.fields]
+
+    def loader_options(self, model):
+        """Loader option cho đúng các quan hệ sẽ được serialize (mỗi quan hệ một lần)"""
+        spec = FIELD_SPECS[model]
+        names = []
+        for key in self._relation_keys(spec):
+            name = spec.relations[key][0]
+            if name not in names:
+                names.append(name)
+        return [spec.loaders[name]() for name in names]
+
+    def serialize(self, obj):
+        """Serialize theo tập trường; đầy đủ thì dùng to_dict() của model"""
+        if self.is_full:
+            return obj.to_dict()
+        spec = FIELD_SPECS[type(obj)]
+        data = {}
+        for key in self._column_keys(spec):
+            value = getattr(obj, key)
+            data[key] = value.isoformat() if isinstance(value, date) else value
+        for key in self._relation_keys(spec):
+            data[key] = spec.relations[key][1](obj)
+        return data
+
+    def row_serializer(self, model):
+        """
+        RowSerializer khi mọi trường được yêu cầu đều là cột (truy vấn chỉ lấy cột, không dựng đối tượng ORM),
+        None nếu cần quan hệ
+        """
+        spec = FIELD_SPECS[model]
+        if self._relation_keys(spec):
+            return None
+        return compile_serializer(model, tuple(self._column_keys(spec)))
+
+    def apply(self, query, model):
+        """Chuẩn bị query: chỉ lấy cột nếu đủ, ngược lại nạp trước các quan hệ cần serialize"""
+        serializer = self.row_serializer(model)
+        if serializer is not None:
+            return serializer.query(query)
+        return query.options(*self.loader_options(model))
+
+    def serialize_all(self, items, model):
+        """Serialize kết quả của query đã qua apply()"""
+        serializer = self.row_serializer(model)
+        if serializer is not None:
+            return serializer.serialize(items)
+        return [self.serialize(item) for item in items]
+
+
+# Biên dịch sẵn serializer đầy đủ cột của từng model
+for _model, _spec in FIELD_SPECS.items():
+    compile_serializer(_model, _spec.columns)
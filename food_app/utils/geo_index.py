@@ -0,0 +1,311 @@
+import heapq
+import math
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from config import Config
+from food_app.models.restaurant import Restaurant
+from food_app.utils import pending_changes
+from food_app.utils.distance import CoordinateArray, haversine_many
+
+# Số km trên một độ vĩ
+KM_PER_DEGREE = 111.32
+
+# Khoá session.info chứa thay đổi chờ commit: {restaurant_id: (lat, lon, is_active), None nếu đã xoá}
+_PENDING_KEY = 'geo_index_pending'
+
+
+class GeoGridIndex:
+    """
+    Index lưới ô vuông (theo độ) cho tọa độ nhà hàng.
+    Truy vấn k nhà hàng gần nhất bằng cách mở rộng dần từng vòng ô quanh
+    ô chứa điểm truy vấn (chỉ các ô trong vùng có dữ liệu), dừng khi không vòng nào phía ngoài có thể gần hơn.
+    Khi số ô phải duyệt nhiều hơn số điểm (dữ liệu thưa, bán kính lớn) thì quét tuyến tính vector hoá.
+    """
+
+    def __init__(self, cell_degrees=None):
+        self.cell_degrees = cell_degrees or Config.GEO_INDEX_CELL_DEGREES
+        self._cells = defaultdict(set)
+        self._points = {}
+        self._bounds = None
+        self._array = None
+
+    def __len__(self):
+        return len(self._points)
+
+    def cell_of(self, lat, lon):
+        return (int(math.floor(lat / self.cell_degrees)), int(math.floor(lon / self.cell_degrees)))
+
+    def upsert(self, restaurant_id, lat, lon, is_active=True):
+        self.remove(restaurant_id)
+        if lat is None or lon is None:
+            return
+        cell = self.cell_of(lat, lon)
+        self._points[restaurant_id] = (lat, lon, cell, bool(is_active))
+        self._array = None
+        self._cells[cell].add(restaurant_id)
+        if self._bounds is not None:
+            self._bounds[0] = min(self._bounds[0], cell[0])
+            self._bounds[1] = max(self._bounds[1], cell[0])
+            self._bounds[2] = min(self._bounds[2], cell[1])
+            self._bounds[3] = max(self._bounds[3], cell[1])
+
+    def remove(self, restaurant_id):
+        point = self._points.pop(restaurant_id, None)
+        if point is None:
+            return
+        self._array = None
+        members = self._cells.get(point[2])
+        if members is not None:
+            members.discard(restaurant_id)
+            if not members:
+                del self._cells[point[2]]
+                # Ô biên vừa trống: vùng có dữ liệu có thể co lại, tính lại khi cần
+                if self._bounds is not None and (
+                    point[2][0] in self._bounds[:2] or point[2][1] in self._bounds[2:]
+                ):
+                    self._bounds = None
+
+    def bounds(self):
+        """[min_x, max_x, min_y, max_y] của các ô có dữ liệu, None nếu index rỗng"""
+        if self._bounds is None and self._cells:
+            xs = [cell[0] for cell in self._cells]
+            ys = [cell[1] for cell in self._cells]
+            self._bounds = [min(xs), max(xs), min(ys), max(ys)]
+        return self._bounds
+
+    def get_point(self, restaurant_id):
+        point = self._points.get(restaurant_id)
+        return (point[0], point[1]) if point else None
+
+    def coordinates(self, active_only=False):
+        """Toàn bộ tọa độ dưới dạng CoordinateArray (dựng lại khi index thay đổi)"""
+        if self._array is None:
+            self._array = (
+                CoordinateArray.from_points([(rid, p[0], p[1]) for rid, p in self._points.items()]),
+                CoordinateArray.from_points([(rid, p[0], p[1]) for rid, p in self._points.items() if p[3]])
+            )
+        return self._array[1] if active_only else self._array[0]
+
+    def _ring(self, center, radius, bounds):
+        """Các ô trên vòng `radius` quanh center, chỉ trong vùng bounds"""
+        cx, cy = center
+        min_x, max_x, min_y, max_y = bounds
+        if radius == 0:
+            if min_x <= cx <= max_x and min_y <= cy <= max_y:
+                yield center
+            return
+        y_from, y_to = max(cy - radius, min_y), min(cy + radius, max_y)
+        for x in (cx - radius, cx + radius):
+            if min_x <= x <= max_x:
+                for y in range(y_from, y_to + 1):
+                    yield (x, y)
+        x_from, x_to = max(cx - radius + 1, min_x), min(cx + radius - 1, max_x)
+        for y in (cy - radius, cy + radius):
+            if min_y <= y <= max_y:
+                for x in range(x_from, x_to + 1):
+                    yield (x, y)
+
+    def _ring_lower_bound_km(self, lat, ring):
+        """Khoảng cách tối thiểu (km) tới mọi điểm nằm ngoài vòng ô `ring`"""
+        band_lat = min(abs(lat) + (ring + 1) * self.cell_degrees, 89.0)
+        km_per_cell = self.cell_degrees * KM_PER_DEGREE * min(1.0, math.cos(math.radians(band_lat)))
+        # Biên an toàn nhỏ cho sai khác giữa cung vĩ tuyến và cung lớn
+        return ring * km_per_cell * 0.99
+
+    def _max_ring(self, center, bounds):
+        cx, cy = center
+        min_x, max_x, min_y, max_y = bounds
+        return max(cx - min_x, max_x - cx, cy - min_y, max_y - cy)
+
+    def _radius_ring(self, lat, radius_km):
+        """Ước lượng số vòng cần duyệt để phủ bán kính radius_km"""
+        band_lat = min(abs(lat) + radius_km / KM_PER_DEGREE + self.cell_degrees, 89.0)
+        km_per_cell = self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(band_lat)) * 0.99
+        return int(math.ceil(radius_km / km_per_cell)) + 1
+
+    def _probe_count(self, center, rings, bounds):
+        """Số ô tối đa phải duyệt: phần giao giữa hình vuông `rings` vòng quanh center và vùng bounds"""
+        cx, cy = center
+        min_x, max_x, min_y, max_y = bounds
+        width = min(cx + rings, max_x) - max(cx - rings, min_x) + 1
+        height = min(cy + rings, max_y) - max(cy - rings, min_y) + 1
+        return max(width, 0) * max(height, 0)
+
+    def nearest(self, lat, lon, k=None, radius_km=None, active_only=False, allowed_ids=None):
+        """
+        Trả về danh sách (restaurant_id, distance_km) sắp xếp theo khoảng cách tăng dần.
+        - k: số kết quả tối đa (None = không giới hạn)
+        - radius_km: chỉ lấy trong bán kính (None = không giới hạn)
+        - active_only: bỏ qua nhà hàng đang tắt hoạt động
+        - allowed_ids: chỉ xét các nhà hàng trong tập này (lọc trước khi lấy k)
+        """
+        if k is not None and k <= 0:
+            return []
+
+        if k is None and radius_km is None:
+            # Không giới hạn: xếp hạng toàn bộ tọa độ trong một lần tính vector hoá
+            ids, distances = self.coordinates(active_only).rank(lat, lon, method='haversine')
+            ranked = [(int(rid), float(distance)) for rid, distance in zip(ids, distances)]
+            if allowed_ids is not None:
+                ranked = [item for item in ranked if item[0] in allowed_ids]
+            return ranked
+
+        bounds = self.bounds()
+        if bounds is None:
+            return []
+        center = self.cell_of(lat, lon)
+        max_ring = self._max_ring(center, bounds)
+        if radius_km is not None:
+            max_ring = min(max_ring, self._radius_ring(lat, radius_km))
+        if self._probe_count(center, max_ring, bounds) > len(self._points):
+            # Duyệt ô tốn hơn tính khoảng cách tới mọi điểm
+            ids, distances = self.coordinates(active_only).rank(lat, lon, max_km=radius_km, method='haversine')
+            ranked = [(int(rid), float(distance)) for rid, distance in zip(ids, distances)]
+            if allowed_ids is not None:
+                ranked = [item for item in ranked if item[0] in allowed_ids]
+            return ranked[:k] if k is not None else ranked
+
+        found = []
+        ring = 0
+        while ring <= max_ring:
+            ring_ids = []
+            ring_lats = []
+            ring_lons = []
+            for cell in self._ring(center, ring, bounds):
+                for restaurant_id in self._cells.get(cell, ()):
+                    point_lat, point_lon, _, is_active = self._points[restaurant_id]
+                    if active_only and not is_active:
+                        continue
+                    if allowed_ids is not None and restaurant_id not in allowed_ids:
+                        continue
+                    ring_ids.append(restaurant_id)
+                    ring_lats.append(point_lat)
+                    ring_lons.append(point_lon)
+
+            if ring_ids:
+                distances = haversine_many(lat, lon, ring_lats, ring_lons)
+                for restaurant_id, distance in zip(ring_ids, distances):
+                    if radius_km is None or distance <= radius_km:
+                        found.append((float(distance), restaurant_id))
+
+            lower_bound = self._ring_lower_bound_km(lat, ring)
+            if radius_km is not None and lower_bound > radius_km:
+                break
+            if k is not None and len(found) >= k:
+                if heapq.nsmallest(k, found)[-1][0] <= lower_bound:
+                    break
+            ring += 1
+
+        found.sort()
+        if k is not None:
+            found = found[:k]
+        return [(restaurant_id, distance) for distance, restaurant_id in found]
+
+
+class RestaurantGeoIndex:
+    """
+    Bọc GeoGridIndex với khóa, dựng lười từ DB, cập nhật sau mỗi commit qua sự kiện SQLAlchemy
+    và đồng bộ định kỳ theo updated_at để nhận thay đổi từ các worker khác.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.grid = GeoGridIndex()
+        self._ready = False
+        self._synced_at = None
+        self._watermark = None
+
+    def reset(self):
+        with self._lock:
+            self.grid = GeoGridIndex()
+            self._ready = False
+            self._synced_at = None
+            self._watermark = None
+
+    def ensure_ready(self):
+        with self._lock:
+            if not self._ready:
+                self._load()
+                self._ready = True
+            elif time.monotonic() - self._synced_at >= Config.GEO_INDEX_REFRESH_SECONDS:
+                self._load(since=self._watermark)
+
+    def _load(self, since=None):
+        query = Restaurant.query.with_entities(
+            Restaurant.id, Restaurant.latitude, Restaurant.longitude,
+            Restaurant.is_active, Restaurant.updated_at
+        )
+        if since is not None:
+            query = query.filter(Restaurant.updated_at >= since)
+
+        watermark = since
+        for restaurant_id, lat, lon, is_active, updated_at in query:
+            self.grid.upsert(restaurant_id, lat, lon, is_active)
+            if updated_at and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+
+        self._watermark = watermark
+        self._synced_at = time.monotonic()
+
+    def upsert(self, restaurant_id, lat, lon, is_active=True):
+        with self._lock:
+            self.grid.upsert(restaurant_id, lat, lon, is_active)
+
+    def remove(self, restaurant_id):
+        with self._lock:
+            self.grid.remove(restaurant_id)
+
+    def apply(self, changes):
+        """Áp các thay đổi đã commit; index chưa dựng thì bỏ qua (lần nạp đầu sẽ đọc)"""
+        with self._lock:
+            if not self._ready:
+                return
+            for restaurant_id, point in changes.items():
+                if point is None:
+                    self.grid.remove(restaurant_id)
+                else:
+                    self.grid.upsert(restaurant_id, *point)
+
+    def nearest(self, lat, lon, k=None, radius_km=None, active_only=False, allowed_ids=None):
+        self.ensure_ready()
+        with self._lock:
+            return self.grid.nearest(
+                lat, lon, k=k, radius_km=radius_km, active_only=active_only, allowed_ids=allowed_ids
+            )
+
+
+geo_index = RestaurantGeoIndex()
+
+
+def _record(target, point):
+    # Flush chưa phải commit: chỉ ghi nhận, transaction rollback thì index không đổi
+    session = object_session(target)
+    if session is not None:
+        pending_changes.current(session, _PENDING_KEY, dict)[target.id] = point
+
+
+@event.listens_for(Restaurant, 'after_insert')
+@event.listens_for(Restaurant, 'after_update')
+def _restaurant_saved(mapper, connection, target):
+    _record(target, (target.latitude, target.longitude, target.is_active))
+
+
+@event.listens_for(Restaurant, 'after_delete')
+def _restaurant_deleted(mapper, connection, target):
+    _record(target, None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    for pending in pending_changes.committed(session, _PENDING_KEY):
+        geo_index.apply(pending)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    pending_changes.discard(session, _PENDING_KEY, previous_transaction)
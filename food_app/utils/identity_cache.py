@@ -0,0 +1,135 @@
+import threading
+from collections import namedtuple
+
+from cachetools import TTLCache
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from config import Config
+from food_app import db
+from food_app.models.base_user import BaseUser
+from food_app.models.customer import Customer
+from food_app.models.user import User
+from food_app.utils import pending_changes
+
+# Ảnh chụp chỉ đọc của người dùng đã xác thực, đủ cho các bước kiểm tra quyền
+Principal = namedtuple('Principal', ['id', 'user_type', 'role', 'restaurant_id', 'is_active'])
+
+_MODELS = {'customer': Customer, 'staff': User}
+
+# Khoá session.info chứa id người dùng thay đổi trong transaction, xoá lại khỏi cache sau commit
+_PENDING_KEY = 'identity_cache_pending'
+
+
+class PrincipalProxy:
+    """
+    Đại diện cho người dùng hiện tại, truyền vào handler thay cho đối tượng ORM.
+    id, user_type, role, restaurant_id, is_active đọc từ ảnh chụp trong cache;
+    thuộc tính khác (to_dict, owned_restaurant, balance...) hoặc gán giá trị sẽ nạp
+    đối tượng ORM vào session hiện tại ở lần đầu, sau đó mọi truy cập đi thẳng tới đối tượng đó.
+    """
+
+    __slots__ = ('_principal', '_instance')
+
+    def __init__(self, principal):
+        object.__setattr__(self, '_principal', principal)
+        object.__setattr__(self, '_instance', None)
+
+    def _get_current_object(self):
+        instance = self._instance
+        if instance is None:
+            principal = self._principal
+            instance = db.session.get(_MODELS[principal.user_type], principal.id)
+            if instance is None:
+                raise LookupError('Người dùng không tồn tại')
+            object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def __getattr__(self, name):
+        if self._instance is None and name in Principal._fields:
+            return getattr(self._principal, name)
+        return getattr(self._get_current_object(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get_current_object(), name, value)
+
+    def __repr__(self):
+        return f'<PrincipalProxy {self._principal.user_type} {self._principal.id}>'
+
+
+class IdentityCache:
+    """
+    Cache Principal theo (user_type, id) với số entry giới hạn và TTL ngắn.
+    Entry bị xoá khi người dùng được cập nhật/xoá trong worker này;
+    thay đổi từ worker khác được nhận sau tối đa TTL.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self._cache = TTLCache(maxsize or Config.IDENTITY_CACHE_MAX_ENTRIES, ttl or Config.IDENTITY_CACHE_TTL_SECONDS)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load(user_type, user_id):
+        """Chỉ lấy các cột cần cho Principal, không dựng đối tượng ORM"""
+        if user_type == 'staff':
+            # User.is_active bị UserMixin che (property), lấy thẳng cột của base_users
+            row = db.session.query(User.id, User.role, User.restaurant_id, BaseUser.__table__.c.is_active) \
+                .select_from(User).filter(User.id == user_id).first()
+            return Principal(row.id, user_type, row.role, row.restaurant_id, row.is_active) if row else None
+        row = db.session.query(Customer.id, Customer.is_active).filter(Customer.id == user_id).first()
+        return Principal(row.id, user_type, None, None, row.is_active) if row else None
+
+    def get(self, user_type, user_id):
+        """Principal của người dùng, None nếu không tồn tại (kết quả None không được cache)"""
+        try:
+            key = (user_type, int(user_id))
+        except (TypeError, ValueError):
+            return None
+        with self._lock:
+            principal = self._cache.get(key)
+        if principal is None:
+            principal = self._load(*key)
+            if principal is not None:
+                with self._lock:
+                    self._cache[key] = principal
+        return principal
+
+    def invalidate(self, user_id):
+        with self._lock:
+            for user_type in _MODELS:
+                self._cache.pop((user_type, user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+identity_cache = IdentityCache()
+
+
+def load_principal(user_type, user_id):
+    """PrincipalProxy của người dùng, None nếu không tồn tại"""
+    principal = identity_cache.get(user_type, user_id)
+    return PrincipalProxy(principal) if principal is not None else None
+
+
+@event.listens_for(BaseUser, 'after_update', propagate=True)
+@event.listens_for(BaseUser, 'after_delete', propagate=True)
+def _user_changed(mapper, connection, target):
+    identity_cache.invalidate(target.id)
+    # Request khác có thể đọc lại bản cũ trước khi transaction commit: xoá thêm lần nữa sau commit
+    session = object_session(target)
+    if session is not None:
+        pending_changes.current(session, _PENDING_KEY, set).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    for pending in pending_changes.committed(session, _PENDING_KEY):
+        for user_id in pending:
+            identity_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    pending_changes.discard(session, _PENDING_KEY, previous_transaction)
@@ -0,0 +1,64 @@
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson là tuỳ chọn, không có thì dùng json của stdlib
+    orjson = None
+
+
+def _default(obj):
+    """Kiểu không phải JSON gốc: thời gian -> ISO 8601, Decimal -> số"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(obj, sort_keys=True):
+    """Encode obj thành JSON (bytes UTF-8, không khoảng trắng thừa)"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys
+    ).encode('utf-8')
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider cho app: dùng orjson nếu cài đặt, ngược lại json của stdlib.
+    Mọi jsonify()/success_response() đi qua provider này.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, sort_keys=self.sort_keys), mimetype=self.mimetype)
@@ -1,7 +1,56 @@
-from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity, get_jwt
+from flask import g, request
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity, get_jwt, verify_jwt_in_request
 from datetime import timedelta
+from functools import wraps
+from food_app.utils.auth_epoch import auth_epochs
 
-def generate_tokens(user_id, user_type, role=None):
+# Khoá environ của request con trong batch: (jwt_header, jwt_data) đã xác thực ở request gốc
+VERIFIED_JWT_ENVIRON_KEY = 'food_app.verified_jwt'
+
+def verify_jwt(optional=False, refresh=False, verify_type=True):
+    """
+    Như verify_jwt_in_request, nhưng request con của batch dùng lại JWT (access) đã xác thực ở request gốc
+    thay vì giải mã, kiểm tra thu hồi và epoch lại lần nữa
+    """
+    verified = request.environ.get(VERIFIED_JWT_ENVIRON_KEY)
+    if verified is None or refresh:
+        return verify_jwt_in_request(optional=optional, refresh=refresh, verify_type=verify_type)
+    jwt_header, jwt_data = verified
+    # Cùng các biến mà verify_jwt_in_request lưu cho get_jwt()/get_jwt_identity()
+    g._jwt_extended_jwt_user = {'loaded_user': None}
+    g._jwt_extended_jwt_header = jwt_header
+    g._jwt_extended_jwt = jwt_data
+    g._jwt_extended_jwt_location = 'headers'
+    return jwt_header, jwt_data
+
+def jwt_required(optional=False, refresh=False, verify_type=True):
+    """Thay cho flask_jwt_extended.jwt_required, xác thực qua verify_jwt"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            verify_jwt(optional=optional, refresh=refresh, verify_type=verify_type)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def _build_claims(user_id, user_type, role=None, restaurant_id=None, is_active=True):
+    """
+    Claims phân quyền ký kèm token: user_type, role, restaurant_id và epoch quyền hiện tại.
+    Tài khoản bị khoá không được gắn epoch nên luôn phải kiểm tra lại với DB.
+    """
+    additional_claims = {
+        'user_type': user_type,  # 'customer' hoặc 'staff'
+    }
+
+    if role:
+        additional_claims['role'] = role
+    if restaurant_id:
+        additional_claims['restaurant_id'] = restaurant_id
+    if is_active:
+        additional_claims['epoch'] = auth_epochs.current(user_id)
+    return additional_claims
+
+def generate_tokens(user_id, user_type, role=None, restaurant_id=None, is_active=True):
     """
     Tạo access token và refresh token
     Sử dụng user_id làm identity (subject) và lưu thông tin khác trong claims
@@ -10,12 +59,7 @@ def generate_tokens(user_id, user_type, role=None):
     identity = str(user_id)
     
     # Thêm thông tin bổ sung vào claims
-    additional_claims = {
-        'user_type': user_type,  # 'customer' hoặc 'staff'
-    }
-    
-    if role:
-        additional_claims['role'] = role
+    additional_claims = _build_claims(user_id, user_type, role, restaurant_id, is_active)
         
     # Access token có thời hạn ngắn hơn
     access_token = create_access_token(
@@ -37,6 +81,14 @@ def generate_tokens(user_id, user_type, role=None):
         'token_type': 'Bearer'
     }
 
+def generate_access_token(user_id, user_type, role=None, restaurant_id=None, is_active=True):
+    """Tạo access token mới với claims theo quyền hiện tại (dùng khi refresh)"""
+    return create_access_token(
+        identity=str(user_id),
+        additional_claims=_build_claims(user_id, user_type, role, restaurant_id, is_active),
+        expires_delta=timedelta(hours=1)
+    )
+
 def get_user_id_from_jwt():
     """Lấy user_id từ JWT token hiện tại"""
     # Identity bây giờ chính là user_id
@@ -0,0 +1,56 @@
+import dataclasses
+import decimal
+import uuid
+from datetime import date, datetime, time
+
+import msgpack
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+
+def _default(obj):
+    """Kiểu không phải msgpack gốc, cùng giá trị với phản hồi JSON: datetime/date/time -> ISO 8601, Decimal -> số"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not msgpack serializable')
+
+
+def _map_key(key):
+    if isinstance(key, str):
+        return key
+    if isinstance(key, bool):
+        return 'true' if key else 'false'
+    if key is None:
+        return 'null'
+    return str(key)
+
+
+def _string_keys(obj):
+    """
+    Đổi khoá map thành chuỗi như JSON (map sideload/batch theo id dùng khoá int):
+    msgpack.unpackb mặc định (strict_map_key=True) từ chối khoá không phải str/bytes
+    """
+    if isinstance(obj, dict):
+        return {_map_key(key): _string_keys(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_string_keys(value) for value in obj]
+    return obj
+
+
+def packb(obj):
+    """Encode obj thành msgpack (bytes)"""
+    return msgpack.packb(_string_keys(obj), default=_default, use_bin_type=True)
+
+
+def wants_msgpack(request):
+    """Client ưu tiên msgpack hơn JSON trong header Accept (Accept: */* vẫn nhận JSON)"""
+    accept = request.accept_mimetypes
+    return accept.best_match(['application/json', MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE
@@ -0,0 +1,245 @@
+import random
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from food_app.dao.otp_dao import OTPDAO
+
+try:
+    import redis
+except ImportError:  # redis là tuỳ chọn, chỉ cần cho backend shared với OTP_SHARED_STORE_URL
+    redis = None
+
+
+class OTPStore(ABC):
+    """
+    Giao diện lưu OTP theo số điện thoại.
+    put ghi đè mã cũ; verify chỉ trả True khi mã đúng và còn hạn, và xoá mã ngay khi dùng thành công;
+    sweep dọn mã hết hạn và trả về số mã đã xoá (gọi bởi OTPSweeper hoặc lệnh sweep-otps, không chạy trong request).
+    """
+
+    @abstractmethod
+    def put(self, phone, code, ttl_seconds):
+        ...
+
+    @abstractmethod
+    def verify(self, phone, code):
+        ...
+
+    @abstractmethod
+    def sweep(self):
+        ...
+
+
+class SQLOTPStore(OTPStore):
+    """Lưu trong bảng otps (dùng chung giữa các worker); mã hết hạn được sweeper xoá theo lô"""
+
+    def put(self, phone, code, ttl_seconds):
+        OTPDAO.save_otp(phone, code, datetime.utcnow() + timedelta(seconds=ttl_seconds))
+
+    def verify(self, phone, code):
+        return OTPDAO.verify_otp(phone, code)
+
+    def sweep(self):
+        return OTPDAO.delete_expired_otps()
+
+
+class MemoryOTPStore(OTPStore):
+    """
+    Lưu trong bộ nhớ process, chia thành nhiều stripe mỗi stripe một lock
+    để các số điện thoại khác nhau không tranh chung một lock khi gửi OTP hàng loạt.
+    Chỉ dùng khi chạy một process (mã tạo ở worker này không verify được ở worker khác).
+    """
+
+    def __init__(self, stripes=16):
+        self._stripes = [(threading.Lock(), {}) for _ in range(max(int(stripes), 1))]
+
+    def _stripe(self, phone):
+        return self._stripes[zlib.crc32(phone.encode('utf-8')) % len(self._stripes)]
+
+    def put(self, phone, code, ttl_seconds):
+        lock, entries = self._stripe(phone)
+        with lock:
+            entries[phone] = (code, time.monotonic() + ttl_seconds)
+
+    def verify(self, phone, code):
+        lock, entries = self._stripe(phone)
+        with lock:
+            entry = entries.get(phone)
+            if entry is None:
+                return False
+            stored_code, deadline = entry
+            if deadline <= time.monotonic():
+                del entries[phone]
+                return False
+            if stored_code != code:
+                return False
+            del entries[phone]
+            return True
+
+    def sweep(self):
+        removed = 0
+        now = time.monotonic()
+        for lock, entries in self._stripes:
+            with lock:
+                expired = [phone for phone, (_, deadline) in entries.items() if deadline <= now]
+                for phone in expired:
+                    del entries[phone]
+            removed += len(expired)
+        return removed
+
+
+class LocalKeyValueStore:
+    """
+    Key-value có TTL trong bộ nhớ với API con của redis (set ex=, get, delete),
+    thay cho store dùng chung khi chạy local hoặc khi chưa cấu hình OTP_SHARED_STORE_URL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, deadline = entry
+            if deadline is not None and deadline <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def delete(self, key):
+        with self._lock:
+            return 1 if self._data.pop(key, None) is not None else 0
+
+    def purge_expired(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, deadline) in self._data.items() if deadline is not None and deadline <= now]
+            for key in expired:
+                del self._data[key]
+        return len(expired)
+
+
+class SharedOTPStore(OTPStore):
+    """
+    Adapter cho key-value store dùng chung giữa các worker (redis hoặc LocalKeyValueStore):
+    TTL do store tự xử lý, verify chỉ xoá key khi mã đúng.
+    """
+
+    def __init__(self, client, prefix='otp:'):
+        self.client = client
+        self.prefix = prefix
+
+    def put(self, phone, code, ttl_seconds):
+        self.client.set(self.prefix + phone, code, ex=int(ttl_seconds))
+
+    def verify(self, phone, code):
+        key = self.prefix + phone
+        stored_code = self.client.get(key)
+        if isinstance(stored_code, bytes):
+            stored_code = stored_code.decode('utf-8')
+        if stored_code is None or stored_code != code:
+            return False
+        # delete trả số key đã xoá: request verify song song chỉ một request thành công
+        return bool(self.client.delete(key))
+
+    def sweep(self):
+        purge = getattr(self.client, 'purge_expired', None)
+        return purge() if purge else 0
+
+
+def create_store(config):
+    """Chọn backend theo OTP_STORE_BACKEND: sql | memory | shared"""
+    backend = config.get('OTP_STORE_BACKEND', 'sql')
+    if backend == 'memory':
+        return MemoryOTPStore(config.get('OTP_STORE_STRIPES', 16))
+    if backend == 'shared':
+        url = config.get('OTP_SHARED_STORE_URL')
+        if url:
+            if redis is None:
+                raise RuntimeError('OTP_SHARED_STORE_URL cần cài đặt thư viện redis')
+            return SharedOTPStore(redis.Redis.from_url(url))
+        return SharedOTPStore(LocalKeyValueStore())
+    if backend == 'sql':
+        return SQLOTPStore()
+    raise ValueError(f'OTP_STORE_BACKEND không hợp lệ: {backend}')
+
+
+class OTPSweeper(threading.Thread):
+    """Thread nền gọi store.sweep() định kỳ trong app context, thay cho việc xoá OTP hết hạn trong request"""
+
+    def __init__(self, app, store, interval):
+        super().__init__(name='otp-sweeper', daemon=True)
+        self.app = app
+        self.store = store
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    self.store.sweep()
+                except Exception as e:
+                    self.app.logger.warning('OTPSweeper: dọn OTP hết hạn thất bại: %s', e)
+
+    def stop(self):
+        self._stopped.set()
+
+
+class OTPService:
+    """
+    Extension tạo/kiểm tra OTP qua store cấu hình trong app (OTP_STORE_BACKEND, OTP_TTL_SECONDS).
+    Dọn mã hết hạn bằng lệnh `flask sweep-otps`, hoặc OTPSweeper mỗi OTP_SWEEP_INTERVAL_SECONDS
+    nếu được bật (không chạy khi app.testing).
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        store = create_store(app.config)
+        app.extensions['otp_store'] = store
+        app.cli.add_command(sweep_otps_command)
+        interval = app.config.get('OTP_SWEEP_INTERVAL_SECONDS')
+        if interval and not app.testing:
+            OTPSweeper(app, store, interval).start()
+
+    @property
+    def store(self):
+        return current_app.extensions['otp_store']
+
+    def generate(self, phone):
+        """Tạo mã 6 chữ số cho phone (ghi đè mã cũ) và trả về mã"""
+        code = str(random.randint(100000, 999999))
+        self.store.put(phone, code, current_app.config['OTP_TTL_SECONDS'])
+        return code
+
+    def verify(self, phone, code):
+        return self.store.verify(phone, code)
+
+
+otp_service = OTPService()
+
+
+@click.command('sweep-otps')
+@with_appcontext
+def sweep_otps_command():
+    """Xoá các OTP đã hết hạn (chạy định kỳ bằng cron thay cho OTPSweeper)"""
+    removed = otp_service.store.sweep()
+    click.echo(f'Đã xoá {removed} OTP hết hạn')
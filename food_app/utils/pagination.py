@@ -1,3 +1,10 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
 from config import Config
 
 def paginate(data, page: int = None, per_page: int = None):
@@ -40,3 +47,74 @@ def paginate(data, page: int = None, per_page: int = None):
     return items, pagination_info
 
 
+def encode_cursor(created_at, item_id):
+    """Mã hoá vị trí (created_at, id) của phần tử cuối trang thành chuỗi mờ (opaque)"""
+    raw = json.dumps([created_at.isoformat() if created_at else None, item_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Giải mã cursor thành (created_at, id); ValueError nếu cursor không hợp lệ"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, item_id = json.loads(raw)
+        return (datetime.fromisoformat(created_at) if created_at else None), int(item_id)
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError('Cursor không hợp lệ')
+
+
+def paginate_cursor(query, created_at_column, id_column, cursor=None, per_page: int = None, include_total=False):
+    """
+    Phân trang keyset theo (created_at, id) giảm dần.
+    Mỗi trang là một lần quét khoảng trên index (created_at, id), không OFFSET,
+    và chỉ đếm tổng khi include_total=True.
+    
+    Returns:
+        tuple: (items, pagination_info) với pagination_info gồm per_page, next_cursor, has_next (và total nếu yêu cầu)
+    """
+    per_page = min(max(int(per_page or Config.DEFAULT_PER_PAGE), Config.MIN_PER_PAGE), Config.MAX_PER_PAGE)
+    
+    total = query.order_by(None).count() if include_total else None
+    
+    query = query.order_by(None).order_by(created_at_column.desc(), id_column.desc())
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor)
+        if last_created_at is None:
+            query = query.filter(created_at_column.is_(None), id_column < last_id)
+        else:
+            query = query.filter(or_(
+                created_at_column < last_created_at,
+                and_(created_at_column == last_created_at, id_column < last_id)
+            ))
+    
+    # Lấy dư một phần tử để biết còn trang sau mà không cần count()
+    items = query.limit(per_page + 1).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    
+    pagination_info = {
+        'per_page': per_page,
+        'next_cursor': None,
+        'has_next': has_next
+    }
+    if has_next:
+        last = items[-1]
+        pagination_info['next_cursor'] = encode_cursor(
+            getattr(last, created_at_column.key), getattr(last, id_column.key)
+        )
+    if include_total:
+        pagination_info['total'] = total
+    
+    return items, pagination_info
+
+
+def paginate_request(query, created_at_column, id_column, args):
+    """
+    Phân trang theo tham số request: chế độ cursor khi có tham số `cursor`
+    (rỗng = trang đầu, kèm `include_total=true` nếu cần tổng), ngược lại dùng page/per_page như cũ
+    """
+    per_page = args.get('per_page', type=int)
+    if 'cursor' in args:
+        include_total = args.get('include_total', '').lower() in ('1', 'true', 'yes')
+        return paginate_cursor(query, created_at_column, id_column, args.get('cursor'), per_page, include_total)
+    return paginate(query, args.get('page', type=int), per_page)
@@ -0,0 +1,40 @@
+# Thay đổi ghi nhận lúc flush (trong session.info) chỉ được áp vào index/cache trong bộ nhớ sau khi transaction
+# ngoài cùng commit. Thay đổi chia lớp theo savepoint đang mở lúc flush: rollback một savepoint (begin_nested)
+# chỉ bỏ lớp của nó và của các savepoint con; release savepoint không áp gì.
+
+
+def current(session, key, factory):
+    """Container (tạo bằng factory nếu chưa có) chứa thay đổi của `key` ở savepoint hiện tại"""
+    transaction = session.get_nested_transaction()
+    layers = session.info.setdefault(key, [])
+    if not layers or layers[-1][0] is not transaction:
+        layers.append((transaction, factory()))
+    return layers[-1][1]
+
+
+def committed(session, key):
+    """
+    Các container của `key` theo thứ tự ghi nhận khi transaction ngoài cùng commit;
+    rỗng khi after_commit đến từ việc release savepoint (thay đổi chờ commit ngoài cùng)
+    """
+    if session.get_nested_transaction() is not None:
+        return []
+    return [changes for _, changes in session.info.pop(key, ())]
+
+
+def _within(transaction, ancestor):
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+def discard(session, key, previous_transaction):
+    """Bỏ thay đổi của `key` thuộc transaction vừa rollback (cả savepoint con của nó)"""
+    if not previous_transaction.nested:
+        session.info.pop(key, None)
+        return
+    layers = session.info.get(key)
+    if layers:
+        layers[:] = [layer for layer in layers if not _within(layer[0], previous_transaction)]
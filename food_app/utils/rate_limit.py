@@ -0,0 +1,200 @@
+import math
+import threading
+import time
+import zlib
+from functools import wraps
+
+from cachetools import TTLCache
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+
+from food_app.utils.jwt_service import verify_jwt
+from food_app.utils.responses import error_response
+from food_app.utils.validators import normalize_phone
+
+try:
+    import redis
+except ImportError:  # redis là tuỳ chọn, chỉ cần cho backend shared
+    redis = None
+
+
+class MemoryRateLimitBackend:
+    """
+    Token bucket trong bộ nhớ process: mỗi key một cặp (số token, thời điểm cập nhật).
+    Key chia vào nhiều stripe, mỗi stripe một lock và một TTLCache giới hạn số key
+    (bucket không được dùng quá TTL đã đầy lại nên bỏ đi không làm đổi kết quả).
+    """
+
+    def __init__(self, max_keys=100000, ttl=3600, stripes=16):
+        stripes = max(int(stripes), 1)
+        per_stripe = max(int(max_keys) // stripes, 1)
+        self._stripes = [(threading.Lock(), TTLCache(per_stripe, ttl)) for _ in range(stripes)]
+
+    def consume(self, key, capacity, period, cost=1):
+        """Lấy `cost` token từ bucket `key`; trả về (được phép, số giây cần chờ nếu bị từ chối)"""
+        rate = capacity / period
+        lock, buckets = self._stripes[zlib.crc32(key.encode('utf-8')) % len(self._stripes)]
+        now = time.monotonic()
+        with lock:
+            tokens, updated_at = buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= cost:
+                buckets[key] = (min(capacity, tokens - cost), now)
+                return True, 0
+            buckets[key] = (tokens, now)
+        return False, (cost - tokens) / rate
+
+    def refund(self, key, capacity, period, cost=1):
+        """Trả lại `cost` token đã lấy (không vượt capacity)"""
+        self.consume(key, capacity, period, -cost)
+
+
+# Token bucket nguyên tử phía redis: KEYS[1] = key; ARGV = capacity, rate, now, cost (âm: trả lại token)
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = math.min(capacity, tokens - cost)
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class SharedRateLimitBackend:
+    """Token bucket trên redis (dùng chung giữa các worker), cập nhật nguyên tử bằng một script Lua"""
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def consume(self, key, capacity, period, cost=1):
+        allowed, retry_after = self._script(
+            keys=[self.prefix + key], args=[capacity, capacity / period, time.time(), cost]
+        )
+        return bool(int(allowed)), float(retry_after)
+
+    def refund(self, key, capacity, period, cost=1):
+        """Trả lại `cost` token đã lấy (không vượt capacity)"""
+        self.consume(key, capacity, period, -cost)
+
+
+def create_backend(config):
+    """Chọn backend theo RATE_LIMIT_BACKEND: memory | shared"""
+    backend = config.get('RATE_LIMIT_BACKEND', 'memory')
+    if backend == 'memory':
+        ttl = max((period for limits in config['RATE_LIMITS'].values() for _, period in limits.values()), default=3600)
+        return MemoryRateLimitBackend(config.get('RATE_LIMIT_MAX_KEYS', 100000), ttl)
+    if backend == 'shared':
+        url = config.get('RATE_LIMIT_SHARED_STORE_URL')
+        if not url or redis is None:
+            raise RuntimeError('RATE_LIMIT_BACKEND=shared cần RATE_LIMIT_SHARED_STORE_URL và thư viện redis')
+        return SharedRateLimitBackend(redis.Redis.from_url(url))
+    raise ValueError(f'RATE_LIMIT_BACKEND không hợp lệ: {backend}')
+
+
+def _ip_key():
+    return request.remote_addr
+
+
+def _phone_key():
+    data = request.get_json(silent=True) or {}
+    phone = data.get('phone')
+    return normalize_phone(str(phone)) if phone else None
+
+
+def _username_key():
+    data = request.get_json(silent=True) or {}
+    username = data.get('username')
+    return str(username).strip().lower() if username else None
+
+
+def _user_key():
+    """user_id từ JWT nếu request có token hợp lệ; token sai để view tự xử lý"""
+    try:
+        verify_jwt(optional=True)
+    except Exception:
+        return None
+    return get_jwt_identity()
+
+
+# Phạm vi bucket -> hàm lấy định danh từ request (None: bỏ qua bucket đó)
+KEY_FUNCS = {
+    'ip': _ip_key,
+    'phone': _phone_key,
+    'username': _username_key,
+    'user': _user_key,
+}
+
+
+class RateLimiter:
+    """
+    Extension giới hạn tần suất theo token bucket.
+    Giới hạn khai báo trong RATE_LIMITS: {tên: {phạm vi: (capacity, period giây)}},
+    bucket đầy `capacity` token và được nạp lại đủ sau `period` giây.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['rate_limiter'] = create_backend(app.config)
+
+    def check(self, name):
+        """
+        Trừ token lần lượt ở các bucket của giới hạn `name`; trả về số giây cần chờ nếu bị từ chối, None nếu được phép.
+        Dừng ở bucket đầu tiên từ chối và trả lại token đã lấy ở các bucket trước:
+        request bị chặn không tốn token của bucket nào.
+        """
+        config = current_app.config
+        if not config.get('RATE_LIMIT_ENABLED', True):
+            return None
+        backend = current_app.extensions['rate_limiter']
+        consumed = []
+        for scope, (capacity, period) in config['RATE_LIMITS'][name].items():
+            identity = KEY_FUNCS[scope]()
+            if not identity:
+                continue
+            key = f'{name}:{scope}:{identity}'
+            allowed, wait = backend.consume(key, capacity, period)
+            if not allowed:
+                for consumed_key, consumed_capacity, consumed_period in consumed:
+                    backend.refund(consumed_key, consumed_capacity, consumed_period)
+                return wait
+            consumed.append((key, capacity, period))
+        return None
+
+
+rate_limiter = RateLimiter()
+
+
+def rate_limit(name):
+    """
+    Decorator giới hạn tần suất theo RATE_LIMITS[name]; chạy trước view nên request bị chặn không chạm DB.
+    Vượt giới hạn: 429 kèm header Retry-After (giây).
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            retry_after = rate_limiter.check(name)
+            if retry_after is not None:
+                response, status_code = error_response('Quá nhiều yêu cầu, vui lòng thử lại sau', 429)
+                response.headers['Retry-After'] = str(max(int(math.ceil(retry_after)), 1))
+                return response, status_code
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
@@ -0,0 +1,124 @@
+import math
+import threading
+import time
+
+from sqlalchemy import func
+
+from config import Config
+from food_app import db
+from food_app.models.order import Order
+from food_app.models.review import Review
+from food_app.utils.search_index import search_index
+
+
+class RestaurantPopularity:
+    """
+    Điểm phổ biến [0, 1] của nhà hàng, tính sẵn từ số đơn (không tính đơn huỷ)
+    và điểm đánh giá trung bình có hiệu chỉnh Bayes. Tính lại định kỳ.
+    """
+
+    # Nhà hàng ít đánh giá được kéo về mức trung bình này
+    RATING_PRIOR_MEAN = 3.5
+    RATING_PRIOR_COUNT = 5
+    ORDER_SHARE = 0.6
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scores = {}
+        self._loaded_at = None
+
+    def reset(self):
+        with self._lock:
+            self._scores = {}
+            self._loaded_at = None
+
+    def _load(self):
+        order_counts = dict(
+            db.session.query(Order.restaurant_id, func.count(Order.id))
+            .filter(Order.status != 'cancelled')
+            .group_by(Order.restaurant_id)
+            .all()
+        )
+        ratings = {
+            restaurant_id: (total, count)
+            for restaurant_id, total, count in db.session.query(
+                Review.restaurant_id, func.sum(Review.rating), func.count(Review.id)
+            ).filter(Review.restaurant_id.isnot(None)).group_by(Review.restaurant_id)
+        }
+
+        max_orders = math.log1p(max(order_counts.values(), default=0)) or 1.0
+        scores = {}
+        for restaurant_id in set(order_counts) | set(ratings):
+            total, count = ratings.get(restaurant_id, (0, 0))
+            rating = (total + self.RATING_PRIOR_MEAN * self.RATING_PRIOR_COUNT) / (count + self.RATING_PRIOR_COUNT)
+            scores[restaurant_id] = (
+                self.ORDER_SHARE * math.log1p(order_counts.get(restaurant_id, 0)) / max_orders
+                + (1 - self.ORDER_SHARE) * rating / 5
+            )
+        self._scores = scores
+        self._loaded_at = time.monotonic()
+
+    def scores(self):
+        """Dict {restaurant_id: điểm}; nhà hàng không có đơn và đánh giá dùng default_score()"""
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= Config.SEARCH_POPULARITY_REFRESH_SECONDS:
+                self._load()
+            return self._scores
+
+    def default_score(self):
+        return (1 - self.ORDER_SHARE) * self.RATING_PRIOR_MEAN / 5
+
+
+restaurant_popularity = RestaurantPopularity()
+
+
+class TextMatch:
+    """
+    Kết quả khớp từ khoá của một truy vấn: id món ăn/nhà hàng khớp và điểm liên quan.
+    Với khớp chính xác, điểm là BM25 tính từ thống kê token có sẵn trong index;
+    với tìm gần đúng, điểm là độ tương đồng trigram.
+    """
+
+    def __init__(self, q, food_ids, restaurant_ids, similarities=None):
+        self.q = q
+        self.food_ids = food_ids
+        self.restaurant_ids = restaurant_ids
+        self.similarities = similarities
+
+    def restaurant_scores(self, food_restaurants):
+        """
+        Điểm liên quan [0, 1] cho từng nhà hàng: điểm cao nhất giữa tên nhà hàng
+        và các món của nó (food_restaurants: các cặp (food_id, restaurant_id) thỏa bộ lọc)
+        """
+        if self.similarities is not None:
+            food_scores, restaurant_scores = self.similarities
+        else:
+            food_scores, restaurant_scores = search_index.bm25(self.q, self.food_ids, self.restaurant_ids)
+
+        scores = dict(restaurant_scores)
+        for food_id, restaurant_id in food_restaurants:
+            score = food_scores.get(food_id)
+            if score is not None and score > scores.get(restaurant_id, 0.0):
+                scores[restaurant_id] = score
+
+        if self.similarities is None and scores:
+            best = max(scores.values()) or 1.0
+            scores = {restaurant_id: score / best for restaurant_id, score in scores.items()}
+        return scores
+
+
+def distance_decay(distance_km):
+    """Hệ số giảm theo khoảng cách: 1 tại chỗ, ~0.37 tại SEARCH_DISTANCE_DECAY_KM"""
+    if distance_km is None:
+        return 0.0
+    return math.exp(-distance_km / Config.SEARCH_DISTANCE_DECAY_KM)
+
+
+def relevance_score(text_score, distance_km, popularity):
+    """Kết hợp có trọng số (Config.SEARCH_RELEVANCE_WEIGHTS) của độ liên quan, khoảng cách và độ phổ biến"""
+    weights = Config.SEARCH_RELEVANCE_WEIGHTS
+    return (
+        weights['text'] * text_score
+        + weights['distance'] * distance_decay(distance_km)
+        + weights['popularity'] * popularity
+    )
@@ -1,4 +1,21 @@
-from flask import jsonify
+from itertools import islice
+
+from flask import Response, current_app, has_request_context, jsonify, request, stream_with_context
+
+from config import Config
+from food_app.utils.json_encoder import dumps
+from food_app.utils.msgpack_encoder import MSGPACK_MIMETYPE, packb, wants_msgpack
+
+def _make_response(body):
+    """JSON mặc định; msgpack nếu client yêu cầu qua header Accept"""
+    if not has_request_context():
+        return jsonify(body)
+    if wants_msgpack(request):
+        response = Response(packb(body), mimetype=MSGPACK_MIMETYPE)
+    else:
+        response = jsonify(body)
+    response.vary.add('Accept')
+    return response
 
 def success_response(message, data=None, status_code=200):
     response = {
@@ -8,7 +25,7 @@ def success_response(message, data=None, status_code=200):
     if data is not None:
         response['data'] = data
     
-    return jsonify(response), status_code
+    return _make_response(response), status_code
 
 def error_response(message, status_code=400, errors=None):
     response = {
@@ -18,4 +35,43 @@ def error_response(message, status_code=400, errors=None):
     if errors:
         response['errors'] = errors
     
-    return jsonify(response), status_code
\ No newline at end of file
+    return _make_response(response), status_code
+
+def stream_response(message, items, status_code=200, chunk_size=None):
+    """
+    Như success_response với data là mảng, nhưng mảng được encode và gửi dần
+    từ iterable/generator `items`, mỗi lần `chunk_size` phần tử.
+    Chunk đầu tiên được encode trước khi trả Response (query chạy ở đây), nên lỗi lúc đó
+    vẫn đến tay caller như exception thường; lỗi phát sinh sau khi đã gửi header thì được ghi log
+    và mảng vẫn được đóng, phần đuôi trả "success": false.
+    """
+    if wants_msgpack(request):
+        # Mảng msgpack cần biết độ dài trước: gom lại rồi trả như success_response
+        return success_response(message, list(items), status_code)
+    chunk_size = chunk_size or Config.JSON_STREAM_CHUNK_ITEMS
+    items = iter(items)
+    first_chunk = [dumps(item) for item in islice(items, chunk_size)]
+
+    def generate():
+        # Thân phản hồi giống success_response: {"data":[...],"message":...,"success":true}
+        yield b'{"data":[' + b','.join(first_chunk)
+        chunk = []
+        separator = b',' if first_chunk else b''
+        tail = {'message': message, 'success': True}
+        try:
+            for item in items:
+                chunk.append(dumps(item))
+                if len(chunk) >= chunk_size:
+                    yield separator + b','.join(chunk)
+                    separator = b','
+                    chunk = []
+        except Exception as e:
+            current_app.logger.exception('stream_response: lỗi khi encode phần tử giữa chừng')
+            tail = {'message': f'Lỗi khi tải dữ liệu: {str(e)}', 'success': False}
+        if chunk:
+            yield separator + b','.join(chunk)
+        yield b'],' + dumps(tail)[1:]
+
+    response = Response(stream_with_context(generate()), status=status_code, mimetype='application/json')
+    response.vary.add('Accept')
+    return response
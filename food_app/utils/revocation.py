@@ -0,0 +1,119 @@
+import threading
+import time
+from datetime import timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from config import Config
+from food_app.dao.revoked_token_dao import RevokedTokenDAO
+from food_app.models.revoked_token import RevokedToken
+from food_app.utils import pending_changes
+from food_app.utils.bloom_filter import BloomFilter
+
+# Khoá session.info chứa jti vừa thu hồi trong transaction, thêm vào filter sau commit
+_PENDING_KEY = 'revocation_pending'
+
+
+class RevocationList:
+    """
+    Danh sách token bị thu hồi: lưu bền trong bảng revoked_tokens, mỗi process giữ một Bloom filter
+    của các jti chưa hết hạn. Token không có trong filter (hầu hết request) được cho qua không cần truy vấn;
+    chỉ khi filter báo có mới hỏi DB để loại dương tính giả.
+    Filter nạp lười lần đầu, đồng bộ theo revoked_at mỗi REVOCATION_REFRESH_SECONDS để nhận thu hồi
+    từ worker khác, và dựng lại từ đầu khi đầy (bỏ luôn các jti đã hết hạn).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._filter = None
+        self._synced_at = None
+        self._watermark = None
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._synced_at = None
+            self._watermark = None
+
+    def ensure_ready(self):
+        """Dựng filter nếu chưa có hoặc đã đầy, hoặc đồng bộ thu hồi mới nếu đã quá hạn"""
+        with self._lock:
+            if self._filter is None or self._filter.is_full:
+                self._load()
+            elif time.monotonic() - self._synced_at >= Config.REVOCATION_REFRESH_SECONDS:
+                self._load(since=self._watermark)
+
+    def _load(self, since=None):
+        # Đọc lùi lại một chu kỳ trước watermark: thu hồi commit muộn ở worker khác với revoked_at
+        # cũ hơn watermark vẫn được nhận; jti đọc lại đã có trong filter thì bỏ qua
+        overlap = since - timedelta(seconds=Config.REVOCATION_REFRESH_SECONDS) if since is not None else None
+        rows = RevokedTokenDAO.get_active_jtis(overlap).all()
+        if since is None:
+            capacity = max(Config.REVOCATION_BLOOM_CAPACITY, len(rows) * 2)
+            self._filter = BloomFilter(capacity, Config.REVOCATION_BLOOM_ERROR_RATE)
+
+        watermark = since
+        for jti, revoked_at in rows:
+            if jti not in self._filter:
+                self._filter.add(jti)
+            if revoked_at and (watermark is None or revoked_at > watermark):
+                watermark = revoked_at
+
+        self._watermark = watermark
+        self._synced_at = time.monotonic()
+
+    def add(self, jtis):
+        with self._lock:
+            if self._filter is not None:
+                for jti in jtis:
+                    self._filter.add(jti)
+
+    def is_revoked(self, jti):
+        if not jti:
+            return False
+        self.ensure_ready()
+        if jti not in self._filter:
+            return False
+        return RevokedTokenDAO.is_revoked(jti)
+
+    def revoke(self, claims):
+        """Thu hồi token theo claims đã giải mã (jti, type, sub, exp)"""
+        user_id = claims.get('sub')
+        RevokedTokenDAO.revoke(
+            claims['jti'],
+            claims.get('type', 'access'),
+            int(user_id) if str(user_id).isdigit() else None,
+            RevokedTokenDAO.expires_at_from_claims(claims)
+        )
+
+
+revocation_list = RevocationList()
+
+
+@click.command('sweep-revoked-tokens')
+@with_appcontext
+def sweep_revoked_tokens_command():
+    """Xoá các token thu hồi đã hết hạn (chạy định kỳ bằng cron)"""
+    removed = RevokedTokenDAO.delete_expired()
+    click.echo(f'Đã xoá {removed} token thu hồi hết hạn')
+
+
+@event.listens_for(RevokedToken, 'after_insert')
+def _token_revoked(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        pending_changes.current(session, _PENDING_KEY, set).add(target.jti)
+
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    for pending in pending_changes.committed(session, _PENDING_KEY):
+        revocation_list.add(pending)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    pending_changes.discard(session, _PENDING_KEY, previous_transaction)
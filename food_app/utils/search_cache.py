@@ -0,0 +1,223 @@
+import re
+import threading
+from collections import defaultdict
+
+from cachetools import TTLCache
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from config import Config
+from food_app.models.food import Food
+from food_app.models.restaurant import Restaurant
+from food_app.utils import pending_changes
+from food_app.utils.distance import CoordinateArray
+from food_app.utils.relevance import relevance_score
+from food_app.utils.search_index import fold_text, search_index, tokenize
+
+_SPACES_RE = re.compile(r'\s+')
+
+# Thuộc tính nhà hàng quyết định nó có khớp từ khoá nào hay không: đổi thì xoá toàn bộ cache
+_MEMBERSHIP_ATTRIBUTES = ('name', 'is_active')
+
+# Khoá session.info chứa các lần xoá cache chờ commit: [(restaurant_id | None nếu xoá toàn bộ, món đổi | None)]
+_PENDING_KEY = 'search_cache_pending'
+
+
+class SearchCandidates:
+    """
+    Tập nhà hàng thỏa một truy vấn tìm kiếm, dùng chung cho mọi vị trí người gọi.
+    Tọa độ được giữ trong CoordinateArray để xếp hạng chính xác theo từng người gọi,
+    dữ liệu hiển thị của nhà hàng được nạp dần theo các trang đã xem.
+    Mọi thứ trừ records được tính đủ trước khi vào cache; records chỉ đổi qua page_records (có khoá).
+    """
+
+    def __init__(self, rows, food_conditions, text_match=None, text_scores=None):
+        self.ids = [row.id for row in rows]
+        self.coordinates = CoordinateArray.from_points([(row.id, row.latitude, row.longitude) for row in rows])
+        # Nhà hàng thiếu tọa độ luôn đứng sau khi sắp xếp tăng dần (như khoảng cách vô cùng)
+        self.missing_ids = [row.id for row in rows if row.latitude is None or row.longitude is None]
+        # Điều kiện lọc món và kết quả khớp từ khoá của truy vấn: cache hit không phải tra index lại
+        self.food_conditions = food_conditions
+        self.text_match = text_match
+        # Điểm liên quan theo từ khoá {restaurant_id: [0, 1]}
+        self.text_scores = text_scores or {}
+        self.records = {}
+        self._records_lock = threading.Lock()
+
+    def page_records(self, restaurant_ids, loader):
+        """
+        Dữ liệu hiển thị của các nhà hàng trong restaurant_ids; nhà hàng chưa có được nạp
+        bằng loader(missing_ids) -> {restaurant_id: record} (chạy ngoài khoá) rồi giữ lại cho lần sau
+        """
+        with self._records_lock:
+            missing_ids = [restaurant_id for restaurant_id in restaurant_ids if restaurant_id not in self.records]
+        if missing_ids:
+            loaded = loader(missing_ids)
+            with self._records_lock:
+                for restaurant_id, record in loaded.items():
+                    self.records.setdefault(restaurant_id, record)
+        with self._records_lock:
+            return [self.records[restaurant_id] for restaurant_id in restaurant_ids]
+
+    def rank(self, lat, lon, descending=False):
+        """Trả về danh sách (restaurant_id, distance_km) theo khoảng cách tới (lat, lon)"""
+        ids, distances = self.coordinates.rank(lat, lon, method='haversine')
+        ranked = [(int(rid), float(distance)) for rid, distance in zip(ids, distances)]
+        ranked.extend((rid, None) for rid in self.missing_ids)
+        if descending:
+            ranked.reverse()
+        return ranked
+
+    def rank_by_relevance(self, near, popularity, default_popularity):
+        """Trả về danh sách (restaurant_id, distance_km) theo điểm relevance giảm dần"""
+        distances = {}
+        if near:
+            located = self.coordinates.distances(near[0], near[1], method='haversine')
+            distances = {int(rid): float(distance) for rid, distance in zip(self.coordinates.ids, located)}
+        text_scores = self.text_scores
+
+        scored = []
+        for restaurant_id in self.ids:
+            distance = distances.get(restaurant_id)
+            score = relevance_score(
+                text_scores.get(restaurant_id, 0.0),
+                distance,
+                popularity.get(restaurant_id, default_popularity)
+            )
+            scored.append((-score, restaurant_id, distance))
+        scored.sort()
+        return [(restaurant_id, distance) for _, restaurant_id, distance in scored]
+
+
+class SearchResultCache:
+    """
+    Cache kết quả tìm kiếm (LRU giới hạn số entry + TTL), khoá theo từ khoá đã chuẩn hoá,
+    khoảng giá, cách sắp xếp và trang.
+    Entry bị xoá sau commit khi nhà hàng nó chứa thay đổi, hoặc khi món ăn có thể khớp từ khoá của nó thay đổi;
+    thay đổi từ worker khác được nhận sau tối đa TTL.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self._cache = TTLCache(maxsize or Config.SEARCH_CACHE_MAX_ENTRIES, ttl or Config.SEARCH_CACHE_TTL_SECONDS)
+        self._lock = threading.Lock()
+        self._query_tokens = {}
+        self._keys_by_restaurant = defaultdict(set)
+
+    @staticmethod
+    def normalize_query(q):
+        return _SPACES_RE.sub(' ', fold_text(q)).strip()
+
+    def make_key(self, q, min_price, max_price, sort_by, sort_order, page=None, per_page=None):
+        return (self.normalize_query(q), min_price, max_price, sort_by, sort_order, page, per_page)
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value, restaurant_ids=()):
+        with self._lock:
+            self._cache[key] = value
+            self._query_tokens[key] = tokenize(key[0])
+            for restaurant_id in restaurant_ids:
+                self._keys_by_restaurant[restaurant_id].add(key)
+            self._prune_reverse_index()
+
+    def _prune_reverse_index(self):
+        # Entry hết hạn hoặc bị LRU loại không tự xoá khỏi chỉ mục ngược, dọn định kỳ
+        if len(self._query_tokens) <= 2 * self._cache.maxsize:
+            return
+        self._cache.expire()
+        self._query_tokens = {key: tokens for key, tokens in self._query_tokens.items() if key in self._cache}
+        for restaurant_id in list(self._keys_by_restaurant):
+            keys = {key for key in self._keys_by_restaurant[restaurant_id] if key in self._cache}
+            if keys:
+                self._keys_by_restaurant[restaurant_id] = keys
+            else:
+                del self._keys_by_restaurant[restaurant_id]
+
+    def _drop(self, keys):
+        for key in keys:
+            self._cache.pop(key, None)
+            self._query_tokens.pop(key, None)
+
+    def invalidate_restaurant(self, restaurant_id, text=None):
+        """
+        Xoá các entry chứa nhà hàng. Nếu có `text` (nội dung món/nhà hàng vừa đổi) thì xoá thêm
+        các entry mà từ khoá có thể khớp với nội dung đó (kể cả entry không có từ khoá).
+        """
+        with self._lock:
+            keys = set(self._keys_by_restaurant.pop(restaurant_id, ()))
+            if text is not None:
+                text_tokens = tokenize(text)
+                for key, query_tokens in self._query_tokens.items():
+                    if all(any(token.startswith(q_token) for token in text_tokens) for q_token in query_tokens):
+                        keys.add(key)
+            self._drop(keys)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._query_tokens.clear()
+            self._keys_by_restaurant.clear()
+
+
+search_cache = SearchResultCache()
+
+
+def _record(target, restaurant_id, food=None):
+    # Xoá cache sau commit (cùng lúc search_index nhận thay đổi), không phải lúc flush:
+    # search chạy giữa flush và commit sẽ nạp lại cache từ index cũ
+    session = object_session(target)
+    if session is not None:
+        pending_changes.current(session, _PENDING_KEY, list).append((restaurant_id, food))
+
+
+def _apply_pending(pending):
+    """Áp các lần xoá cache đã commit"""
+    if any(restaurant_id is None for restaurant_id, _ in pending):
+        search_cache.clear()
+        return
+    for restaurant_id, food in pending:
+        if food is None:
+            search_cache.invalidate_restaurant(restaurant_id)
+        else:
+            name, description = food
+            text = ' '.join([name or '', description or '', *search_index.restaurant_tokens(restaurant_id)])
+            search_cache.invalidate_restaurant(restaurant_id, text)
+
+
+@event.listens_for(Restaurant, 'after_insert')
+@event.listens_for(Restaurant, 'after_delete')
+def _restaurant_added_or_deleted(mapper, connection, target):
+    # Nhà hàng mới chưa có món (món thêm sau sẽ xoá theo từ khoá); nhà hàng bị xoá chỉ nằm trong entry của nó
+    _record(target, target.id)
+
+
+@event.listens_for(Restaurant, 'after_update')
+def _restaurant_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _MEMBERSHIP_ATTRIBUTES):
+        # Bật/tắt hay đổi tên ảnh hưởng mọi từ khoá khớp với món của nó: xoá toàn bộ
+        _record(target, None)
+    else:
+        # Địa chỉ, ảnh, giờ mở cửa...: chỉ dữ liệu hiển thị trong các entry chứa nhà hàng thay đổi
+        _record(target, target.id)
+
+
+@event.listens_for(Food, 'after_insert')
+@event.listens_for(Food, 'after_update')
+@event.listens_for(Food, 'after_delete')
+def _food_changed(mapper, connection, target):
+    _record(target, target.restaurant_id, (target.name, target.description))
+
+
+# Đăng ký sau listener của search_index (module được import trước): index đã nhận thay đổi khi cache bị xoá
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    for pending in pending_changes.committed(session, _PENDING_KEY):
+        _apply_pending(pending)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    pending_changes.discard(session, _PENDING_KEY, previous_transaction)
@@ -0,0 +1,304 @@
+import bisect
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from config import Config
+from food_app.models.food import Food
+from food_app.models.restaurant import Restaurant
+from food_app.utils import pending_changes
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Tham số BM25 chuẩn; token chỉ khớp tiền tố (đang gõ dở) được tính nhẹ hơn khớp nguyên từ
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_MATCH_WEIGHT = 0.7
+
+# Khoá session.info chứa thay đổi chờ commit: {(loại, id): nội dung cần index, None nếu đã xoá}
+_PENDING_KEY = 'search_index_pending'
+
+
+def fold_text(text):
+    """
+    Chuẩn hoá chuỗi để so khớp: chữ thường, bỏ dấu tiếng Việt ("Bún bò" -> "bun bo")
+    """
+    if not text:
+        return ''
+    text = text.lower().replace('đ', 'd')
+    text = unicodedata.normalize('NFD', text)
+    return ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+
+
+def tokenize(text):
+    """Tách chuỗi đã bỏ dấu thành danh sách token chữ/số"""
+    return _TOKEN_RE.findall(fold_text(text))
+
+
+class InvertedIndex:
+    """
+    Inverted index token -> tập doc_id, hỗ trợ so khớp theo tiền tố.
+    Danh sách token được giữ đã sắp xếp để mở rộng tiền tố bằng bisect.
+    Giữ sẵn tần suất token và độ dài document để chấm điểm BM25.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(set)
+        self._doc_tokens = {}
+        self._sorted_tokens = []
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._doc_tokens)
+
+    def add(self, doc_id, text):
+        """Thêm hoặc thay thế nội dung của một document"""
+        self.remove(doc_id)
+        tokens = Counter(tokenize(text))
+        if not tokens:
+            return
+        self._doc_tokens[doc_id] = tokens
+        self._total_length += sum(tokens.values())
+        for token in tokens:
+            postings = self._postings[token]
+            if not postings:
+                bisect.insort(self._sorted_tokens, token)
+            postings.add(doc_id)
+
+    def remove(self, doc_id):
+        tokens = self._doc_tokens.pop(doc_id, None)
+        if not tokens:
+            return
+        self._total_length -= sum(tokens.values())
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[token]
+                idx = bisect.bisect_left(self._sorted_tokens, token)
+                if idx < len(self._sorted_tokens) and self._sorted_tokens[idx] == token:
+                    del self._sorted_tokens[idx]
+
+    def doc_tokens(self, doc_id):
+        """Các token (kèm số lần xuất hiện) của một document, rỗng nếu chưa index"""
+        return self._doc_tokens.get(doc_id, {})
+
+    def expand_prefix(self, prefix):
+        """Trả về các token trong index bắt đầu bằng prefix"""
+        start = bisect.bisect_left(self._sorted_tokens, prefix)
+        end = bisect.bisect_left(self._sorted_tokens, prefix + '\uffff')
+        return self._sorted_tokens[start:end]
+
+    def match(self, tokens, prefix=True):
+        """
+        Trả về tập doc_id chứa tất cả token truy vấn.
+        Mỗi token được so khớp theo tiền tố nếu prefix=True.
+        """
+        result = None
+        for token in tokens:
+            if prefix:
+                docs = set()
+                for candidate in self.expand_prefix(token):
+                    docs |= self._postings[candidate]
+            else:
+                docs = set(self._postings.get(token, ()))
+            result = docs if result is None else result & docs
+            if not result:
+                return set()
+        return result or set()
+
+    def bm25(self, tokens, doc_ids):
+        """
+        Điểm BM25 của từng doc trong doc_ids với các token truy vấn.
+        Mỗi token truy vấn lấy điểm cao nhất trong các token của doc khớp với nó (nguyên từ hoặc tiền tố).
+        """
+        total_docs = len(self._doc_tokens)
+        if not total_docs:
+            return {}
+        average_length = self._total_length / total_docs
+
+        idf = {}
+        scores = {}
+        for doc_id in doc_ids:
+            counts = self._doc_tokens.get(doc_id)
+            if not counts:
+                continue
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(counts.values()) / average_length)
+            score = 0.0
+            for query_token in tokens:
+                best = 0.0
+                for token, frequency in counts.items():
+                    if not token.startswith(query_token):
+                        continue
+                    if token not in idf:
+                        df = len(self._postings[token])
+                        idf[token] = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                    term = idf[token] * frequency * (BM25_K1 + 1) / (frequency + norm)
+                    if token != query_token:
+                        term *= PREFIX_MATCH_WEIGHT
+                    best = max(best, term)
+                score += best
+            scores[doc_id] = score
+        return scores
+
+
+class SearchIndex:
+    """
+    Index tìm kiếm trong bộ nhớ cho món ăn (tên + mô tả) và nhà hàng (tên).
+    Được dựng lười ở lần tìm kiếm đầu tiên, cập nhật sau mỗi commit qua sự kiện SQLAlchemy
+    và đồng bộ định kỳ theo updated_at để nhận thay đổi từ các worker khác.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.foods = InvertedIndex()
+        self.restaurants = InvertedIndex()
+        self._ready = False
+        self._synced_at = None
+        self._watermark = None
+
+    def reset(self):
+        with self._lock:
+            self.foods = InvertedIndex()
+            self.restaurants = InvertedIndex()
+            self._ready = False
+            self._synced_at = None
+            self._watermark = None
+
+    def ensure_ready(self):
+        """Dựng index nếu chưa có, hoặc đồng bộ thay đổi mới nếu đã quá hạn"""
+        with self._lock:
+            if not self._ready:
+                self._load()
+                self._ready = True
+            elif time.monotonic() - self._synced_at >= Config.SEARCH_INDEX_REFRESH_SECONDS:
+                self._load(since=self._watermark)
+
+    def _load(self, since=None):
+        food_query = Food.query.with_entities(Food.id, Food.name, Food.description, Food.updated_at)
+        restaurant_query = Restaurant.query.with_entities(Restaurant.id, Restaurant.name, Restaurant.updated_at)
+        if since is not None:
+            food_query = food_query.filter(Food.updated_at >= since)
+            restaurant_query = restaurant_query.filter(Restaurant.updated_at >= since)
+
+        watermark = since
+        for food_id, name, description, updated_at in food_query:
+            self.index_food(food_id, name, description)
+            if updated_at and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+        for restaurant_id, name, updated_at in restaurant_query:
+            self.index_restaurant(restaurant_id, name)
+            if updated_at and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+
+        self._watermark = watermark
+        self._synced_at = time.monotonic()
+
+    def index_food(self, food_id, name, description):
+        with self._lock:
+            self.foods.add(food_id, f'{name or ""} {description or ""}')
+
+    def index_restaurant(self, restaurant_id, name):
+        with self._lock:
+            self.restaurants.add(restaurant_id, name)
+
+    def remove_food(self, food_id):
+        with self._lock:
+            self.foods.remove(food_id)
+
+    def remove_restaurant(self, restaurant_id):
+        with self._lock:
+            self.restaurants.remove(restaurant_id)
+
+    def lookup(self, q):
+        """
+        Tìm các món ăn và nhà hàng khớp với từ khoá.
+        Trả về (food_ids, restaurant_ids) hoặc None nếu từ khoá không có token hợp lệ.
+        """
+        tokens = tokenize(q)
+        if not tokens:
+            return None
+        self.ensure_ready()
+        with self._lock:
+            return self.foods.match(tokens), self.restaurants.match(tokens)
+
+    def restaurant_tokens(self, restaurant_id):
+        """Token trong tên nhà hàng đã index (rỗng nếu index chưa dựng hoặc chưa có nhà hàng)"""
+        with self._lock:
+            if not self._ready:
+                return ()
+            return tuple(self.restaurants.doc_tokens(restaurant_id))
+
+    def bm25(self, q, food_ids, restaurant_ids):
+        """Điểm BM25 ({food_id: score}, {restaurant_id: score}) của các kết quả khớp từ khoá"""
+        tokens = tokenize(q)
+        self.ensure_ready()
+        with self._lock:
+            return self.foods.bm25(tokens, food_ids), self.restaurants.bm25(tokens, restaurant_ids)
+
+    def apply(self, changes):
+        """Áp các thay đổi đã commit {(loại, id): nội dung | None}; index chưa dựng thì bỏ qua (lần nạp đầu sẽ đọc)"""
+        with self._lock:
+            if not self._ready:
+                return
+            for (kind, doc_id), content in changes.items():
+                if kind == 'food':
+                    if content is None:
+                        self.foods.remove(doc_id)
+                    else:
+                        self.foods.add(doc_id, f'{content[0] or ""} {content[1] or ""}')
+                elif content is None:
+                    self.restaurants.remove(doc_id)
+                else:
+                    self.restaurants.add(doc_id, content)
+
+
+search_index = SearchIndex()
+
+
+def _record(target, key, content):
+    # Flush chưa phải commit: chỉ ghi nhận, transaction rollback thì index không đổi
+    session = object_session(target)
+    if session is not None:
+        pending_changes.current(session, _PENDING_KEY, dict)[key] = content
+
+
+@event.listens_for(Food, 'after_insert')
+@event.listens_for(Food, 'after_update')
+def _food_saved(mapper, connection, target):
+    _record(target, ('food', target.id), (target.name, target.description))
+
+
+@event.listens_for(Food, 'after_delete')
+def _food_deleted(mapper, connection, target):
+    _record(target, ('food', target.id), None)
+
+
+@event.listens_for(Restaurant, 'after_insert')
+@event.listens_for(Restaurant, 'after_update')
+def _restaurant_saved(mapper, connection, target):
+    _record(target, ('restaurant', target.id), target.name)
+
+
+@event.listens_for(Restaurant, 'after_delete')
+def _restaurant_deleted(mapper, connection, target):
+    _record(target, ('restaurant', target.id), None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    for pending in pending_changes.committed(session, _PENDING_KEY):
+        search_index.apply(pending)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    pending_changes.discard(session, _PENDING_KEY, previous_transaction)
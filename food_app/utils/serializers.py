@@ -0,0 +1,57 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+from sqlalchemy import Date, DateTime
+
+# Cột luôn được chọn kèm (nếu model có) để phân trang cursor và ghép kết quả theo id
+_ROW_KEYS = ('id', 'created_at')
+
+
+def _format_column(values, formatter):
+    """Định dạng cả một cột thời gian trong một vòng lặp"""
+    return [formatter(value) if value is not None else None for value in values]
+
+
+class RowSerializer:
+    """
+    Serializer biên dịch sẵn cho một model và một tập cột:
+    truy vấn chỉ lấy các cột (Row tuple, không qua identity map của ORM),
+    sau đó dựng dict theo từng cột, các cột thời gian được isoformat cả cột một lượt.
+    """
+
+    def __init__(self, model, keys):
+        self.model = model
+        self.keys = tuple(keys)
+        extra = [key for key in _ROW_KEYS if key not in self.keys and hasattr(model, key)]
+        self.columns = tuple(getattr(model, key) for key in self.keys + tuple(extra))
+
+        # (vị trí cột, hàm định dạng) cho các cột Date/DateTime
+        self._temporal = []
+        for index, column in enumerate(self.columns[:len(self.keys)]):
+            column_type = column.property.columns[0].type
+            if isinstance(column_type, DateTime):
+                self._temporal.append((index, datetime.isoformat))
+            elif isinstance(column_type, Date):
+                self._temporal.append((index, date.isoformat))
+
+    def query(self, query):
+        """Chuyển một ORM query của model sang query chỉ lấy các cột cần serialize"""
+        return query.with_entities(*self.columns)
+
+    def serialize(self, rows):
+        """Danh sách Row -> danh sách dict, giữ nguyên thứ tự"""
+        if not rows:
+            return []
+        keys = self.keys
+        if not keys:
+            return [{} for _ in rows]
+        columns = list(zip(*rows))[:len(keys)]
+        for index, formatter in self._temporal:
+            columns[index] = _format_column(columns[index], formatter)
+        return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+@lru_cache(maxsize=256)
+def compile_serializer(model, keys):
+    """RowSerializer dùng lại theo (model, tuple cột)"""
+    return RowSerializer(model, keys)
@@ -0,0 +1,52 @@
+def wants_normalized(args):
+    """Client yêu cầu dạng chuẩn hoá (?format=normalized)"""
+    return args.get('format') == 'normalized'
+
+
+def sideload_foods(foods, distance_by_food=None):
+    """
+    Chuẩn hoá danh sách Food: mỗi món chỉ giữ id nhà hàng/danh mục/topping,
+    các đối tượng đi kèm được gửi một lần trong map theo id.
+    Trả về (items, included) với included = {restaurants, categories, toppings}.
+    """
+    distance_by_food = distance_by_food or {}
+    restaurants = {}
+    categories = {}
+    toppings = {}
+    items = []
+    for food in foods:
+        data = food.to_ref_dict()
+        distance_km = distance_by_food.get(food.id)
+        data['distance_km'] = distance_km
+
+        restaurant = food.restaurant
+        if restaurant is not None and restaurant.id not in restaurants:
+            restaurants[restaurant.id] = restaurant.to_summary_dict()
+            if distance_km is not None:
+                restaurants[restaurant.id]['distance_km'] = distance_km
+        for category in food.categories:
+            if category.id not in categories:
+                categories[category.id] = {'id': category.id, 'name': category.name}
+        for topping in food.toppings:
+            if topping.id not in toppings:
+                toppings[topping.id] = topping.to_dict_basic()
+        items.append(data)
+
+    return items, {'restaurants': restaurants, 'categories': categories, 'toppings': toppings}
+
+
+def sideload_search_results(results):
+    """
+    Chuẩn hoá kết quả tìm kiếm: mỗi nhà hàng giữ `food_ids` thay cho `searched_foods`,
+    các món được gửi một lần trong map `foods` (kèm restaurant_id).
+    """
+    foods = {}
+    items = []
+    for record in results:
+        data = {key: value for key, value in record.items() if key != 'searched_foods'}
+        data['food_ids'] = []
+        for food in record.get('searched_foods', []):
+            data['food_ids'].append(food['id'])
+            foods.setdefault(food['id'], dict(food, restaurant_id=record['id']))
+        items.append(data)
+    return items, {'foods': foods}
@@ -0,0 +1,337 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+
+from config import Config
+from food_app import db
+from food_app.models.category import Category
+from food_app.models.food import Food
+from food_app.models.food_categories import food_categories
+from food_app.models.order_item import OrderItem
+from food_app.models.restaurant import Restaurant
+from food_app.utils import pending_changes
+from food_app.utils.search_index import tokenize
+
+# Ký tự lớn hơn mọi ký tự của chuỗi đã bỏ dấu, dùng làm cận trên khi bisect theo tiền tố
+_PREFIX_END = '\uffff'
+
+# Số tiền tố được ghi nhớ kết quả giữa hai lần index thay đổi
+_MEMO_MAX_ENTRIES = 4096
+
+# Tiền tố ngắn (khớp gần hết index) được giữ sẵn danh sách gợi ý tốt nhất thay vì sắp xếp lại mỗi lần gọi
+_TOP_PREFIX_LENGTH = 3
+
+# Khoá session.info chứa thay đổi chờ commit: {(loại, id): (tên, extra), None nếu bỏ khỏi gợi ý}
+_PENDING_KEY = 'suggest_index_pending'
+
+
+class SuggestIndex:
+    """
+    Mảng khoá đã sắp xếp (tên đã bỏ dấu, bắt đầu từ mỗi từ) cho gợi ý khi gõ.
+    Tìm tiền tố bằng bisect, chọn các gợi ý có trọng số (độ phổ biến) cao nhất.
+    Tiền tố tới _TOP_PREFIX_LENGTH ký tự có sẵn top SUGGEST_MAX_LIMIT gợi ý, chỉ tính lại
+    khi một thay đổi có thể làm đổi danh sách đó.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._entries = {}
+        self._weights = {}
+        self._phrases_of = {}
+        self._labels = {}
+        self._memo = {}
+        self._top = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _phrases(name):
+        # "Bún bò Huế" -> "bun bo hue", "bo hue", "hue" để gõ từ giữa tên vẫn khớp
+        tokens = tokenize(name)
+        return {' '.join(tokens[i:]) for i in range(len(tokens))}
+
+    @classmethod
+    def build(cls, items):
+        """Dựng index từ các (kind, item_id, name, weight, extra), sắp xếp mảng khoá một lần"""
+        index = cls()
+        for kind, item_id, name, weight, extra in items:
+            ref = (kind, item_id)
+            index._keys.extend((phrase, ref) for phrase in index._register(ref, name, weight, extra))
+        index._keys.sort()
+
+        # Top của mọi tiền tố ngắn trong một lượt duyệt theo thứ hạng
+        labels_by_prefix = defaultdict(set)
+        for ref in sorted(index._entries, key=index._rank_key):
+            label = index._labels[ref]
+            for prefix in index._short_prefixes(index._phrases_of[ref]):
+                top = index._top.setdefault(prefix, [])
+                if len(top) < Config.SUGGEST_MAX_LIMIT and label not in labels_by_prefix[prefix]:
+                    labels_by_prefix[prefix].add(label)
+                    top.append(ref)
+        return index
+
+    def _register(self, ref, name, weight, extra):
+        phrases = self._phrases(name)
+        if not phrases:
+            return phrases
+        self._entries[ref] = dict(extra, type=ref[0], id=ref[1], name=name)
+        self._weights[ref] = weight
+        self._phrases_of[ref] = phrases
+        self._labels[ref] = (ref[0], max(phrases, key=len))
+        return phrases
+
+    def _rank_key(self, ref):
+        return -self._weights[ref], len(self._entries[ref]['name']), ref
+
+    @staticmethod
+    def _short_prefixes(phrases):
+        return {phrase[:length] for phrase in phrases for length in range(1, _TOP_PREFIX_LENGTH + 1)}
+
+    def _touch_top(self, ref, phrases):
+        """Bỏ top đã tính của các tiền tố ngắn mà ref có thể đã/sẽ nằm trong (tính lại khi cần)"""
+        rank = self._rank_key(ref)
+        for prefix in self._short_prefixes(phrases):
+            top = self._top.get(prefix)
+            if top is None:
+                continue
+            if ref in top or len(top) < Config.SUGGEST_MAX_LIMIT or rank < self._rank_key(top[-1]):
+                del self._top[prefix]
+
+    def add(self, kind, item_id, name, weight=0, **extra):
+        """Thêm hoặc thay thế một gợi ý; giữ nguyên trọng số cũ nếu weight là None"""
+        ref = (kind, item_id)
+        if weight is None:
+            weight = self._weights.get(ref, 0)
+        self.remove(kind, item_id)
+        phrases = self._register(ref, name, weight, extra)
+        for phrase in phrases:
+            bisect.insort(self._keys, (phrase, ref))
+        if phrases:
+            self._touch_top(ref, phrases)
+        self._memo.clear()
+
+    def remove(self, kind, item_id):
+        ref = (kind, item_id)
+        if ref not in self._entries:
+            return
+        phrases = self._phrases_of[ref]
+        self._touch_top(ref, phrases)
+        del self._entries[ref]
+        del self._weights[ref]
+        del self._phrases_of[ref]
+        self._labels.pop(ref, None)
+        for phrase in phrases:
+            position = bisect.bisect_left(self._keys, (phrase, ref))
+            if position < len(self._keys) and self._keys[position] == (phrase, ref):
+                del self._keys[position]
+        self._memo.clear()
+
+    def _ranked(self, prefix, limit):
+        """Tối đa `limit` ref khớp tiền tố theo thứ hạng, mỗi tên một ref (quét cả khoảng tiền tố)"""
+        start = bisect.bisect_left(self._keys, (prefix,))
+        end = bisect.bisect_left(self._keys, (prefix + _PREFIX_END,))
+        refs = {ref for _, ref in self._keys[start:end]}
+        # Nhiều nhà hàng bán cùng một món: chỉ giữ gợi ý phổ biến nhất cho mỗi tên
+        result = []
+        seen = set()
+        for ref in sorted(refs, key=self._rank_key):
+            label = self._labels[ref]
+            if label in seen:
+                continue
+            seen.add(label)
+            result.append(ref)
+            if len(result) >= limit:
+                break
+        return result
+
+    def suggest(self, prefix, limit):
+        """Tối đa `limit` gợi ý có tên khớp tiền tố, sắp theo trọng số giảm dần"""
+        prefix = ' '.join(tokenize(prefix))
+        if not prefix:
+            return []
+        if len(prefix) <= _TOP_PREFIX_LENGTH and limit <= Config.SUGGEST_MAX_LIMIT:
+            top = self._top.get(prefix)
+            if top is None:
+                top = self._top[prefix] = self._ranked(prefix, Config.SUGGEST_MAX_LIMIT)
+            return [self._entries[ref] for ref in top[:limit]]
+
+        memo_key = (prefix, limit)
+        cached = self._memo.get(memo_key)
+        if cached is not None:
+            return cached
+        result = [self._entries[ref] for ref in self._ranked(prefix, limit)]
+        if len(self._memo) >= _MEMO_MAX_ENTRIES:
+            self._memo.clear()
+        self._memo[memo_key] = result
+        return result
+
+    def apply(self, changes):
+        """Áp lần lượt [((loại, id), (tên, extra) | None)]; trọng số của gợi ý đã có được giữ nguyên"""
+        for (kind, item_id), change in changes:
+            if change is None:
+                self.remove(kind, item_id)
+            else:
+                name, extra = change
+                self.add(kind, item_id, name, None, **extra)
+
+
+class PopularitySuggestIndex:
+    """
+    Bọc SuggestIndex với khóa và dữ liệu từ DB: món ăn, nhà hàng, danh mục,
+    trọng số là tổng số lượng đã đặt (OrderItem.quantity).
+    Tên được cập nhật sau mỗi commit qua sự kiện SQLAlchemy. Mỗi SUGGEST_INDEX_REFRESH_SECONDS
+    một thread nền dựng index mới (trọng số mới, nhận cả thay đổi từ worker khác) ngoài khoá
+    rồi tráo vào; request vẫn dùng index cũ trong lúc dựng.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.index = SuggestIndex()
+        self._ready = False
+        self._loaded_at = None
+        # Thay đổi nhận được trong lúc thread nền đang dựng index mới, áp lại trước khi tráo; None: không dựng
+        self._journal = None
+
+    def reset(self):
+        with self._lock:
+            self.index = SuggestIndex()
+            self._ready = False
+            self._loaded_at = None
+            self._journal = None
+
+    def ensure_ready(self):
+        with self._lock:
+            if not self._ready:
+                self.index = self._build()
+                self._loaded_at = time.monotonic()
+                self._ready = True
+                return
+            if self._journal is not None or time.monotonic() - self._loaded_at < Config.SUGGEST_INDEX_REFRESH_SECONDS:
+                return
+            self._journal = []
+        threading.Thread(
+            target=self._refresh, args=(current_app._get_current_object(),), name='suggest-index-refresh', daemon=True
+        ).start()
+
+    def _refresh(self, app):
+        index = None
+        try:
+            with app.app_context():
+                index = self._build()
+        except Exception as e:
+            app.logger.warning('SuggestIndex: dựng lại index thất bại: %s', e)
+        with self._lock:
+            journal, self._journal = self._journal, None
+            self._loaded_at = time.monotonic()
+            if index is None or journal is None:
+                return
+            index.apply(journal)
+            self.index = index
+
+    @staticmethod
+    def _build():
+        sold = db.session.query(
+            OrderItem.food_id.label('food_id'),
+            func.sum(OrderItem.quantity).label('sold')
+        ).group_by(OrderItem.food_id).subquery()
+        sold_count = func.coalesce(sold.c.sold, 0)
+
+        items = []
+        food_rows = db.session.query(Food.id, Food.name, Food.restaurant_id, sold_count)\
+            .join(Restaurant, Restaurant.id == Food.restaurant_id)\
+            .outerjoin(sold, sold.c.food_id == Food.id)\
+            .filter(Food.available.is_(True), Restaurant.is_active.is_(True))
+        for food_id, name, restaurant_id, weight in food_rows:
+            items.append(('food', food_id, name, int(weight), {'restaurant_id': restaurant_id}))
+
+        restaurant_rows = db.session.query(Restaurant.id, Restaurant.name, func.coalesce(func.sum(sold.c.sold), 0))\
+            .outerjoin(Food, Food.restaurant_id == Restaurant.id)\
+            .outerjoin(sold, sold.c.food_id == Food.id)\
+            .filter(Restaurant.is_active.is_(True))\
+            .group_by(Restaurant.id, Restaurant.name)
+        for restaurant_id, name, weight in restaurant_rows:
+            items.append(('restaurant', restaurant_id, name, int(weight), {}))
+
+        category_rows = db.session.query(Category.id, Category.name, func.coalesce(func.sum(sold.c.sold), 0))\
+            .outerjoin(food_categories, food_categories.c.category_id == Category.id)\
+            .outerjoin(sold, sold.c.food_id == food_categories.c.food_id)\
+            .group_by(Category.id, Category.name)
+        for category_id, name, weight in category_rows:
+            items.append(('category', category_id, name, int(weight), {}))
+
+        return SuggestIndex.build(items)
+
+    def apply(self, changes):
+        """Áp các thay đổi đã commit [((loại, id), (tên, extra) | None)]; index chưa dựng thì bỏ qua"""
+        with self._lock:
+            if not self._ready:
+                return
+            self.index.apply(changes)
+            if self._journal is not None:
+                self._journal.extend(changes)
+
+    def suggest(self, prefix, limit=None):
+        self.ensure_ready()
+        with self._lock:
+            return self.index.suggest(prefix, limit or Config.SUGGEST_LIMIT)
+
+
+suggest_index = PopularitySuggestIndex()
+
+
+def _record(target, ref, change):
+    # Flush chưa phải commit: chỉ ghi nhận, transaction rollback thì index không đổi
+    session = object_session(target)
+    if session is not None:
+        pending_changes.current(session, _PENDING_KEY, dict)[ref] = change
+
+
+@event.listens_for(Food, 'after_insert')
+@event.listens_for(Food, 'after_update')
+def _food_saved(mapper, connection, target):
+    change = (target.name, {'restaurant_id': target.restaurant_id}) if target.available else None
+    _record(target, ('food', target.id), change)
+
+
+@event.listens_for(Food, 'after_delete')
+def _food_deleted(mapper, connection, target):
+    _record(target, ('food', target.id), None)
+
+
+@event.listens_for(Restaurant, 'after_insert')
+@event.listens_for(Restaurant, 'after_update')
+def _restaurant_saved(mapper, connection, target):
+    _record(target, ('restaurant', target.id), (target.name, {}) if target.is_active else None)
+
+
+@event.listens_for(Restaurant, 'after_delete')
+def _restaurant_deleted(mapper, connection, target):
+    _record(target, ('restaurant', target.id), None)
+
+
+@event.listens_for(Category, 'after_insert')
+@event.listens_for(Category, 'after_update')
+def _category_saved(mapper, connection, target):
+    _record(target, ('category', target.id), (target.name, {}))
+
+
+@event.listens_for(Category, 'after_delete')
+def _category_deleted(mapper, connection, target):
+    _record(target, ('category', target.id), None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    for pending in pending_changes.committed(session, _PENDING_KEY):
+        suggest_index.apply(list(pending.items()))
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    pending_changes.discard(session, _PENDING_KEY, previous_transaction)
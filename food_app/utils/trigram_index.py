@@ -0,0 +1,311 @@
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+from sqlalchemy import event, func, literal, select, text
+from sqlalchemy.orm import Session, object_session
+
+from config import Config
+from food_app import db
+from food_app.models.food import Food
+from food_app.models.restaurant import Restaurant
+from food_app.utils import pending_changes
+from food_app.utils.search_index import fold_text, tokenize
+
+# Khoá session.info chứa thay đổi chờ commit: {(loại, id): tên, None nếu đã xoá}
+_PENDING_KEY = 'trigram_index_pending'
+
+
+def word_trigrams(word):
+    """Trigram của một từ, đệm như pg_trgm: hai khoảng trắng phía trước, một phía sau"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigrams(text):
+    """Tập trigram của chuỗi đã bỏ dấu"""
+    result = set()
+    for word in tokenize(text):
+        result |= word_trigrams(word)
+    return result
+
+
+def similarity(a, b):
+    """Độ tương đồng Jaccard giữa hai tập trigram (giống similarity() của pg_trgm)"""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class TrigramIndex:
+    """
+    Inverted index trigram -> tập doc_id cho so khớp gần đúng (chịu lỗi chính tả).
+    Điểm của một document là độ tương đồng cao nhất giữa từ khoá và một đoạn
+    liên tiếp cùng số từ trong tên (tương tự word_similarity của pg_trgm).
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(set)
+        self._doc_words = {}
+
+    def __len__(self):
+        return len(self._doc_words)
+
+    def add(self, doc_id, text):
+        self.remove(doc_id)
+        words = [word_trigrams(word) for word in tokenize(text)]
+        if not words:
+            return
+        self._doc_words[doc_id] = words
+        for gram in set().union(*words):
+            self._postings[gram].add(doc_id)
+
+    def remove(self, doc_id):
+        words = self._doc_words.pop(doc_id, None)
+        if words is None:
+            return
+        for gram in set().union(*words):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(doc_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def _score(self, query_grams, query_length, doc_id):
+        words = self._doc_words[doc_id]
+        window = max(1, min(query_length, len(words)))
+        best = 0.0
+        for start in range(len(words) - window + 1):
+            best = max(best, similarity(query_grams, set().union(*words[start:start + window])))
+        return best
+
+    def search(self, q, threshold, limit=None):
+        """Trả về [(doc_id, score)] có score >= threshold, sắp theo score giảm dần"""
+        query_length = len(tokenize(q))
+        query_grams = trigrams(q)
+        if not query_grams:
+            return []
+
+        # Jaccard >= threshold cần ít nhất threshold * |Q| trigram chung: loại sớm phần lớn ứng viên
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._postings.get(gram, ()))
+        min_shared = math.ceil(threshold * len(query_grams))
+
+        scored = []
+        for doc_id, count in shared.items():
+            if count < min_shared:
+                continue
+            score = self._score(query_grams, query_length, doc_id)
+            if score >= threshold:
+                scored.append((doc_id, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit] if limit else scored
+
+
+class MemoryTrigramBackend:
+    """
+    Index trigram trong bộ nhớ cho tên món ăn và tên nhà hàng.
+    Dựng lười, cập nhật sau mỗi commit qua sự kiện SQLAlchemy và đồng bộ định kỳ theo updated_at.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.foods = TrigramIndex()
+        self.restaurants = TrigramIndex()
+        self._ready = False
+        self._synced_at = None
+        self._watermark = None
+
+    def reset(self):
+        with self._lock:
+            self.foods = TrigramIndex()
+            self.restaurants = TrigramIndex()
+            self._ready = False
+            self._synced_at = None
+            self._watermark = None
+
+    def ensure_ready(self):
+        with self._lock:
+            if not self._ready:
+                self._load()
+                self._ready = True
+            elif time.monotonic() - self._synced_at >= Config.SEARCH_INDEX_REFRESH_SECONDS:
+                self._load(since=self._watermark)
+
+    def _load(self, since=None):
+        food_query = Food.query.with_entities(Food.id, Food.name, Food.updated_at)
+        restaurant_query = Restaurant.query.with_entities(Restaurant.id, Restaurant.name, Restaurant.updated_at)
+        if since is not None:
+            food_query = food_query.filter(Food.updated_at >= since)
+            restaurant_query = restaurant_query.filter(Restaurant.updated_at >= since)
+
+        watermark = since
+        for index, query in ((self.foods, food_query), (self.restaurants, restaurant_query)):
+            for doc_id, name, updated_at in query:
+                index.add(doc_id, name)
+                if updated_at and (watermark is None or updated_at > watermark):
+                    watermark = updated_at
+
+        self._watermark = watermark
+        self._synced_at = time.monotonic()
+
+    def index_food(self, food_id, name):
+        with self._lock:
+            self.foods.add(food_id, name)
+
+    def index_restaurant(self, restaurant_id, name):
+        with self._lock:
+            self.restaurants.add(restaurant_id, name)
+
+    def remove_food(self, food_id):
+        with self._lock:
+            self.foods.remove(food_id)
+
+    def remove_restaurant(self, restaurant_id):
+        with self._lock:
+            self.restaurants.remove(restaurant_id)
+
+    def search(self, q, threshold, limit):
+        self.ensure_ready()
+        with self._lock:
+            return self.foods.search(q, threshold, limit), self.restaurants.search(q, threshold, limit)
+
+    def apply(self, changes):
+        """Áp các thay đổi đã commit {(loại, id): tên | None}; index chưa dựng thì bỏ qua"""
+        with self._lock:
+            if not self._ready:
+                return
+            for (kind, doc_id), name in changes.items():
+                index = self.foods if kind == 'food' else self.restaurants
+                if name is None:
+                    index.remove(doc_id)
+                else:
+                    index.add(doc_id, name)
+
+
+class PostgresTrigramBackend:
+    """
+    So khớp gần đúng trong PostgreSQL bằng toán tử `<%` (word_similarity) của pg_trgm.
+    unaccent() không IMMUTABLE nên không dùng được trong index: bọc trong f_unaccent() IMMUTABLE,
+    dùng chung cho GIN index lower(f_unaccent(name)) và truy vấn để planner chọn được index.
+    SETUP_STATEMENTS được chạy khi db.create_all() trên PostgreSQL với SEARCH_TRIGRAM_BACKEND = 'pg_trgm'.
+    """
+
+    SETUP_STATEMENTS = (
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        'CREATE EXTENSION IF NOT EXISTS unaccent',
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+        "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$",
+        'CREATE INDEX IF NOT EXISTS ix_foods_name_trgm ON foods USING gin (lower(f_unaccent(name)) gin_trgm_ops)',
+        'CREATE INDEX IF NOT EXISTS ix_restaurants_name_trgm '
+        'ON restaurants USING gin (lower(f_unaccent(name)) gin_trgm_ops)',
+    )
+
+    @staticmethod
+    def install(connection):
+        for statement in PostgresTrigramBackend.SETUP_STATEMENTS:
+            connection.execute(text(statement))
+
+    @staticmethod
+    def _search(model, q, limit):
+        folded_name = func.lower(func.f_unaccent(model.name))
+        score = func.word_similarity(q, folded_name).label('score')
+        # Lọc bằng `<%` (dùng được GIN index), chỉ tính điểm cho các dòng còn lại
+        return db.session.query(model.id, score)\
+            .filter(literal(q).op('<%', is_comparison=True)(folded_name))\
+            .order_by(score.desc(), model.id)\
+            .limit(limit)\
+            .all()
+
+    def search(self, q, threshold, limit):
+        q = ' '.join(tokenize(q))
+        if not q:
+            return [], []
+        # Ngưỡng của `<%` là tham số pg_trgm.word_similarity_threshold, chỉ đặt cho transaction hiện tại
+        db.session.execute(select(func.set_config('pg_trgm.word_similarity_threshold', str(threshold), True)))
+        foods = PostgresTrigramBackend._search(Food, q, limit)
+        restaurants = PostgresTrigramBackend._search(Restaurant, q, limit)
+        return [tuple(row) for row in foods], [tuple(row) for row in restaurants]
+
+
+class FuzzySearch:
+    """Điểm truy cập chung, chọn backend theo Config.SEARCH_TRIGRAM_BACKEND ('memory' | 'pg_trgm')"""
+
+    BACKENDS = {
+        'memory': MemoryTrigramBackend,
+        'pg_trgm': PostgresTrigramBackend
+    }
+
+    def __init__(self):
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = self.BACKENDS[Config.SEARCH_TRIGRAM_BACKEND]()
+        return self._backend
+
+    def lookup(self, q, threshold=None, limit=None):
+        """
+        Tìm món ăn và nhà hàng có tên gần giống từ khoá.
+        Trả về ([(food_id, score)], [(restaurant_id, score)]) sắp theo score giảm dần.
+        """
+        threshold = Config.SEARCH_TRIGRAM_THRESHOLD if threshold is None else threshold
+        return self.backend.search(fold_text(q), threshold, limit or Config.SEARCH_TRIGRAM_LIMIT)
+
+
+fuzzy_search = FuzzySearch()
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _install_pg_trgm(target, connection, **kw):
+    if connection.dialect.name == 'postgresql' and Config.SEARCH_TRIGRAM_BACKEND == 'pg_trgm':
+        PostgresTrigramBackend.install(connection)
+
+
+def _record(target, key, name):
+    # Chỉ index trong bộ nhớ cần cập nhật; flush chưa phải commit nên chỉ ghi nhận
+    if not isinstance(fuzzy_search._backend, MemoryTrigramBackend):
+        return
+    session = object_session(target)
+    if session is not None:
+        pending_changes.current(session, _PENDING_KEY, dict)[key] = name
+
+
+@event.listens_for(Food, 'after_insert')
+@event.listens_for(Food, 'after_update')
+def _food_saved(mapper, connection, target):
+    _record(target, ('food', target.id), target.name)
+
+
+@event.listens_for(Food, 'after_delete')
+def _food_deleted(mapper, connection, target):
+    _record(target, ('food', target.id), None)
+
+
+@event.listens_for(Restaurant, 'after_insert')
+@event.listens_for(Restaurant, 'after_update')
+def _restaurant_saved(mapper, connection, target):
+    _record(target, ('restaurant', target.id), target.name)
+
+
+@event.listens_for(Restaurant, 'after_delete')
+def _restaurant_deleted(mapper, connection, target):
+    _record(target, ('restaurant', target.id), None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    changes = pending_changes.committed(session, _PENDING_KEY)
+    if isinstance(fuzzy_search._backend, MemoryTrigramBackend):
+        for pending in changes:
+            fuzzy_search._backend.apply(pending)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    pending_changes.discard(session, _PENDING_KEY, previous_transaction)
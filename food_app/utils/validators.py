@@ -76,4 +76,28 @@ def validate_review_data(data):
     if not isinstance(rating, (int, float)) or rating < 1 or rating > 5:
         return {'valid': False, 'message': 'Đánh giá phải từ 1-5'}
     
-    return {'valid': True, 'message': 'Dữ liệu hợp lệ'}
\ No newline at end of file
+    return {'valid': True, 'message': 'Dữ liệu hợp lệ'}
+
+def parse_id_list(args, name='ids', max_count=None):
+    """
+    Đọc danh sách id từ query (?ids=1,2,3 hoặc lặp lại ids=1&ids=2), bỏ trùng, giữ thứ tự.
+    Trả về {'valid', 'message', 'ids'}
+    """
+    from config import Config
+    max_count = max_count or Config.BATCH_MAX_IDS
+    ids = []
+    for value in args.getlist(name):
+        for part in value.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if not part.isdigit():
+                return {'valid': False, 'message': f'Id không hợp lệ: {part}', 'ids': []}
+            item_id = int(part)
+            if item_id not in ids:
+                ids.append(item_id)
+    if not ids:
+        return {'valid': False, 'message': f'Thiếu tham số {name}', 'ids': []}
+    if len(ids) > max_count:
+        return {'valid': False, 'message': f'Tối đa {max_count} id mỗi yêu cầu', 'ids': []}
+    return {'valid': True, 'message': 'Dữ liệu hợp lệ', 'ids': ids}
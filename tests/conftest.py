@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from itertools import count
+
+import pytest
+from sqlalchemy import event
+
+from food_app import create_app, db
+from food_app.models.food import Food
+from food_app.models.restaurant import Restaurant
+from food_app.models.user import User
+
+_sequence = count(1)
+
+
+@pytest.fixture(scope='session')
+def app():
+    # create_app chỉ gọi được một lần mỗi process (blueprint đăng ký ở mức module)
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager đếm số câu SQL chạy bên trong: `with count_queries() as queries: ...; queries[0]`"""
+    @contextmanager
+    def counter():
+        queries = [0]
+
+        def before_cursor_execute(*args):
+            queries[0] += 1
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield queries
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return counter
+
+
+@pytest.fixture
+def make_restaurants(app):
+    """Tạo `number` nhà hàng đã duyệt, mỗi nhà hàng một chủ và một món tên `food_name`"""
+    def make(number, food_name, price=50000):
+        restaurants = []
+        for _ in range(number):
+            n = next(_sequence)
+            owner = User(
+                username=f'owner_test_{n}', email=f'owner_test_{n}@foodapp.com', role='owner', password_hash='-'
+            )
+            restaurant = Restaurant(
+                name=f'Nhà hàng thử {n}', address=f'{n} Nguyễn Huệ', owner=owner, is_active=True,
+                approval_status='approved', latitude=10.77 + n * 0.001, longitude=106.70
+            )
+            db.session.add(Food(name=food_name, price=price, available=True, restaurant=restaurant))
+            restaurants.append(restaurant)
+        db.session.commit()
+        return restaurants
+    return make
@@ -0,0 +1,19 @@
+from food_app.utils.compression import _compress_stream
+
+
+def test_closing_compressed_stream_closes_wrapped_generator():
+    closed = []
+
+    def chunks():
+        try:
+            for i in range(10):
+                yield f'chunk {i}'
+        finally:
+            closed.append(True)
+
+    wrapped = chunks()  # Giữ tham chiếu: generator gốc không tự đóng khi bị thu hồi
+    stream = _compress_stream('gzip', 6, wrapped)
+    next(stream)
+    # Client ngắt kết nối giữa chừng: WSGI server gọi close() trên generator nén
+    stream.close()
+    assert closed == [True]
@@ -0,0 +1,35 @@
+from food_app import db
+from food_app.models.customer import Customer
+from food_app.models.order import Order
+from food_app.models.order_item import OrderItem
+
+
+def _order_item(restaurant, quantity):
+    customer = Customer(phone=f'09{restaurant.id:08d}')
+    food = restaurant.foods[0]
+    order = Order(
+        customer=customer, restaurant_id=restaurant.id, total_amount=food.price * quantity,
+        delivery_address='1 Nguyễn Huệ', delivery_phone=customer.phone
+    )
+    db.session.add(OrderItem(order=order, food=food, quantity=quantity, price=food.price))
+    db.session.commit()
+
+
+def test_restaurant_detail_etag_changes_with_sold_quantity(client, make_restaurants):
+    restaurant, = make_restaurants(1, 'Bún riêu cua')
+    _order_item(restaurant, 1)
+    url = f'/api/restaurant/{restaurant.id}/detail'
+
+    first = client.get(url)
+    assert first.status_code == 200, first.get_data(as_text=True)
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    # Đổi số lượng đã bán (OrderItem không có updated_at) phải làm đổi top_foods và ETag
+    item = OrderItem.query.filter_by(food_id=restaurant.foods[0].id).one()
+    item.quantity = 3
+    db.session.commit()
+
+    second = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert second.get_json()['data']['top_foods'][0]['total_sold'] == 3
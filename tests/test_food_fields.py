@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.fixture
+def foods(make_restaurants):
+    return make_restaurants(2, 'Phở bò tái')
+
+
+@pytest.mark.parametrize('query_string, keys', [
+    ({'fields': 'id,name'}, {'id', 'name'}),
+    ({'fields': 'id,name,distance_km'}, {'id', 'name', 'distance_km'}),
+    ({'fields': 'id,restaurant,distance_km'}, {'id', 'restaurant', 'distance_km'}),
+])
+def test_food_list_sparse_fields(client, foods, query_string, keys):
+    response = client.get('/api/food/', query_string=query_string)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    items = response.get_json()['data']['items']
+    assert items
+    assert all(set(item) == keys for item in items)
+
+
+def test_food_list_unknown_include(client, foods):
+    response = client.get('/api/food/', query_string={'include': 'foo'})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    items = response.get_json()['data']['items']
+    assert items and all('distance_km' in item for item in items)
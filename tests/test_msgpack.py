@@ -0,0 +1,15 @@
+import msgpack
+
+from food_app.utils.msgpack_encoder import MSGPACK_MIMETYPE
+
+
+def test_food_batch_round_trips_through_msgpack(client, make_restaurants):
+    restaurants = make_restaurants(2, 'Bánh canh cua')
+    ids = ','.join(str(restaurant.foods[0].id) for restaurant in restaurants)
+
+    as_json = client.get('/api/food/batch', query_string={'ids': ids})
+    as_msgpack = client.get('/api/food/batch', query_string={'ids': ids}, headers={'Accept': MSGPACK_MIMETYPE})
+
+    assert as_msgpack.status_code == 200
+    assert as_msgpack.mimetype == MSGPACK_MIMETYPE
+    assert msgpack.unpackb(as_msgpack.data) == as_json.get_json()
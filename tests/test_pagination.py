@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.mark.parametrize('cursor', ['garbage', 'W10', 'WyJ4IiwxXQ'])
+def test_malformed_cursor_is_rejected(client, cursor):
+    response = client.get('/api/food/', query_string={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Cursor không hợp lệ', 'success': False}
+
+
+def test_cursor_pages_follow_each_other(client, make_restaurants):
+    make_restaurants(3, 'Chè ba màu')
+    first = client.get('/api/food/', query_string={'cursor': '', 'per_page': 2}).get_json()['data']
+    second = client.get('/api/food/', query_string={'cursor': first['meta']['next_cursor'], 'per_page': 2}).get_json()['data']
+    first_ids = [item['id'] for item in first['items']]
+    second_ids = [item['id'] for item in second['items']]
+    assert len(first_ids) == 2 and second_ids
+    assert not set(first_ids) & set(second_ids)
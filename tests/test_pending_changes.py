@@ -0,0 +1,41 @@
+from food_app import db
+from food_app.models.food import Food
+from food_app.utils.search_index import search_index
+
+
+def _food_ids(q):
+    food_ids, _ = search_index.lookup(q)
+    return food_ids
+
+
+def test_savepoint_rollback_keeps_outer_changes(make_restaurants):
+    restaurant, = make_restaurants(1, 'Lẩu mắm miền Tây')
+    food, = restaurant.foods
+    search_index.ensure_ready()
+
+    food.name = 'Lẩu thái hải sản'
+    db.session.flush()
+    savepoint = db.session.begin_nested()
+    discarded = Food(name='Bánh tráng trộn sa tế', price=20000, available=True, restaurant_id=restaurant.id)
+    db.session.add(discarded)
+    db.session.flush()
+    discarded_id = discarded.id
+    savepoint.rollback()
+    db.session.commit()
+
+    assert food.id in _food_ids('lau thai hai san')
+    assert discarded_id not in _food_ids('banh trang tron sa te')
+
+
+def test_released_savepoint_waits_for_outer_commit(make_restaurants):
+    restaurant, = make_restaurants(1, 'Bột chiên trứng')
+    search_index.ensure_ready()
+
+    savepoint = db.session.begin_nested()
+    kept = Food(name='Há cảo tôm thịt', price=30000, available=True, restaurant_id=restaurant.id)
+    db.session.add(kept)
+    db.session.flush()
+    savepoint.commit()
+    assert kept.id not in _food_ids('ha cao tom')
+    db.session.commit()
+    assert kept.id in _food_ids('ha cao tom')
@@ -0,0 +1,26 @@
+import pytest
+
+from food_app.utils.rate_limit import MemoryRateLimitBackend, rate_limiter
+
+
+@pytest.fixture
+def limited(app):
+    """Bật rate limit với backend mới và giới hạn `test`: ip 5 token, phone 2 token"""
+    config = app.config
+    saved = config['RATE_LIMIT_ENABLED'], config['RATE_LIMITS'], app.extensions['rate_limiter']
+    config['RATE_LIMIT_ENABLED'] = True
+    config['RATE_LIMITS'] = {**config['RATE_LIMITS'], 'test': {'ip': (5, 600), 'phone': (2, 600)}}
+    app.extensions['rate_limiter'] = MemoryRateLimitBackend()
+    yield
+    config['RATE_LIMIT_ENABLED'], config['RATE_LIMITS'], app.extensions['rate_limiter'] = saved
+
+
+def _check(app, phone):
+    with app.test_request_context('/', method='POST', json={'phone': phone}, environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        return rate_limiter.check('test')
+
+
+def test_denied_request_does_not_drain_earlier_buckets(app, limited):
+    assert [_check(app, '0909000111') is None for _ in range(4)] == [True, True, False, False]
+    # Hai request bị bucket phone từ chối được trả lại token ip: còn đủ 3 token cho số khác
+    assert [_check(app, f'090900022{i}') is None for i in range(4)] == [True, True, True, False]
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from food_app.utils.responses import stream_response
+
+
+def _items(count, fail_at=None):
+    for i in range(count):
+        if i == fail_at:
+            raise RuntimeError('boom')
+        yield {'id': i}
+
+
+def test_stream_response_matches_success_body(app):
+    with app.test_request_context('/'):
+        response = stream_response('ok', _items(5), chunk_size=2)
+        body = json.loads(b''.join(response.response))
+    assert body == {'data': [{'id': i} for i in range(5)], 'message': 'ok', 'success': True}
+
+
+def test_stream_response_error_in_first_chunk_is_raised(app):
+    with app.test_request_context('/'):
+        with pytest.raises(RuntimeError):
+            stream_response('ok', _items(5, fail_at=1), chunk_size=2)
+
+
+def test_stream_response_error_mid_stream_closes_array(app):
+    with app.test_request_context('/'):
+        response = stream_response('ok', _items(5, fail_at=3), chunk_size=2)
+        body = json.loads(b''.join(response.response))
+    assert body['success'] is False
+    assert body['data'] == [{'id': 0}, {'id': 1}, {'id': 2}]
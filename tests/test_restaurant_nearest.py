@@ -0,0 +1,15 @@
+from food_app import db
+from food_app.dao.restaurant_dao import RestaurantDAO
+
+
+def test_list_nearest_applies_keyword_before_limit(make_restaurants):
+    restaurants = make_restaurants(6, 'Ốc len xào dừa')
+    far = restaurants[-2:]
+    for restaurant in far:
+        restaurant.name = f'Quán ốc đêm {restaurant.id}'
+    db.session.commit()
+
+    origin = (restaurants[0].latitude, restaurants[0].longitude)
+    ranked = RestaurantDAO.list_nearest(origin, limit=2, keyword='ốc đêm')
+    assert [restaurant_id for restaurant_id, _ in ranked] == [restaurant.id for restaurant in far]
+    assert RestaurantDAO.list_nearest(origin, limit=2, keyword='không có quán này') == []
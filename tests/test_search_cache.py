@@ -0,0 +1,43 @@
+from food_app import db
+from food_app.utils.search_cache import search_cache
+
+
+def _cached(client, q):
+    """Chạy tìm kiếm rồi trả về key của tập ứng viên trong cache"""
+    client.get('/api/search/', query_string={'q': q})
+    key = search_cache.make_key(q, None, None, 'candidates', None)
+    assert search_cache.get(key) is not None
+    return key
+
+
+def test_restaurant_update_invalidates_only_its_entries_after_commit(client, make_restaurants):
+    changed, = make_restaurants(1, 'Hủ tiếu Nam Vang')
+    make_restaurants(1, 'Bánh xèo miền Tây')
+    changed_key = _cached(client, 'hu tieu')
+    other_key = _cached(client, 'banh xeo')
+
+    changed.address = '99 Lê Lợi'
+    db.session.flush()
+    assert search_cache.get(changed_key) is not None
+    db.session.commit()
+    assert search_cache.get(changed_key) is None
+    assert search_cache.get(other_key) is not None
+
+
+def test_rolled_back_change_keeps_cache(client, make_restaurants):
+    restaurant, = make_restaurants(1, 'Bò kho bánh mì')
+    key = _cached(client, 'bo kho')
+
+    restaurant.address = '1 Hai Bà Trưng'
+    db.session.flush()
+    db.session.rollback()
+    assert search_cache.get(key) is not None
+
+
+def test_restaurant_rename_clears_cache(client, make_restaurants):
+    restaurant, = make_restaurants(1, 'Gỏi cuốn tôm thịt')
+    key = _cached(client, 'goi cuon')
+
+    restaurant.name = 'Quán gỏi cuốn'
+    db.session.commit()
+    assert search_cache.get(key) is None
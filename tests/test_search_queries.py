@@ -0,0 +1,31 @@
+from food_app.utils.search_cache import search_cache
+
+
+def _query_count(client, count_queries, q, **params):
+    # Lượt đầu làm nóng index trong bộ nhớ; đo trên cache kết quả rỗng để mọi truy vấn DB đều chạy
+    client.get('/api/search/', query_string={'q': q, **params})
+    search_cache.clear()
+    with count_queries() as queries:
+        response = client.get('/api/search/', query_string={'q': q, 'per_page': 50, **params})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return queries[0], response.get_json()['data']
+
+
+def test_search_query_count_is_independent_of_result_size(client, count_queries, make_restaurants):
+    counts = []
+    for number in (3, 10, 30):
+        make_restaurants(number, 'Bún bò Huế')
+        queries, data = _query_count(client, count_queries, 'bun bo')
+        assert len(data['items']) >= number
+        counts.append(queries)
+    assert len(set(counts)) == 1, counts
+
+
+def test_search_query_count_sorted_by_price(client, count_queries, make_restaurants):
+    counts = []
+    for number in (3, 10, 30):
+        make_restaurants(number, 'Cơm tấm sườn', price=40000)
+        queries, data = _query_count(client, count_queries, 'com tam', sort_by='price')
+        assert len(data['items']) >= number
+        counts.append(queries)
+    assert len(set(counts)) == 1, counts
@@ -0,0 +1,34 @@
+from food_app.utils.suggest_index import SuggestIndex
+
+_ITEMS = [
+    ('food', 1, 'Bún bò Huế', 50, {'restaurant_id': 1}),
+    ('food', 2, 'Bún bò Huế', 80, {'restaurant_id': 2}),
+    ('food', 3, 'Bánh mì thịt', 30, {'restaurant_id': 1}),
+    ('food', 4, 'Bún chả', 10, {'restaurant_id': 2}),
+    ('restaurant', 1, 'Bếp nhà Bống', 90, {}),
+    ('category', 1, 'Bún', 200, {}),
+]
+
+
+def _names(index, prefix, limit=10):
+    return [(entry['type'], entry['id']) for entry in index.suggest(prefix, limit)]
+
+
+def test_short_prefix_uses_ranking_without_popularity_in_payload():
+    index = SuggestIndex.build(_ITEMS)
+    assert _names(index, 'b') == [('category', 1), ('restaurant', 1), ('food', 2), ('food', 3), ('food', 4)]
+    assert _names(index, 'b', 2) == [('category', 1), ('restaurant', 1)]
+    assert all('popularity' not in entry for entry in index.suggest('b', 10))
+
+
+def test_short_prefix_follows_edits():
+    index = SuggestIndex.build(_ITEMS)
+    assert _names(index, 'bu') == [('category', 1), ('food', 2), ('food', 4)]
+    index.remove('food', 2)
+    assert _names(index, 'bu') == [('category', 1), ('food', 1), ('food', 4)]
+    index.add('food', 5, 'Bún riêu', 500, restaurant_id=3)
+    assert _names(index, 'bu') == [('food', 5), ('category', 1), ('food', 1), ('food', 4)]
+    # weight None giữ trọng số cũ khi đổi tên
+    index.add('food', 5, 'Phở gà', None, restaurant_id=3)
+    assert _names(index, 'bu') == [('category', 1), ('food', 1), ('food', 4)]
+    assert _names(index, 'ph') == [('food', 5)]